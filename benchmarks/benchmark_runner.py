@@ -0,0 +1,164 @@
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from time import perf_counter
+from typing import Callable
+
+
+class BenchmarkRunner:
+    """
+    Mide escenarios de rendimiento y guarda los resultados en un archivo JSON.
+
+    Cada escenario se repite varias veces y se guardan el mínimo, la mediana, el promedio
+    y la desviación estándar en segundos, además del tiempo por operación. El archivo
+    incluye la versión de Python, el sistema y el commit de git, de modo que dos archivos
+    se pueden comparar con :method:`compare` para encontrar regresiones.
+    """
+
+    def __init__(self, repeat: int = 5) -> None:
+        """
+        Construye el medidor de escenarios.
+
+        Parámetros:
+            - :param:`repeat` (int): Número de repeticiones de cada escenario.
+        """
+
+        self._repeat: int = repeat
+        self.results: list[dict[str]] = []
+
+
+    def measure(self, scenario: str, size: int, function: Callable[[], None],
+                setup: Callable[[], None] | None = None, operations: int = 1) -> dict[str]:
+        """
+        Mide un escenario y agrega su resultado
+
+        Parámetros:
+            - :param:`scenario` (str): Nombre del escenario.
+            - :param:`size` (int): Tamaño de los datos del escenario.
+            - :param:`function` (Callable[[], None]): Función a medir.
+            - :param:`setup` (Callable[[], None] | None): Preparación antes de cada repetición, no se mide.
+            - :param:`operations` (int): Operaciones que hace cada llamada a la función.
+
+        Regresa:
+            - :return:`result` (dict[str]): Resultado del escenario
+        """
+
+        timings: list[float] = []
+
+        for __ in range(self._repeat):
+            if setup is not None:
+                setup()
+
+            start: float = perf_counter()
+            function()
+            timings.append(perf_counter() - start)
+
+        result: dict[str] = {
+            "scenario" : scenario,
+            "size" : size,
+            "repeat" : self._repeat,
+            "operations" : operations,
+            "min" : min(timings),
+            "median" : statistics.median(timings),
+            "mean" : statistics.fmean(timings),
+            "stdev" : statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "per_operation" : statistics.median(timings) / operations,
+        }
+        self.results.append(result)
+
+        print(f"{scenario:<32} {size:>9}  median {result['median'] * 1000:10.3f} ms  "
+              f"per op {result['per_operation'] * 1e6:10.2f} µs")
+
+        return result
+
+
+    def _metadata(self) -> dict[str]:
+        """
+        Datos del entorno en el que se midieron los escenarios
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`metadata` (dict[str]): Fecha, versión de Python, sistema y commit de git
+        """
+
+        try:
+            commit: str = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output = True, text = True, check = True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = ""
+
+        return {
+            "date" : datetime.now().isoformat(timespec = "seconds"),
+            "python" : platform.python_version(),
+            "platform" : platform.platform(),
+            "commit" : commit,
+        }
+
+
+    def save(self, path: str, parameters: dict[str] | None = None) -> None:
+        """
+        Guarda los resultados en un archivo JSON
+
+        Parámetros:
+            - :param:`path` (str): Ruta del archivo.
+            - :param:`parameters` (dict[str] | None): Parámetros con los que se corrieron los escenarios.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+
+        with open(path, "w", encoding = "utf-8") as file:
+            json.dump(
+                {"metadata" : self._metadata(), "parameters" : parameters or {}, "results" : self.results},
+                file,
+                ensure_ascii = False,
+                indent = 2
+            )
+
+
+    def compare(self, baseline_path: str, threshold: float = 0.10) -> list[dict[str]]:
+        """
+        Compara los resultados con los de otro archivo y regresa los escenarios más lentos
+
+        Se compara la mediana de cada escenario con el mismo nombre y tamaño.
+
+        Parámetros:
+            - :param:`baseline_path` (str): Ruta del archivo de resultados de referencia.
+            - :param:`threshold` (float): Aumento relativo a partir del cual se considera una regresión.
+
+        Regresa:
+            - :return:`regressions` (list[dict[str]]): Escenarios con su mediana anterior, actual y el cambio relativo
+        """
+
+        with open(baseline_path, "r", encoding = "utf-8") as file:
+            baseline: dict[tuple[str, int], dict[str]] = {
+                (result["scenario"], result["size"]) : result for result in json.load(file)["results"]
+            }
+
+        regressions: list[dict[str]] = []
+
+        for result in self.results:
+            previous: dict[str] | None = baseline.get((result["scenario"], result["size"]))
+            if previous is None or previous["median"] == 0:
+                continue
+
+            change: float = result["median"] / previous["median"] - 1
+            if change > threshold:
+                regressions.append({
+                    "scenario" : result["scenario"],
+                    "size" : result["size"],
+                    "baseline" : previous["median"],
+                    "current" : result["median"],
+                    "change" : change,
+                })
+
+        return regressions
@@ -0,0 +1,220 @@
+
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from random import Random
+from typing import Iterator
+
+from other.product import Product
+from other.db_connection import DBConnection
+
+
+class DataGenerator:
+    """
+    Genera catálogos y historiales de órdenes sintéticos para las pruebas de rendimiento.
+
+    Con la misma semilla se generan siempre los mismos datos, así los resultados de dos
+    versiones de la aplicación se pueden comparar.
+
+    Los catálogos se escriben como libros de Excel con las mismas columnas que
+    :file:`catalogo.xlsm` y las órdenes se guardan con :method:`DBConnection.send_orders_to_db`,
+    por lo que sirven para cualquier motor de :class:`DBBackend`.
+    """
+
+    # Columnas del archivo de Excel del catálogo
+    CATALOG_COLUMNS: list[str] = [
+        "ID", "Nombre", "Precio", "Precio empleado", "Precio socio", "Cantidad", "Imagen", "Información adicional"
+    ]
+
+    # Palabras para formar los nombres de los productos
+    _NOUNS: list[str] = [
+        "Latte", "Café", "Capuchino", "Americano", "Moka", "Chai", "Tisana", "Agua", "Baguette",
+        "Girella", "Sfoglia", "Croissant", "Panqué", "Galleta", "Brownie", "Té", "Frappé", "Jugo",
+    ]
+    _VARIANTS: list[str] = [
+        "de vainilla", "de avellana", "de canela", "de chocolate", "de fresa", "de limón",
+        "de almendra", "de coco", "de caramelo", "de matcha", "de naranja", "de mango",
+    ]
+    _SIZES: list[str] = ["chico", "mediano", "grande"]
+    _IMAGES: list[str] = ["agua", "baguette", "cafe", "girella", "sfoglia", "tisana"]
+    _ORIGINS: list[str] = ["Local", "Rappi", "Menú digital"]
+    _PAYMENT_METHODS: list[str] = ["Efectivo", "Tarjeta"]
+
+    def __init__(self, seed: int = 42) -> None:
+        """
+        Construye el generador de datos.
+
+        Parámetros:
+            - :param:`seed` (int): Semilla de los números aleatorios.
+        """
+
+        self._seed: int = seed
+
+
+    def products(self, size: int) -> list[Product]:
+        """
+        Genera un catálogo de productos con nombres únicos
+
+        Parámetros:
+            - :param:`size` (int): Número de productos.
+
+        Regresa:
+            - :return:`products` (list[Product]): Productos del catálogo
+        """
+
+        random: Random = Random(f"{self._seed}-products")
+        products: list[Product] = []
+        names: set[str] = set()
+
+        for product_id in range(1, size + 1):
+            name: str = " ".join(
+                (random.choice(self._NOUNS), random.choice(self._VARIANTS), random.choice(self._SIZES))
+            )
+            # Los nombres deben ser únicos, se numeran los repetidos
+            if name in names:
+                name = f"{name} {product_id}"
+            names.add(name)
+
+            price: int = random.randrange(15, 120)
+
+            products.append(Product(
+                product_id,
+                name,
+                price,
+                round(price * 0.85),
+                round(price * 0.70),
+                random.randrange(0, 50),
+                f"assets\\images\\{random.choice(self._IMAGES)}.png",
+                ""
+            ))
+
+        return products
+
+
+    def write_catalog(self, path: str, size: int) -> list[Product]:
+        """
+        Escribe un catálogo de productos en un libro de Excel compatible con :file:`catalogo.xlsm`
+
+        Parámetros:
+            - :param:`path` (str): Ruta del libro de Excel.
+            - :param:`size` (int): Número de productos.
+
+        Regresa:
+            - :return:`products` (list[Product]): Productos escritos en el libro
+        """
+
+        # Solo la escritura del libro necesita openpyxl
+        from openpyxl import Workbook
+
+        products: list[Product] = self.products(size)
+
+        workbook: Workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = "Hoja1"
+        sheet.append(self.CATALOG_COLUMNS)
+
+        for product in products:
+            sheet.append([
+                product.id, product.name, product.price, product.employee_price, product.partner_price,
+                product.quantity, product.image, product.additional_info or None
+            ])
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+        workbook.save(path)
+
+        return products
+
+
+    def orders(self, products: list[Product], size: int, days: int = 365) -> Iterator[dict[str]]:
+        """
+        Genera un historial de comandas con el formato de :method:`DBConnection.send_order_to_db`
+
+        Las comandas se reparten en orden cronológico a lo largo de los días indicados y se
+        generan una por una, así los historiales grandes no se guardan completos en memoria.
+
+        Parámetros:
+            - :param:`products` (list[Product]): Productos del catálogo.
+            - :param:`size` (int): Número de comandas.
+            - :param:`days` (int): Días que abarca el historial.
+
+        Regresa:
+            - :return:`orders` (Iterator[dict[str]]): Comandas generadas
+        """
+
+        random: Random = Random(f"{self._seed}-orders-{size}")
+        start: datetime = datetime(2024, 1, 1, 8, 0, 0)
+        step: float = days * 24 * 3600 / max(size, 1)
+
+        for index in range(size):
+            moment: datetime = start + timedelta(seconds = index * step)
+            chosen: list[Product] = random.sample(products, min(len(products), random.randint(1, 4)))
+            items: list[tuple[int, int, int]] = [
+                (int(product.id), random.randint(1, 3), int(product.price)) for product in chosen
+            ]
+
+            yield {
+                "customer_name" : f"Cliente {index + 1}",
+                "items" : items,
+                "total" : sum(quantity * unit_price for _, quantity, unit_price in items),
+                "employee" : f"Empleado {random.randint(1, 8)}",
+                "created_at" : moment.strftime("%Y-%m-%d %H:%M:%S"),
+                "submission_id" : f"bench-{self._seed}-{size}-{index}",
+                # Las órdenes se reparten entre los tres orígenes
+                "origin" : self._ORIGINS[index % 3],
+                "payment_method" : random.choice(self._PAYMENT_METHODS),
+            }
+
+
+    def fill_orders(self, db_connection: DBConnection, products: list[Product], size: int,
+                    active: int = 50, batch_size: int = 1000) -> None:
+        """
+        Llena la tabla de órdenes con un historial generado
+
+        Todas las órdenes quedan cerradas salvo las últimas, como en un local que lleva
+        tiempo operando.
+
+        Parámetros:
+            - :param:`db_connection` (DBConnection): Conexión con la base de datos.
+            - :param:`products` (list[Product]): Productos del catálogo.
+            - :param:`size` (int): Número de órdenes.
+            - :param:`active` (int): Número de órdenes que quedan activas.
+            - :param:`batch_size` (int): Órdenes por transacción.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        db_connection.sync_products(products)
+        orders: Iterator[dict[str]] = self.orders(products, size)
+
+        # El historial no descuenta existencias, se generó sin cuidar que alcanzaran
+        with db_connection.transaction() as cursor:
+            cursor.execute("UPDATE products SET stock = NULL")
+
+        while batch := list(islice(orders, batch_size)):
+            db_connection.send_orders_to_db(batch)
+
+        # Se cierran las órdenes del historial, que se modificaron por última vez cuando se tomaron
+        with db_connection.transaction() as cursor:
+            cursor.execute(
+                db_connection._backend.sql(
+                    "UPDATE orders SET active = 0, updated_at = created_at WHERE submission_id LIKE %s AND id <= %s"
+                ),
+                (f"bench-{self._seed}-{size}-%", self._last_id(cursor) - active)
+            )
+
+
+    def _last_id(self, cursor: object) -> int:
+        """
+        Regresa el ID más alto de la tabla de órdenes
+
+        Parámetros:
+            - :param:`cursor` (object): Cursor abierto.
+
+        Regresa:
+            - :return:`last_id` (int): ID más alto, 0 si la tabla está vacía
+        """
+
+        cursor.execute("SELECT MAX(id) FROM orders")
+
+        return cursor.fetchone()[0] or 0
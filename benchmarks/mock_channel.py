@@ -0,0 +1,87 @@
+
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+class MockChannel:
+    """
+    Adaptador simulado de un canal de entrega que consulta el canal de disponibilidad.
+
+    Guarda una copia local de la disponibilidad de cada producto y la mantiene al día con las
+    respuestas de :class:`AvailabilityFeed`: envía la última ``ETag`` en ``If-None-Match`` y
+    aplica solo los productos que cambiaron. Verifica que las versiones nunca retrocedan y
+    cuenta las consultas, las respuestas ``304`` y los bytes recibidos.
+    """
+
+    def __init__(self, url: str) -> None:
+        """
+        Construye el adaptador sin consultar.
+
+        Parámetros:
+            - :param:`url` (str): Dirección del canal, por ejemplo ``http://127.0.0.1:8552/availability``.
+        """
+
+        self._url: str = url
+        self._etag: str | None = None
+        # Disponibilidad conocida por ID del producto
+        self.products: dict[int, dict] = {}
+        self.version: int = 0
+        self.polls: int = 0
+        self.not_modified: int = 0
+        self.received_products: int = 0
+        self.received_bytes: int = 0
+        self.full_bytes: int = 0
+        self.errors: list[str] = []
+
+
+    def poll(self) -> bool:
+        """
+        Consulta el canal una vez y aplica los cambios recibidos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`changed` (bool): Verdadero si se recibieron cambios
+        """
+
+        request: Request = Request(self._url, headers = {"If-None-Match" : self._etag} if self._etag else {})
+        self.polls += 1
+
+        try:
+            with urlopen(request, timeout = 10) as response:
+                body: bytes = response.read()
+                etag: str = response.headers["ETag"]
+        except HTTPError as error:
+            if error.code != 304:
+                raise
+            self.not_modified += 1
+            return False
+
+        changes: dict[str] = json.loads(body)
+        self.received_bytes += len(body)
+
+        if changes["version"] < self.version:
+            self.errors.append(f"La versión del canal retrocedió de {self.version} a {changes['version']}")
+
+        if changes["full"]:
+            self.products = {}
+            self.full_bytes = len(body)
+        else:
+            self.received_products += len(changes["products"])
+
+        for product in changes["products"]:
+            known: dict | None = self.products.get(product["id"])
+
+            if known is not None and product["version"] < known["version"]:
+                self.errors.append(f"El producto {product['id']} regresó a la versión {product['version']}")
+            if product["available"] != (product["stock"] is None or product["stock"] > 0):
+                self.errors.append(f"El producto {product['id']} tiene una disponibilidad inconsistente")
+
+            self.products[product["id"]] = product
+
+        self.version = changes["version"]
+        self._etag = etag
+
+        return True
@@ -0,0 +1,144 @@
+
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from other.db_backend import DBBackend, MySQLBackend, SQLiteBackend
+from benchmarks.scenarios import Scenarios
+from benchmarks.data_generator import DataGenerator
+from benchmarks.benchmark_runner import BenchmarkRunner
+
+
+# Tamaños de los datos de cada modo
+QUICK_CATALOG_SIZES: list[int] = [10, 100, 1000]
+QUICK_ORDER_SIZES: list[int] = [1000, 10000]
+FULL_CATALOG_SIZES: list[int] = [10, 100, 1000, 10000]
+FULL_ORDER_SIZES: list[int] = [1000, 10000, 100000, 1000000]
+# Órdenes activas del tablero de órdenes
+BOARD_SIZES: list[int] = [10, 100, 500]
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Lee los argumentos de la línea de comandos
+
+    Parámetros:
+        - No recibe parámetros.
+
+    Regresa:
+        - :return:`arguments` (argparse.Namespace): Argumentos leídos
+    """
+
+    parser = argparse.ArgumentParser(
+        description = "Pruebas de rendimiento de eTrigali con catálogos e historiales de órdenes sintéticos."
+    )
+    parser.add_argument("--full", action = "store_true", help = "Catálogos de hasta 10,000 productos e historiales de hasta 1,000,000 de órdenes.")
+    parser.add_argument("--catalog-sizes", type = int, nargs = "+", help = "Tamaños de los catálogos.")
+    parser.add_argument("--order-sizes", type = int, nargs = "+", help = "Tamaños de los historiales de órdenes.")
+    parser.add_argument("--only", nargs = "+", help = "Escenarios a correr: product_table_load, build_catalog, search, product_list, order_board, orders.")
+    parser.add_argument("--repeat", type = int, default = 5, help = "Repeticiones de cada escenario.")
+    parser.add_argument("--seed", type = int, default = 42, help = "Semilla de los datos generados.")
+    parser.add_argument("--backend", choices = ["sqlite", "mysql"], default = "sqlite", help = "Motor de la base de datos de órdenes.")
+    parser.add_argument("--mysql", nargs = 4, metavar = ("HOST", "USER", "PASSWORD", "DATABASE"),
+                        help = "Base de datos MySQL exclusiva para las pruebas, sus órdenes se borran.")
+    parser.add_argument("--workdir", default = os.path.join("benchmarks", "data"), help = "Carpeta de los datos generados.")
+    parser.add_argument("--output", help = "Archivo JSON de resultados, por defecto benchmarks/results/<fecha>.json.")
+    parser.add_argument("--compare", help = "Archivo JSON de resultados de referencia para buscar regresiones.")
+    parser.add_argument("--threshold", type = float, default = 0.10, help = "Aumento relativo de la mediana que se reporta como regresión.")
+
+    return parser.parse_args()
+
+
+def backend_factory(arguments: argparse.Namespace):
+    """
+    Regresa la función que crea una base de datos de órdenes vacía para cada tamaño de historial
+
+    Parámetros:
+        - :param:`arguments` (argparse.Namespace): Argumentos de la línea de comandos.
+
+    Regresa:
+        - :return:`factory` (Callable[[int], DBBackend]): Función que recibe el tamaño del historial
+    """
+
+    def sqlite_backend(size: int) -> DBBackend:
+        path: str = os.path.join(arguments.workdir, f"orders_{size}.db")
+        if os.path.exists(path):
+            os.remove(path)
+
+        return SQLiteBackend(path)
+
+    def mysql_backend(size: int) -> DBBackend:
+        host, user, password, database = arguments.mysql
+        backend: MySQLBackend = MySQLBackend(host, password, user, database)
+
+        # La base de datos es exclusiva de las pruebas, se vacía antes de cada historial
+        connection = backend.connect()
+        cursor = connection.cursor()
+        for table in ("order_items", "orders"):
+            try:
+                cursor.execute(f"DELETE FROM {table}")
+            except Exception:
+                pass
+        connection.commit()
+        connection.close()
+
+        return backend
+
+    if arguments.backend == "mysql":
+        if arguments.mysql is None:
+            sys.exit("--backend mysql requiere --mysql HOST USER PASSWORD DATABASE")
+        return mysql_backend
+
+    return sqlite_backend
+
+
+def main() -> None:
+    arguments: argparse.Namespace = parse_arguments()
+
+    catalog_sizes: list[int] = arguments.catalog_sizes or (FULL_CATALOG_SIZES if arguments.full else QUICK_CATALOG_SIZES)
+    order_sizes: list[int] = arguments.order_sizes or (FULL_ORDER_SIZES if arguments.full else QUICK_ORDER_SIZES)
+    only: set[str] = set(arguments.only or ["product_table_load", "build_catalog", "search", "product_list", "order_board", "orders"])
+
+    runner: BenchmarkRunner = BenchmarkRunner(arguments.repeat)
+    scenarios: Scenarios = Scenarios(runner, DataGenerator(arguments.seed), arguments.workdir, backend_factory(arguments))
+
+    for size in catalog_sizes:
+        for scenario in ("product_table_load", "build_catalog", "search", "product_list"):
+            if scenario in only:
+                getattr(scenarios, scenario)(size)
+
+    if "order_board" in only:
+        for size in BOARD_SIZES:
+            scenarios.order_board(size)
+
+    if "orders" in only:
+        for size in order_sizes:
+            scenarios.orders(size)
+
+    output: str = arguments.output or os.path.join(
+        "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    runner.save(output, {
+        "catalog_sizes" : catalog_sizes,
+        "order_sizes" : order_sizes,
+        "repeat" : arguments.repeat,
+        "seed" : arguments.seed,
+        "backend" : arguments.backend,
+    })
+    print(f"Resultados guardados en {output}")
+
+    if arguments.compare:
+        regressions: list[dict[str]] = runner.compare(arguments.compare, arguments.threshold)
+
+        for regression in regressions:
+            print(f"REGRESIÓN {regression['scenario']} ({regression['size']}): "
+                  f"{regression['baseline'] * 1000:.3f} ms -> {regression['current'] * 1000:.3f} ms "
+                  f"(+{regression['change']:.0%})")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
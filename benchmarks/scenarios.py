@@ -0,0 +1,340 @@
+
+import os
+from datetime import date as Date
+from typing import Callable
+
+import flet as ft
+
+from other.product import Product
+from other.services import services
+from other.product_card import ProductCard
+from other.product_list import ProductList
+from other.product_table import ProductTable
+from other.product_search import ProductSearch
+from other.customer_type import CustomerType
+from other.db_backend import DBBackend
+from other.db_connection import DBConnection
+from other.order_delta import OrderDelta
+from benchmarks.data_generator import DataGenerator
+from benchmarks.benchmark_runner import BenchmarkRunner
+
+
+class Scenarios:
+    """
+    Escenarios de rendimiento de las rutas críticas de la aplicación.
+
+    Cada método prepara sus datos con :class:`DataGenerator` y mide con :class:`BenchmarkRunner`:
+        - Carga del catálogo con :class:`ProductTable`, con y sin copia binaria
+        - Construcción del catálogo de la caja con :method:`SCashier._build_catalog`
+        - Búsqueda de productos con :class:`ProductSearch`
+        - Agregar, reducir y eliminar productos de :class:`ProductList`
+        - Envío de comandas con :method:`DBConnection.send_order_to_db`
+        - Lectura de órdenes con :method:`DBConnection.get_orders` y :method:`DBConnection.get_order_changes`
+        - Tablero de órdenes activas de :class:`SOrders`
+        - Corte de caja con :method:`DBConnection.get_sales_summary` y suma del historial a los resúmenes de ventas
+    """
+
+    # Consultas de la barra de búsqueda
+    SEARCH_QUERIES: list[str] = ["l", "la", "caf", "vainilla", "de coco", "grande", "latte de", "chico", "xyz", "12"]
+
+    def __init__(self, runner: BenchmarkRunner, generator: DataGenerator, workdir: str,
+                 backend_factory: Callable[[int], DBBackend]) -> None:
+        """
+        Construye los escenarios.
+
+        Parámetros:
+            - :param:`runner` (BenchmarkRunner): Medidor de escenarios.
+            - :param:`generator` (DataGenerator): Generador de datos.
+            - :param:`workdir` (str): Carpeta para los catálogos y las bases de datos generados.
+            - :param:`backend_factory` (Callable[[int], DBBackend]): Crea un motor de base de datos
+              vacío para un historial del tamaño indicado.
+        """
+
+        self._runner: BenchmarkRunner = runner
+        self._generator: DataGenerator = generator
+        self._workdir: str = workdir
+        self._backend_factory: Callable[[int], DBBackend] = backend_factory
+
+        os.makedirs(workdir, exist_ok = True)
+
+
+    def product_table_load(self, size: int) -> None:
+        """
+        Mide la carga del catálogo desde el archivo de Excel y desde su copia binaria
+
+        Parámetros:
+            - :param:`size` (int): Número de productos del catálogo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        path: str = os.path.join(self._workdir, f"catalogo_{size}.xlsm")
+        self._generator.write_catalog(path, size)
+
+        def remove_snapshot() -> None:
+            if os.path.exists(f"{path}.snapshot"):
+                os.remove(f"{path}.snapshot")
+
+        self._runner.measure("product_table_load_cold", size, lambda: ProductTable(path), setup = remove_snapshot)
+        self._runner.measure("product_table_load_snapshot", size, lambda: ProductTable(path))
+
+
+    def build_catalog(self, size: int) -> None:
+        """
+        Mide la construcción del catálogo de la caja, con la caché de tarjetas vacía y llena,
+        la apertura de una sesión de caja nueva, el cambio de tipo de cliente y el desplazamiento
+
+        Parámetros:
+            - :param:`size` (int): Número de productos del catálogo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        from styles.s_cashier import SCashier, styles
+
+        products: list[Product] = self._generator.products(size)
+
+        # El catálogo de la caja se toma de los servicios compartidos
+        services._products = products
+        services._products_by_name = {product.name : product for product in products}
+        services._products_by_id = {int(product.id) : product for product in products}
+        services._product_search = None
+
+        s_cashier: SCashier = SCashier()
+
+        def empty_catalog() -> None:
+            s_cashier._card_cache.clear()
+
+        self._runner.measure("build_catalog_cold", size, s_cashier._build_catalog, setup = empty_catalog)
+        self._runner.measure("build_catalog_cached", size, s_cashier._build_catalog)
+        self._runner.measure("cashier_session", size, lambda: SCashier().catalog())
+
+        # Cambio de tipo de cliente de ida y vuelta con el catálogo ya construido
+        def switch_customer_type() -> None:
+            s_cashier._apply_customer_type_discount(None, CustomerType.SOCIO)
+            s_cashier._apply_customer_type_discount(None, CustomerType.CLIENTE)
+
+        self._runner.measure("customer_type_switch", size, switch_customer_type, operations = 2)
+
+        # Desplazamiento fila por fila hasta el final del catálogo virtualizado
+        row_height: int = styles["catalog"]["row_height"]
+        rows: int = s_cashier._catalog_grid.row_count
+
+        def scroll_catalog() -> None:
+            for row in range(rows):
+                s_cashier._catalog_grid._on_scroll(ft.OnScrollEvent("update", row * row_height, 0, rows * row_height, 420))
+
+        def scroll_to_top() -> None:
+            s_cashier._catalog_grid._on_scroll(ft.OnScrollEvent("update", 0, 0, rows * row_height, 420))
+
+        self._runner.measure("catalog_scroll", size, scroll_catalog, setup = scroll_to_top, operations = max(rows, 1))
+
+
+    def search(self, size: int) -> None:
+        """
+        Mide la construcción del índice de búsqueda y las consultas sin caché
+
+        Parámetros:
+            - :param:`size` (int): Número de productos del catálogo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        products: list[Product] = self._generator.products(size)
+        self._runner.measure("search_index_build", size, lambda: ProductSearch(products))
+
+        index: ProductSearch = ProductSearch(products)
+
+        def run_queries() -> None:
+            for query in self.SEARCH_QUERIES:
+                index._search(query)
+
+        self._runner.measure("search_query", size, run_queries, operations = len(self.SEARCH_QUERIES))
+
+
+    def product_list(self, size: int) -> None:
+        """
+        Mide agregar, reducir y eliminar productos de la comanda con tantos productos distintos como el catálogo
+
+        Parámetros:
+            - :param:`size` (int): Número de productos del catálogo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        products: list[Product] = self._generator.products(size)
+        product_list: ProductList = ProductList()
+        content: ft.Container = ft.Container(content = ft.Column())
+        total: ft.Container = ft.Container(content = ft.Text())
+
+        cards: list[ft.Card] = [
+            ProductCard(product).build_ticket_card(content, product_list, total) for product in products
+        ]
+        attributes: list[tuple] = [product_list._get_product_atributes(card) for card in cards]
+
+        def empty_list() -> None:
+            product_list.clear()
+            content.content.controls.clear()
+
+        def fill_list() -> None:
+            empty_list()
+            add_all()
+
+        def add_all() -> None:
+            for card, (product_id, name, price) in zip(cards, attributes):
+                product_list._add_it(content, card, product_id, name, price)
+
+        def reduce_all() -> None:
+            for product_id, _, _ in attributes:
+                product_list._reduce_quantity(content, product_id)
+
+        def delete_all() -> None:
+            for product_id, _, _ in attributes:
+                product_list._delete_it(content, product_id)
+
+        self._runner.measure("product_list_add", size, add_all, setup = empty_list, operations = size)
+        self._runner.measure("product_list_add_existing", size, add_all, setup = fill_list, operations = size)
+        self._runner.measure("product_list_reduce", size, reduce_all, setup = lambda: (fill_list(), add_all()), operations = size)
+        self._runner.measure("product_list_delete", size, delete_all, setup = fill_list, operations = size)
+
+
+    def order_board(self, size: int, catalog_size: int = 50) -> None:
+        """
+        Mide el primer despliegue del tablero de órdenes, la llegada de una orden y el cambio
+        entre el modo con todas las órdenes y el modo por páginas
+
+        Parámetros:
+            - :param:`size` (int): Número de órdenes activas.
+            - :param:`catalog_size` (int): Número de productos del catálogo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        from styles.s_orders import SOrders
+
+        products: list[Product] = self._generator.products(catalog_size)
+        names: dict[int, str] = {int(product.id) : product.name for product in products}
+
+        # Órdenes activas con el formato que entrega la consulta de órdenes
+        active_orders: dict[int, dict] = {
+            index + 1 : {
+                "customer_name" : order["customer_name"],
+                "products_n_quantities" : {names[product_id] : str(quantity) for product_id, quantity, _ in order["items"]},
+                "total" : str(order["total"]),
+                "hour" : order["created_at"][11:16],
+                "origin" : order["origin"],
+            }
+            for index, order in enumerate(self._generator.orders(products, size))
+        }
+        boards: list[SOrders] = []
+
+        def new_board() -> None:
+            boards.append(SOrders())
+
+        self._runner.measure(
+            "order_board_first_paint", size,
+            lambda: boards[-1]._reconcile_order_list(OrderDelta(added = active_orders)), setup = new_board
+        )
+
+        board: SOrders = boards[-1]
+        new_order: dict[int, dict] = {size + 1 : active_orders[1]}
+
+        self._runner.measure(
+            "order_board_new_order", size,
+            lambda: board._reconcile_order_list(OrderDelta(added = new_order)),
+            setup = lambda: board._reconcile_order_list(OrderDelta(removed = list(new_order)))
+        )
+
+        def toggle_paged() -> None:
+            board._toggle_paged(None)
+            board._toggle_paged(None)
+
+        self._runner.measure("order_board_toggle_paged", size, toggle_paged, operations = 2)
+
+
+    def orders(self, size: int, catalog_size: int = 200, sends: int = 100) -> None:
+        """
+        Mide el envío de comandas y la lectura de órdenes sobre un historial de órdenes
+
+        Parámetros:
+            - :param:`size` (int): Número de órdenes del historial.
+            - :param:`catalog_size` (int): Número de productos del catálogo.
+            - :param:`sends` (int): Comandas enviadas en cada repetición del envío.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        backend: DBBackend = self._backend_factory(size)
+        db_connection: DBConnection = DBConnection(backend)
+        products: list[Product] = self._generator.products(catalog_size)
+
+        self._generator.fill_orders(db_connection, products, size)
+
+        # Comandas nuevas, sin submission_id para que cada repetición las inserte
+        new_orders: list[dict[str]] = [
+            {key : value for key, value in order.items() if key != "submission_id"}
+            for order in self._generator.orders(products, sends)
+        ]
+
+        def send_all() -> None:
+            for order in new_orders:
+                db_connection.send_order_to_db(order)
+
+        def close_sent() -> None:
+            # Las comandas enviadas se cierran para no cambiar el número de órdenes activas
+            with db_connection.transaction() as cursor:
+                cursor.execute("UPDATE orders SET active = 0 WHERE submission_id IS NULL")
+
+        self._runner.measure("send_order_to_db", size, send_all, setup = close_sent, operations = sends)
+
+        # Las mismas comandas descontando existencias de todos sus productos
+        db_connection.set_stock({int(product.id) : 10 ** 9 for product in products})
+        self._runner.measure("send_order_to_db_stock", size, send_all, setup = close_sent, operations = sends)
+        close_sent()
+
+        # Disponibilidad para un canal de entrega: el catálogo completo, sin cambios y con los
+        # productos de la última comanda
+        version: int = db_connection.get_availability_changes()["version"]
+        self._runner.measure("availability_changes_full", size, db_connection.get_availability_changes)
+        self._runner.measure("availability_changes_idle", size, lambda: db_connection.get_availability_changes(version))
+        self._runner.measure("availability_changes_delta", size, lambda: db_connection.get_availability_changes(version - 1))
+
+        with db_connection.transaction() as cursor:
+            cursor.execute("UPDATE products SET stock = NULL")
+
+        self._runner.measure("get_orders", size, db_connection.get_orders)
+        # Órdenes de un día del historial, abiertas y cerradas
+        self._runner.measure(
+            "get_orders_day", size,
+            lambda: db_connection.get_orders(active_only = False, since = Date(2024, 6, 1), until = Date(2024, 6, 1))
+        )
+
+        # La primera consulta de cambios de una pantalla nueva lee todas las órdenes activas
+        readers: list[DBConnection] = []
+
+        def new_reader() -> None:
+            readers.append(DBConnection(backend, pool_size = 1))
+
+        self._runner.measure("get_order_changes_first", size, lambda: readers[-1].get_order_changes(), setup = new_reader)
+        self._runner.measure("get_order_changes_idle", size, db_connection.get_order_changes)
+
+        # Corte de caja de un día del historial, sus ventas se sumaron al guardar las órdenes
+        self._runner.measure("sales_summary", size, lambda: db_connection.get_sales_summary(Date(2024, 6, 1)))
+
+        def reset_rollups() -> None:
+            # Como la primera vez después de crear la tabla de resúmenes
+            with db_connection.transaction() as cursor:
+                cursor.execute("DELETE FROM sales_rollups")
+                cursor.execute("UPDATE orders SET rolled_up = 0")
+
+        self._runner.measure("sales_rollup_backfill", size, db_connection.refresh_sales_rollups, setup = reset_rollups)
+
+        for reader in readers:
+            reader.close()
+        db_connection.close()
@@ -0,0 +1,488 @@
+
+import os
+import sys
+import argparse
+import threading
+from time import perf_counter, sleep
+
+from other.product import Product
+from other.order_delta import OrderDelta
+from other.db_backend import DBBackend
+from other.db_connection import DBConnection
+from other.out_of_stock_error import OutOfStockError
+from other.availability_feed import AvailabilityFeed
+from benchmarks.run import backend_factory
+from benchmarks.mock_channel import MockChannel
+from benchmarks.data_generator import DataGenerator
+
+
+# Empleados de prueba: (nombre, activo)
+EMPLOYEES: list[tuple[str, int]] = [(f"Empleado {index}", int(index % 4 != 0)) for index in range(1, 11)]
+
+# Existencias iniciales de los productos que las llevan (uno de cada diez), alcanzan para
+# una parte de las comandas y el resto debe rechazarse sin vender de más
+STOCK: int = 60
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Lee los argumentos de la línea de comandos
+
+    Parámetros:
+        - No recibe parámetros.
+
+    Regresa:
+        - :return:`arguments` (argparse.Namespace): Argumentos leídos
+    """
+
+    parser = argparse.ArgumentParser(
+        description = "Prueba de estrés de DBConnection: envíos y lecturas concurrentes desde varios hilos."
+    )
+    parser.add_argument("--writers", type = int, default = 8, help = "Hilos que envían comandas.")
+    parser.add_argument("--readers", type = int, default = 8, help = "Hilos que leen órdenes y empleados.")
+    parser.add_argument("--orders", type = int, default = 2000, help = "Comandas enviadas entre todos los hilos.")
+    parser.add_argument("--pool-size", type = int, default = 5, help = "Conexiones del pool compartido.")
+    parser.add_argument("--seed", type = int, default = 42, help = "Semilla de los datos generados.")
+    parser.add_argument("--backend", choices = ["sqlite", "mysql"], default = "sqlite", help = "Motor de la base de datos.")
+    parser.add_argument("--mysql", nargs = 4, metavar = ("HOST", "USER", "PASSWORD", "DATABASE"),
+                        help = "Base de datos MySQL exclusiva para las pruebas, sus órdenes se borran.")
+    parser.add_argument("--workdir", default = os.path.join("benchmarks", "data"), help = "Carpeta de la base de datos SQLite.")
+
+    return parser.parse_args()
+
+
+class StressTest:
+    """
+    Envía comandas desde varios hilos mientras otros hilos leen órdenes, empleados y cambios
+    con el mismo objeto de la clase :class:`DBConnection`, y verifica los resultados.
+
+    Cada hilo escritor reenvía algunas de sus comandas para comprobar que no se duplican.
+    Cada hilo lector compara lo que lee con las comandas ya confirmadas por los escritores.
+    Uno de cada diez productos lleva existencias limitadas: las comandas que no alcanzan se
+    rechazan y al final lo vendido debe coincidir exactamente con lo descontado. Un canal de
+    entrega simulado consulta el canal de disponibilidad durante la prueba y al final debe
+    conocer las mismas existencias que la base de datos.
+    """
+
+    def __init__(self, backend: DBBackend, products: list[Product], orders: list[dict[str]],
+                 writers: int, readers: int, pool_size: int) -> None:
+        """
+        Construye la prueba.
+
+        Parámetros:
+            - :param:`backend` (DBBackend): Motor de la base de datos, vacío.
+            - :param:`products` (list[Product]): Productos del catálogo.
+            - :param:`orders` (list[dict[str]]): Comandas a enviar, con ``submission_id`` único.
+            - :param:`writers` (int): Hilos que envían comandas.
+            - :param:`readers` (int): Hilos que leen.
+            - :param:`pool_size` (int): Conexiones del pool compartido.
+        """
+
+        self._backend: DBBackend = backend
+        self._db_connection: DBConnection = DBConnection(backend, pool_size = pool_size)
+        self._products: dict[int, str] = {int(product.id) : product.name for product in products}
+        self._orders: list[dict[str]] = orders
+        self._writers: int = writers
+        self._readers: int = readers
+        # Comandas confirmadas por ID de la orden
+        self._sent: dict[int, dict[str]] = {}
+        # Comandas rechazadas por falta de existencias
+        self._rejected: list[dict[str]] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._writing: threading.Event = threading.Event()
+        # Canal de disponibilidad y canal de entrega que lo consulta
+        self._feed: AvailabilityFeed = AvailabilityFeed(self._db_connection)
+        self.channel: MockChannel | None = None
+        self.errors: list[str] = []
+        self.reads: int = 0
+
+
+    @property
+    def rejected(self) -> int:
+        """
+        Número de comandas rechazadas por falta de existencias
+        """
+
+        return len(self._rejected)
+
+
+    def _fail(self, message: str) -> None:
+        """
+        Registra una verificación fallida
+
+        Parámetros:
+            - :param:`message` (str): Descripción del error.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            self.errors.append(message)
+
+
+    def _expected_items(self, order: dict[str]) -> dict[str, str]:
+        """
+        Productos y cantidades de una comanda con el formato que regresa la base de datos
+
+        Parámetros:
+            - :param:`order` (dict[str]): Comanda enviada.
+
+        Regresa:
+            - :return:`items` (dict[str, str]): Cantidad por nombre de producto
+        """
+
+        return {self._products[product_id] : str(quantity) for product_id, quantity, _ in order["items"]}
+
+
+    def _check_order(self, order_id: int, order: dict[str], source: str) -> None:
+        """
+        Compara una orden leída con la comanda enviada
+
+        Parámetros:
+            - :param:`order_id` (int): ID de la orden.
+            - :param:`order` (dict[str]): Orden leída de la base de datos.
+            - :param:`source` (str): Método que regresó la orden.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        sent: dict[str] = self._sent[order_id]
+
+        if order["customer_name"] != sent["customer_name"] or int(order["total"]) != sent["total"]:
+            self._fail(f"{source}: la orden {order_id} no coincide con la comanda enviada")
+        elif order["products_n_quantities"] != self._expected_items(sent):
+            self._fail(f"{source}: los productos de la orden {order_id} no coinciden")
+
+
+    def _setup(self) -> None:
+        """
+        Registra los empleados y los productos de la prueba
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._db_connection.transaction() as cursor:
+            cursor.execute("DELETE FROM employees")
+            cursor.executemany(self._backend.sql("INSERT INTO employees (name, active) VALUES (%s, %s)"), EMPLOYEES)
+
+        self._db_connection.sync_products([
+            Product(product_id, name, 0, 0, 0, "", "", "") for product_id, name in self._products.items()
+        ])
+        self._db_connection.set_stock({product_id : STOCK for product_id in self._stocked_products()})
+
+
+    def _stocked_products(self) -> list[int]:
+        """
+        Productos de la prueba que llevan existencias
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`product_ids` (list[int]): IDs de los productos
+        """
+
+        return [product_id for product_id in self._products if product_id % 10 == 0]
+
+
+    def _writer(self, orders: list[dict[str]]) -> None:
+        """
+        Envía sus comandas una por una y reenvía una de cada cinco
+
+        Parámetros:
+            - :param:`orders` (list[dict[str]]): Comandas del hilo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for index, order in enumerate(orders):
+            try:
+                order_id: int | None = self._db_connection.send_order_to_db(order)
+            except OutOfStockError:
+                with self._lock:
+                    self._rejected.append(order)
+                continue
+
+            if order_id is None:
+                self._fail(f"send_order_to_db: la comanda {order['submission_id']} se omitió en su primer envío")
+                continue
+
+            with self._lock:
+                if order_id in self._sent:
+                    self._fail(f"send_order_to_db: el ID {order_id} se entregó dos veces")
+                self._sent[order_id] = order
+
+            # Un reenvío no debe crear otra orden
+            if index % 5 == 0 and self._db_connection.send_order_to_db(order) is not None:
+                self._fail(f"send_order_to_db: el reenvío de {order['submission_id']} creó otra orden")
+
+
+    def _reader(self) -> None:
+        """
+        Lee empleados, órdenes y contadores mientras haya escritores activos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        expected_employees: list[str] = [name for name, active in EMPLOYEES if active]
+        last_count: int = 0
+        reads: int = 0
+
+        while self._writing.is_set():
+            employees: list[str] = self._db_connection.get_employees()
+            if employees != expected_employees:
+                self._fail(f"get_employees: se esperaban {len(expected_employees)} empleados, se leyeron {len(employees)}")
+            # La lista regresada es nueva en cada llamada
+            employees.append("Intruso")
+
+            # Las comandas confirmadas antes de la lectura deben aparecer completas
+            with self._lock:
+                confirmed: list[int] = list(self._sent)
+            orders: dict[int, dict] = self._db_connection.get_orders()
+            for order_id in confirmed:
+                if order_id not in orders:
+                    self._fail(f"get_orders: falta la orden confirmada {order_id}")
+                else:
+                    self._check_order(order_id, orders[order_id], "get_orders")
+
+            # Las órdenes activas solo pueden aumentar, la prueba no cierra órdenes
+            count: int = sum(self._db_connection.get_active_order_counts().values())
+            if count < last_count:
+                self._fail(f"get_active_order_counts: el total bajó de {last_count} a {count}")
+            last_count = count
+
+            reads += 1
+
+        with self._lock:
+            self.reads += reads
+
+
+    def _changes_reader(self, received: dict[int, dict]) -> None:
+        """
+        Consulta los cambios de las órdenes mientras haya escritores activos
+
+        Parámetros:
+            - :param:`received` (dict[int, dict]): Órdenes recibidas por ID, se llena en esta función.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        while self._writing.is_set():
+            self._apply_changes(self._db_connection.get_order_changes(), received)
+
+
+    def _channel_reader(self) -> None:
+        """
+        Consulta el canal de disponibilidad como lo haría un canal de entrega mientras haya escritores activos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        while self._writing.is_set():
+            self.channel.poll()
+            sleep(0.01)
+
+
+    def _apply_changes(self, delta: OrderDelta, received: dict[int, dict]) -> None:
+        """
+        Aplica unos cambios a las órdenes recibidas verificando que ninguna llegue dos veces
+
+        Parámetros:
+            - :param:`delta` (OrderDelta): Cambios de las órdenes.
+            - :param:`received` (dict[int, dict]): Órdenes recibidas por ID.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for order_id, order in delta.added.items():
+            if order_id in received:
+                self._fail(f"get_order_changes: la orden {order_id} llegó dos veces como nueva")
+            received[order_id] = order
+            # Alterar la orden recibida no debe cambiar lo que se compara en la siguiente consulta
+            order["products_n_quantities"]["Intruso"] = "1"
+        for order_id, order in delta.updated.items():
+            received[order_id] = order
+
+
+    def run(self) -> float:
+        """
+        Corre la prueba y hace las verificaciones finales
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`seconds` (float): Duración de los envíos y lecturas concurrentes
+        """
+
+        self._setup()
+        self._feed.serve(port = 0)
+        self.channel = MockChannel(f"http://127.0.0.1:{self._feed.port}/availability")
+
+        received: dict[int, dict] = {}
+        writers: list[threading.Thread] = [
+            threading.Thread(target = self._guarded, args = (self._writer, self._orders[index::self._writers]))
+            for index in range(self._writers)
+        ]
+        readers: list[threading.Thread] = [
+            threading.Thread(target = self._guarded, args = (self._reader,)) for _ in range(self._readers)
+        ]
+        readers.append(threading.Thread(target = self._guarded, args = (self._changes_reader, received)))
+        readers.append(threading.Thread(target = self._guarded, args = (self._channel_reader,)))
+
+        self._writing.set()
+        start: float = perf_counter()
+
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+
+        self._writing.clear()
+        for thread in readers:
+            thread.join()
+
+        seconds: float = perf_counter() - start
+
+        # Una última consulta de cambios entrega las órdenes que faltaban
+        self._apply_changes(self._db_connection.get_order_changes(), received)
+        self.channel.poll()
+        self._verify(received)
+        self._feed.stop()
+        self._db_connection.close()
+
+        return seconds
+
+
+    def _guarded(self, target, *args) -> None:
+        """
+        Corre la función de un hilo y registra sus excepciones como errores
+
+        Parámetros:
+            - :param:`target` (Callable): Función del hilo.
+            - :param:`args` (tuple): Argumentos de la función.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        try:
+            target(*args)
+        except Exception as error:
+            self._fail(f"{target.__name__}: {error!r}")
+            # Se detienen los lectores para no esperar a un escritor que ya terminó
+            if target == self._writer:
+                self._writing.clear()
+
+
+    def _verify(self, received: dict[int, dict]) -> None:
+        """
+        Verifica el estado final de la base de datos contra las comandas enviadas
+
+        Parámetros:
+            - :param:`received` (dict[int, dict]): Órdenes recibidas con la consulta de cambios.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        expected: int = len(self._orders) - len(self._rejected)
+
+        if len(self._sent) != expected:
+            self._fail(f"Se confirmaron {len(self._sent)} de {expected} comandas")
+
+        with self._db_connection.transaction() as cursor:
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT submission_id) FROM orders")
+            orders, submissions = cursor.fetchone()
+            cursor.execute("SELECT COUNT(*) FROM order_items")
+            items: int = cursor.fetchone()[0]
+
+        if orders != expected or submissions != expected:
+            self._fail(f"La tabla orders tiene {orders} filas y {submissions} envíos, se esperaban {expected}")
+        if items != sum(len(order["items"]) for order in self._sent.values()):
+            self._fail(f"La tabla order_items tiene {items} filas")
+
+        # Lo vendido de cada producto con existencias debe ser exactamente lo descontado
+        sold: dict[int, int] = {}
+        for order in self._sent.values():
+            for product_id, quantity, _ in order["items"]:
+                sold[product_id] = sold.get(product_id, 0) + quantity
+
+        stock: dict[int, int] = self._db_connection.get_stock()
+        for product_id in self._stocked_products():
+            if stock.get(product_id, -1) < 0:
+                self._fail(f"El producto {product_id} quedó con existencias negativas: {stock.get(product_id)}")
+            elif stock[product_id] != STOCK - sold.get(product_id, 0):
+                self._fail(f"El producto {product_id} tiene {stock[product_id]} existencias, "
+                           f"se esperaban {STOCK - sold.get(product_id, 0)}")
+        if set(stock) != set(self._stocked_products()):
+            self._fail("Productos sin existencias aparecen con existencias")
+
+        # El canal de entrega debe conocer exactamente las existencias de la base de datos
+        for error in self.channel.errors:
+            self._fail(f"Canal de disponibilidad: {error}")
+        if set(self.channel.products) != set(self._products):
+            self._fail(f"El canal de entrega conoce {len(self.channel.products)} de {len(self._products)} productos")
+        for product_id, product in self.channel.products.items():
+            if product["stock"] != stock.get(product_id):
+                self._fail(f"El canal de entrega tiene {product['stock']} existencias del producto {product_id}, "
+                           f"la base de datos {stock.get(product_id)}")
+
+        for order_id, order in self._db_connection.get_orders().items():
+            self._check_order(order_id, order, "get_orders")
+
+        if set(received) != set(self._sent):
+            self._fail(f"get_order_changes entregó {len(received)} de {len(self._sent)} órdenes")
+
+
+def main() -> None:
+    arguments: argparse.Namespace = parse_arguments()
+
+    generator: DataGenerator = DataGenerator(arguments.seed)
+    products: list[Product] = generator.products(200)
+    orders: list[dict[str]] = list(generator.orders(products, arguments.orders))
+
+    os.makedirs(arguments.workdir, exist_ok = True)
+    backend: DBBackend = backend_factory(arguments)(f"stress_{arguments.orders}")
+    test: StressTest = StressTest(backend, products, orders, arguments.writers, arguments.readers, arguments.pool_size)
+    seconds: float = test.run()
+
+    print(f"{arguments.orders} comandas desde {arguments.writers} hilos y {test.reads} lecturas desde "
+          f"{arguments.readers} hilos en {seconds:.2f} s ({arguments.orders / seconds:.0f} comandas/s), "
+          f"{test.rejected} rechazadas por falta de existencias")
+
+    channel: MockChannel = test.channel
+    deltas: int = channel.polls - channel.not_modified - 1
+    print(f"Canal de disponibilidad: {channel.polls} consultas, {channel.not_modified} sin cambios (304), "
+          f"{channel.received_products / max(1, deltas):.1f} productos y "
+          f"{(channel.received_bytes - channel.full_bytes) / max(1, deltas):.0f} bytes por cambio "
+          f"(catálogo completo: {channel.full_bytes} bytes)")
+
+    for error in test.errors[:20]:
+        print(f"ERROR {error}")
+
+    if test.errors:
+        sys.exit(f"{len(test.errors)} verificaciones fallidas")
+
+    print("Todas las verificaciones pasaron")
+
+
+if __name__ == "__main__":
+    main()
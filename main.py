@@ -1,10 +1,24 @@
 
+import os
+import logging
+from time import perf_counter
+
 import flet as ft
 
 from views.router import Router
+from other.services import services
+from other.instrumentation import instrumentation
+
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 def main(page: ft.Page) -> None:
+    start: float = perf_counter()
+
+    # Inicia en segundo plano la conexión con la base de datos y la carga de datos
+    services.start()
+
     # Propiedades de la página
     page.title = "eTrigali"
     page.bgcolor = "#1F2129"
@@ -27,6 +41,24 @@ def main(page: ft.Page) -> None:
     # Se accede a la pagina de inicio
     page.go('/orders')
 
+    # Tiempo hasta el primer cuadro de la sesión
+    services.timings["first_frame"] = perf_counter() - start
+    logger.info("first_frame: %.3f s", services.timings["first_frame"])
+
 
 if __name__ == "__main__":
+    logging.basicConfig(level = logging.INFO)
+
+    # Mediciones de los manejadores y de la base de datos, siempre activas; se exponen
+    # en un puerto local o en un archivo si se indican en las variables de entorno
+    instrumentation.count_updates()
+    if os.environ.get("ETRIGALI_METRICS_PORT"):
+        instrumentation.serve(int(os.environ["ETRIGALI_METRICS_PORT"]))
+    if os.environ.get("ETRIGALI_METRICS_FILE"):
+        instrumentation.start_dump(os.environ["ETRIGALI_METRICS_FILE"], float(os.environ.get("ETRIGALI_METRICS_INTERVAL", 15)))
+
+    # Canal de disponibilidad para los canales de entrega, si se indica su puerto
+    if os.environ.get("ETRIGALI_AVAILABILITY_PORT"):
+        services.availability_feed().serve(int(os.environ["ETRIGALI_AVAILABILITY_PORT"]))
+
     ft.app(target = main, view = ft.AppView.WEB_BROWSER, assets_dir = "assets")
@@ -0,0 +1,165 @@
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import SplitResult, parse_qs, urlsplit
+
+from other.db_connection import DBConnection
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class AvailabilityFeed:
+    """
+    Canal de disponibilidad de productos para los canales de entrega externos, como Rappi.
+
+    Cada producto lleva una versión de existencias que cambia con cada venta, resurtido o
+    registro del catálogo. Quien consulta envía la última versión que conoce y recibe solo
+    los productos que cambiaron después, así el costo de cada consulta depende del número de
+    cambios y no del tamaño del catálogo.
+
+    :method:`serve` expone el canal en ``http://host:port/availability``. La versión viaja como
+    ``ETag``: el adaptador del canal la reenvía en ``If-None-Match`` (o como ``?since=``) y
+    recibe ``304`` si nada cambió. Cada respuesta ``200`` es un objeto JSON compacto:
+
+        ``{"version": 42, "full": false, "products": [{"id": 7, "name": "...", "stock": 3, "available": true, "version": 42}]}``
+
+    Con ``full`` verdadero la respuesta trae el catálogo completo y reemplaza lo conocido.
+    """
+
+    def __init__(self, db_connection: DBConnection) -> None:
+        """
+        Construye el canal sin iniciar el servidor.
+
+        Parámetros:
+            - :param:`db_connection` (DBConnection): Conexión con la base de datos.
+        """
+
+        self._db_connection: DBConnection = db_connection
+        self._server: ThreadingHTTPServer | None = None
+
+
+    def changes(self, since: int = 0) -> dict[str]:
+        """
+        Disponibilidad de los productos que cambiaron después de una versión
+
+        Parámetros:
+            - :param:`since` (int): Última versión conocida, cero para recibir el catálogo completo.
+
+        Regresa:
+            - :return:`changes` (dict[str]): ``{version, full, products}``, ver :method:`DBConnection.get_availability_changes`
+        """
+
+        return self._db_connection.get_availability_changes(since)
+
+
+    @staticmethod
+    def etag(version: int) -> str:
+        """
+        Encabezado ``ETag`` de una versión
+
+        Parámetros:
+            - :param:`version` (int): Versión de existencias.
+
+        Regresa:
+            - :return:`etag` (str): Versión entre comillas
+        """
+
+        return f'"{version}"'
+
+
+    @staticmethod
+    def parse_cursor(query: str, if_none_match: str | None) -> int:
+        """
+        Lee la versión conocida por quien consulta, de ``?since=`` o del encabezado ``If-None-Match``
+
+        Parámetros:
+            - :param:`query` (str): Cadena de consulta de la dirección.
+            - :param:`if_none_match` (str | None): Encabezado ``If-None-Match`` de la petición.
+
+        Regresa:
+            - :return:`since` (int): Versión conocida, cero si no se indica o no es válida
+        """
+
+        value: str = parse_qs(query).get("since", [""])[0] or (if_none_match or "")
+        value = value.strip().removeprefix("W/").strip('"')
+
+        return int(value) if value.isdigit() else 0
+
+
+    @property
+    def port(self) -> int | None:
+        """
+        Puerto del servidor, nulo si no se ha iniciado
+        """
+
+        return self._server.server_address[1] if self._server is not None else None
+
+
+    def serve(self, port: int = 8552, host: str = "127.0.0.1") -> None:
+        """
+        Expone el canal en ``http://host:port/availability`` desde un hilo en segundo plano
+
+        Parámetros:
+            - :param:`port` (int): Puerto del servidor, cero para elegir uno libre.
+            - :param:`host` (str): Dirección del servidor, por defecto solo la máquina local.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        feed: AvailabilityFeed = self
+
+        class AvailabilityHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                url: SplitResult = urlsplit(self.path)
+                if url.path != "/availability":
+                    self.send_error(404)
+                    return
+
+                try:
+                    changes: dict[str] = feed.changes(feed.parse_cursor(url.query, self.headers.get("If-None-Match")))
+                except Exception as error:
+                    logger.warning("La consulta de disponibilidad falló: %r", error)
+                    self.send_error(503)
+                    return
+
+                self.send_response(200 if changes["full"] or changes["products"] else 304)
+                self.send_header("ETag", feed.etag(changes["version"]))
+                self.send_header("Cache-Control", "no-cache")
+
+                if not (changes["full"] or changes["products"]):
+                    self.end_headers()
+                    return
+
+                body: bytes = json.dumps(changes, ensure_ascii = False, separators = (",", ":")).encode("utf-8")
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), AvailabilityHandler)
+        threading.Thread(target = self._server.serve_forever, name = "availability-feed", daemon = True).start()
+        logger.info("Disponibilidad en http://%s:%d/availability", host, self.port)
+
+
+    def stop(self) -> None:
+        """
+        Detiene el servidor si está iniciado
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,59 @@
+
+import flet as ft
+
+
+class CartLine:
+    """
+    Renglón del carrito: un producto, su precio unitario y la cantidad agregada.
+
+    Es el estado del renglón; la tarjeta del resumen de la comanda solo lo muestra y se
+    actualiza con :method:`render` cada vez que cambia la cantidad o el precio.
+    """
+
+    def __init__(self, product_id: int, name: str, unit_price: int, card: ft.Card, prices: tuple[int, ...] = ()) -> None:
+        """
+        Construye un renglón del carrito con cantidad cero.
+
+        Parámetros:
+            - :param:`product_id` (int): ID del producto.
+            - :param:`name` (str): Nombre del producto.
+            - :param:`unit_price` (int): Precio unitario del producto.
+            - :param:`card` (ft.Card): Tarjeta del producto en el resumen de la comanda.
+            - :param:`prices` (tuple[int, ...]): Precios del producto por tipo de cliente, vacío si no se conocen.
+        """
+
+        self.product_id: int = product_id
+        self.name: str = name
+        self.unit_price: int = unit_price
+        self.quantity: int = 0
+        self.card: ft.Card = card
+        self.prices: tuple[int, ...] = prices
+
+
+    @property
+    def subtotal(self) -> int:
+        """
+        Precio unitario por la cantidad del producto
+        """
+
+        return self.unit_price * self.quantity
+
+
+    def render(self) -> None:
+        """
+        Escribe la cantidad y el subtotal del renglón en su tarjeta
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        row: list[ft.Control] = self.card.content.content.controls
+
+        # Contador de la tarjeta
+        row[2].content.controls[1].value = self.quantity
+        # Subtotal de la tarjeta, la llave guarda el precio unitario
+        row[3].content.value = f"${self.subtotal}"
+        row[3].content.key = str(self.unit_price)
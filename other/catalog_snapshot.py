@@ -0,0 +1,166 @@
+
+import os
+import marshal
+from hashlib import sha256
+
+
+class CatalogSnapshot:
+    """
+    Copia binaria y columnar del catálogo de productos de :file:`catalogo.xlsm`.
+
+    Leer el archivo de Excel requiere openpyxl y procesar XML en cada arranque. La
+    primera vez se compila el catálogo a un archivo :file:`catalogo.xlsm.snapshot` con
+    una columna por lista, que después se carga en milisegundos con :mod:`marshal`.
+
+    La copia guarda la fecha de modificación, el tamaño y el hash SHA-256 del archivo de
+    Excel. Si la fecha y el tamaño coinciden se utiliza sin más; si cambian se calcula el
+    hash y solo se vuelve a compilar cuando el contenido del archivo es distinto.
+    """
+
+    # Identificador y versión del formato del archivo
+    MAGIC: bytes = b"ETCS1\n"
+
+    def __init__(self, spreadsheet_file: str, snapshot_file: str | None = None) -> None:
+        """
+        Construye la copia binaria de un archivo de Excel.
+
+        Parámetros:
+            - :param:`spreadsheet_file` (str): Ruta del archivo de Excel con el catálogo.
+            - :param:`snapshot_file` (str | None): Ruta de la copia binaria, por defecto junto al archivo de Excel.
+        """
+
+        self._spreadsheet_file: str = spreadsheet_file
+        self._snapshot_file: str = snapshot_file or f"{spreadsheet_file}.snapshot"
+
+
+    def _hash(self) -> str:
+        """
+        Calcula el hash SHA-256 del archivo de Excel
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`digest` (str): Hash en hexadecimal
+        """
+
+        digest = sha256()
+
+        with open(self._spreadsheet_file, "rb") as file:
+            for block in iter(lambda: file.read(1 << 16), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+
+    def _read(self) -> dict | None:
+        """
+        Lee la copia binaria del disco
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`snapshot` (dict | None): Contenido de la copia, None si no existe o está dañada
+        """
+
+        try:
+            with open(self._snapshot_file, "rb") as file:
+                if file.read(len(self.MAGIC)) != self.MAGIC:
+                    return None
+                return marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+
+    def _write(self, snapshot: dict) -> None:
+        """
+        Escribe la copia binaria en el disco de forma atómica
+
+        Parámetros:
+            - :param:`snapshot` (dict): Contenido de la copia
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        temporary_file: str = f"{self._snapshot_file}.tmp"
+
+        try:
+            with open(temporary_file, "wb") as file:
+                file.write(self.MAGIC)
+                marshal.dump(snapshot, file)
+        # Si el catálogo contiene valores que marshal no admite, se trabaja sin copia
+        except ValueError:
+            os.remove(temporary_file)
+            return
+
+        os.replace(temporary_file, self._snapshot_file)
+
+
+    def compile(self) -> dict:
+        """
+        Lee el archivo de Excel y escribe una copia binaria nueva
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`snapshot` (dict): Contenido de la copia con las llaves ``mtime_ns``, ``size``,
+            ``sha256``, ``index_name``, ``index``, ``columns`` y ``data``
+        """
+
+        # Solo la compilación necesita pandas y openpyxl
+        import pandas as pd
+
+        stat: os.stat_result = os.stat(self._spreadsheet_file)
+
+        table: pd.DataFrame = pd.read_excel(self._spreadsheet_file)
+        table.set_index("ID", inplace = True)
+        # Previene que se muestren valores NaN en la tabla
+        table = table.fillna("")
+
+        snapshot: dict = {
+            "mtime_ns" : stat.st_mtime_ns,
+            "size" : stat.st_size,
+            "sha256" : self._hash(),
+            "index_name" : table.index.name,
+            "index" : table.index.tolist(),
+            "columns" : [str(column) for column in table.columns],
+            "data" : {str(column) : table[column].tolist() for column in table.columns},
+        }
+
+        self._write(snapshot)
+
+        return snapshot
+
+
+    def load(self) -> dict:
+        """
+        Regresa el catálogo desde la copia binaria, compilándola solo si el archivo de Excel cambió
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`snapshot` (dict): Contenido de la copia, ver :method:`compile`
+        """
+
+        snapshot: dict | None = self._read()
+
+        if snapshot is None:
+            return self.compile()
+
+        stat: os.stat_result = os.stat(self._spreadsheet_file)
+
+        # Mismo archivo según la fecha de modificación y el tamaño
+        if snapshot["mtime_ns"] == stat.st_mtime_ns and snapshot["size"] == stat.st_size:
+            return snapshot
+
+        # El archivo se tocó pero su contenido es el mismo, solo se actualiza la fecha
+        if snapshot["size"] == stat.st_size and snapshot["sha256"] == self._hash():
+            snapshot["mtime_ns"] = stat.st_mtime_ns
+            self._write(snapshot)
+            return snapshot
+
+        return self.compile()
@@ -0,0 +1,234 @@
+
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic
+from typing import Iterator
+
+from other.db_backend import DBBackend
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones con la base de datos.
+
+    Las conexiones se abren bajo demanda hasta llegar a :attr:`size` y se reutilizan
+    entre llamadas. Cada llamada toma una conexión, abre su propio cursor y la devuelve
+    al terminar, así varios hilos de Flet pueden consultar la base de datos al mismo
+    tiempo sin compartir un cursor.
+
+    Solo las conexiones que estuvieron libres más de :attr:`validate_after` segundos se
+    verifican con el motor antes de prestarse, así las llamadas seguidas no pagan un viaje
+    extra a la base de datos. Una conexión que falla por desconexión durante su uso se
+    descarta en lugar de regresar al pool, y su lugar despierta a quien espera una conexión
+    para que abra una nueva.
+    """
+
+    def __init__(self, backend: DBBackend, size: int = 5, timeout: float = 10.0, validate_after: float = 30.0) -> None:
+        """
+        Construye el pool de conexiones.
+
+        Parámetros:
+            - :param:`backend` (DBBackend): Motor con el que se abren las conexiones.
+            - :param:`size` (int): Número máximo de conexiones abiertas.
+            - :param:`timeout` (float): Segundos que se espera por una conexión libre.
+            - :param:`validate_after` (float): Segundos libre a partir de los cuales una conexión
+              se verifica antes de prestarse.
+        """
+
+        self._backend: DBBackend = backend
+        self._size: int = size
+        self._timeout: float = timeout
+        self._validate_after: float = validate_after
+        # Conexiones libres junto con el momento en que se devolvieron, la última devuelta al final
+        self._idle: list[tuple[object, float]] = []
+        self._opened: int = 0
+        # Avisa a quien espera cuando se devuelve una conexión o se libera un lugar
+        self._condition: Condition = Condition()
+
+
+    def _open(self) -> object:
+        """
+        Abre una conexión nueva en un lugar ya apartado del pool
+
+        Si la conexión no se puede abrir, el lugar se libera antes de propagar el error.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`connection` (object): Conexión abierta
+        """
+
+        try:
+            return self._backend.connect()
+        except Exception:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+
+
+    def _acquire(self) -> object:
+        """
+        Toma una conexión libre del pool o abre una nueva si aún hay espacio
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`connection` (object): Conexión lista para utilizarse
+        """
+
+        deadline: float = monotonic() + self._timeout
+
+        with self._condition:
+            while True:
+                # Se intenta reutilizar una conexión libre
+                if self._idle:
+                    connection, released_at = self._idle.pop()
+                    break
+
+                # Si no hay conexiones libres se abre una nueva mientras no se llegue al límite
+                if self._opened < self._size:
+                    self._opened += 1
+                    connection = None
+                    break
+
+                # Si se llegó al límite se espera a que se devuelva una conexión o se libere un lugar
+                remaining: float = deadline - monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No hay conexiones libres después de {self._timeout} segundos")
+                self._condition.wait(remaining)
+
+        if connection is None:
+            return self._open()
+
+        # Si la conexión pasó mucho tiempo libre y se cerró se reemplaza por una nueva en su lugar
+        if monotonic() - released_at > self._validate_after and not self._backend.is_alive(connection):
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return self._open()
+
+        return connection
+
+
+    def _release(self, connection: object) -> None:
+        """
+        Devuelve una conexión al pool
+
+        Parámetros:
+            - :param:`connection` (object): Conexión a devolver
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._condition:
+            self._idle.append((connection, monotonic()))
+            self._condition.notify()
+
+
+    def _discard(self, connection: object) -> None:
+        """
+        Cierra una conexión dañada y libera su lugar en el pool
+
+        Parámetros:
+            - :param:`connection` (object): Conexión a descartar
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+        with self._condition:
+            self._opened -= 1
+            self._condition.notify()
+
+
+    @contextmanager
+    def connection(self) -> Iterator[object]:
+        """
+        Presta una conexión durante un bloque ``with``
+
+        Si el bloque termina sin errores la conexión regresa al pool, si ocurre un error
+        se revierte la transacción en curso antes de devolverla. Si el error indica que la
+        conexión se perdió, se descarta para que la siguiente llamada abra una nueva.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`connection` (object): Conexión prestada
+        """
+
+        connection: object = self._acquire()
+
+        try:
+            yield connection
+        except Exception as error:
+            if self._backend.is_disconnect(error):
+                self._discard(connection)
+                raise
+
+            try:
+                connection.rollback()
+            except Exception:
+                # La conexión no se puede recuperar, se descarta
+                self._discard(connection)
+                raise
+            self._release(connection)
+            raise
+        else:
+            self._release(connection)
+
+
+    @contextmanager
+    def cursor(self, commit: bool = False) -> Iterator[object]:
+        """
+        Presta un cursor propio sobre una conexión del pool durante un bloque ``with``
+
+        Parámetros:
+            - :param:`commit` (bool): Confirma la transacción al terminar el bloque, si es
+              falso la transacción de solo lectura se revierte.
+
+        Regresa:
+            - :return:`cursor` (object): Cursor exclusivo de la llamada
+        """
+
+        with self.connection() as connection:
+            cursor: object = connection.cursor()
+            try:
+                yield cursor
+                # Se cierra la transacción para que la siguiente llamada no lea
+                # una instantánea vieja de la base de datos
+                if commit:
+                    connection.commit()
+                else:
+                    connection.rollback()
+            finally:
+                cursor.close()
+
+
+    def close(self) -> None:
+        """
+        Cierra todas las conexiones libres del pool
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._condition:
+            idle: list[tuple[object, float]] = self._idle
+            self._idle = []
+
+        for connection, _released_at in idle:
+            self._discard(connection)
@@ -0,0 +1,48 @@
+
+from enum import IntEnum
+
+
+class CustomerType(IntEnum):
+    """
+    Tipos de cliente de la caja.
+
+    El valor de cada tipo es su posición en el vector de precios :attr:`Product.prices`,
+    así el precio de un producto para un tipo de cliente es ``product.prices[customer_type]``.
+    """
+
+    CLIENTE = 0
+    EMPLEADO = 1
+    SOCIO = 2
+
+
+    @property
+    def label(self) -> str:
+        """
+        Texto del tipo de cliente en el selector de la caja
+        """
+
+        return _LABELS[self]
+
+
+    @classmethod
+    def from_label(cls, label: str) -> "CustomerType":
+        """
+        Regresa el tipo de cliente que corresponde al texto del selector de la caja
+
+        Parámetros:
+            - :param:`label` (str): Texto del selector, por ejemplo ``Socio - 30% descuento``.
+
+        Regresa:
+            - :return:`customer_type` (CustomerType): Tipo de cliente, ``CLIENTE`` si el texto no se reconoce
+        """
+
+        return _TYPES.get(label, cls.CLIENTE)
+
+
+# Textos de los tipos de cliente en el selector de la caja
+_LABELS: dict[CustomerType, str] = {
+    CustomerType.CLIENTE : "Cliente",
+    CustomerType.EMPLEADO : r"Empleado - 15% descuento",
+    CustomerType.SOCIO : r"Socio - 30% descuento",
+}
+_TYPES: dict[str, CustomerType] = {label : customer_type for customer_type, label in _LABELS.items()}
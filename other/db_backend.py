@@ -0,0 +1,424 @@
+
+import sqlite3
+
+
+class DBBackend:
+    """
+    Interfaz de los motores de base de datos utilizados por :class:`DBConnection`.
+
+    Cada motor sabe abrir conexiones nuevas, verificar que una conexión siga viva
+    y adaptar las sentencias SQL escritas con el marcador ``%s`` a su propio dialecto.
+    Las sentencias de la aplicación se escriben una sola vez con el estilo de MySQL.
+    """
+
+    # Nombre del motor, se utiliza para elegir sentencias específicas de cada dialecto
+    name: str = ""
+    # Marcador de parámetros del motor
+    placeholder: str = "%s"
+    # Cláusula que bloquea las filas leídas hasta terminar la transacción
+    for_update: str = ""
+
+
+    def connect(self) -> object:
+        """
+        Abre una conexión nueva con la base de datos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`connection` (object): Conexión DB-API 2.0 abierta
+        """
+
+        raise NotImplementedError
+
+
+    def is_alive(self, connection: object) -> bool:
+        """
+        Verifica que una conexión siga abierta antes de entregarla
+
+        Parámetros:
+            - :param:`connection` (object): Conexión a verificar
+
+        Regresa:
+            - :return:`alive` (bool): Verdadero si la conexión puede utilizarse
+        """
+
+        return True
+
+
+    def is_disconnect(self, error: Exception) -> bool:
+        """
+        Indica si un error significa que la conexión con la base de datos se perdió
+
+        Parámetros:
+            - :param:`error` (Exception): Error ocurrido durante el uso de una conexión
+
+        Regresa:
+            - :return:`disconnected` (bool): Verdadero si la conexión ya no puede utilizarse
+        """
+
+        return False
+
+
+    def is_transient(self, error: Exception) -> bool:
+        """
+        Indica si un error se puede reintentar más tarde con los mismos datos
+
+        Son transitorios los errores de conexión, de operación y de sistema, como una conexión
+        perdida, un tiempo de espera agotado o una base de datos ocupada. Los demás, como una
+        llave foránea rota o un dato inválido, se repetirían en cada reintento.
+
+        Parámetros:
+            - :param:`error` (Exception): Error ocurrido durante el uso de una conexión
+
+        Regresa:
+            - :return:`transient` (bool): Verdadero si el error se puede reintentar
+        """
+
+        return isinstance(error, OSError) or self.is_disconnect(error)
+
+
+    def sql(self, statement: str) -> str:
+        """
+        Adapta una sentencia escrita con el marcador ``%s`` al dialecto del motor
+
+        Parámetros:
+            - :param:`statement` (str): Sentencia SQL con marcadores ``%s``
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL con el marcador del motor
+        """
+
+        if self.placeholder == "%s":
+            return statement
+
+        return statement.replace("%s", self.placeholder)
+
+
+    def begin(self, cursor: object, write: bool) -> None:
+        """
+        Abre la transacción de una llamada de :class:`DBConnection`
+
+        Por defecto no hace nada: el conector abre la transacción con la primera sentencia.
+
+        Parámetros:
+            - :param:`cursor` (object): Cursor exclusivo de la llamada.
+            - :param:`write` (bool): Indica si la transacción va a escribir en la base de datos.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+
+    def upsert(self, table: str, columns: tuple[str], key: str) -> str:
+        """
+        Construye una sentencia que inserta una fila o actualiza la existente con la misma llave
+
+        Parámetros:
+            - :param:`table` (str): Nombre de la tabla.
+            - :param:`columns` (tuple[str]): Columnas a insertar, incluida la llave.
+            - :param:`key` (str): Columna de la llave primaria.
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL con el marcador del motor
+        """
+
+        raise NotImplementedError
+
+
+    def increment(self, table: str, keys: tuple[str], counters: tuple[str]) -> str:
+        """
+        Construye una sentencia que inserta una fila o suma sus contadores a la existente con la misma llave
+
+        Parámetros:
+            - :param:`table` (str): Nombre de la tabla.
+            - :param:`keys` (tuple[str]): Columnas de la llave primaria.
+            - :param:`counters` (tuple[str]): Columnas que se suman.
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL con el marcador del motor
+        """
+
+        raise NotImplementedError
+
+
+class MySQLBackend(DBBackend):
+    """
+    Motor MySQL, utilizado en producción con la base de datos en AWS.
+
+    Requiere una conexión a internet para poder conectarse con la base de datos.
+    """
+
+    name: str = "mysql"
+    placeholder: str = "%s"
+    for_update: str = " FOR UPDATE"
+
+    def __init__(self, host: str, password: str, user: str = "admin", database: str = "test_database",
+                 connection_timeout: int = 5) -> None:
+        # Atributos privados
+        self.__host: str = host
+        self.__password: str = password
+        self.__user: str = user
+        self.__database: str = database
+        # Segundos máximos para establecer la conexión, evita que una red lenta detenga la aplicación
+        self.__connection_timeout: int = connection_timeout
+
+
+    def connect(self) -> object:
+        """
+        Abre una conexión nueva con la base de datos MySQL
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`connection` (MySQLConnection): Conexión abierta
+        """
+
+        # Se importa aquí para que el motor SQLite no dependa del conector de MySQL
+        from mysql.connector import connect
+
+        return connect(
+            host = self.__host,
+            user = self.__user,
+            password = self.__password,
+            database = self.__database,
+            connection_timeout = self.__connection_timeout
+        )
+
+
+    def is_alive(self, connection: object) -> bool:
+        """
+        Verifica que la conexión con MySQL siga abierta
+
+        Parámetros:
+            - :param:`connection` (MySQLConnection): Conexión a verificar
+
+        Regresa:
+            - :return:`alive` (bool): Verdadero si la conexión puede utilizarse
+        """
+
+        return connection.is_connected()
+
+
+    def is_disconnect(self, error: Exception) -> bool:
+        """
+        Indica si un error de MySQL significa que la conexión se perdió
+
+        Parámetros:
+            - :param:`error` (Exception): Error ocurrido durante el uso de una conexión
+
+        Regresa:
+            - :return:`disconnected` (bool): Verdadero para errores de operación o de interfaz del conector
+        """
+
+        from mysql.connector.errors import InterfaceError, OperationalError
+
+        return isinstance(error, (InterfaceError, OperationalError))
+
+
+    def upsert(self, table: str, columns: tuple[str], key: str) -> str:
+        """
+        Construye una sentencia ``INSERT ... ON DUPLICATE KEY UPDATE``
+
+        Parámetros:
+            - :param:`table` (str): Nombre de la tabla.
+            - :param:`columns` (tuple[str]): Columnas a insertar, incluida la llave.
+            - :param:`key` (str): Columna de la llave primaria.
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL
+        """
+
+        values: str = ", ".join(["%s"] * len(columns))
+        updates: str = ", ".join(f"{column} = VALUES({column})" for column in columns if column != key)
+
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) ON DUPLICATE KEY UPDATE {updates}"
+
+
+    def increment(self, table: str, keys: tuple[str], counters: tuple[str]) -> str:
+        """
+        Construye una sentencia ``INSERT ... ON DUPLICATE KEY UPDATE`` que suma los contadores
+
+        Parámetros:
+            - :param:`table` (str): Nombre de la tabla.
+            - :param:`keys` (tuple[str]): Columnas de la llave primaria.
+            - :param:`counters` (tuple[str]): Columnas que se suman.
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL
+        """
+
+        columns: tuple[str] = (*keys, *counters)
+        values: str = ", ".join(["%s"] * len(columns))
+        updates: str = ", ".join(f"{counter} = {counter} + VALUES({counter})" for counter in counters)
+
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) ON DUPLICATE KEY UPDATE {updates}"
+
+
+class SQLiteBackend(DBBackend):
+    """
+    Motor SQLite, sustituto local de la base de datos en AWS.
+
+    Permite hacer pruebas de carga y mediciones sin conexión a internet. Acepta una
+    ruta de archivo o una URI ``file:`` (por ejemplo ``file:etrigali?mode=memory&cache=shared``
+    para una base en memoria compartida entre las conexiones del pool).
+    """
+
+    name: str = "sqlite"
+    placeholder: str = "?"
+
+    # Esquema mínimo equivalente al de la base de datos en AWS
+    SCHEMA: tuple[str] = (
+        """
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            products_n_quantities TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            employee TEXT NOT NULL,
+            origin TEXT NOT NULL DEFAULT 'Local',
+            active INTEGER NOT NULL DEFAULT 1,
+            date TEXT NOT NULL,
+            hour TEXT NOT NULL
+        )
+        """,
+    )
+
+    def __init__(self, path: str = "etrigali.db") -> None:
+        self._path: str = path
+        # Mantiene viva una base en memoria mientras exista el motor
+        self._keep_alive: sqlite3.Connection | None = None
+
+        if "mode=memory" in path:
+            self._keep_alive = self.connect()
+
+        self.create_schema()
+
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Abre una conexión nueva con la base de datos SQLite
+
+        La conexión puede pasar de un hilo a otro, el pool garantiza que solo un hilo
+        la utilice a la vez.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`connection` (sqlite3.Connection): Conexión abierta
+        """
+
+        return sqlite3.connect(
+            self._path,
+            timeout = 30,
+            check_same_thread = False,
+            uri = self._path.startswith("file:")
+        )
+
+
+    def is_transient(self, error: Exception) -> bool:
+        """
+        Indica si un error de SQLite se puede reintentar, ver :method:`DBBackend.is_transient`
+
+        Parámetros:
+            - :param:`error` (Exception): Error ocurrido durante el uso de una conexión
+
+        Regresa:
+            - :return:`transient` (bool): Verdadero para errores de operación, como una base de datos bloqueada
+        """
+
+        return isinstance(error, (OSError, sqlite3.OperationalError))
+
+
+    def begin(self, cursor: sqlite3.Cursor, write: bool) -> None:
+        """
+        Abre la transacción de una llamada de forma explícita
+
+        El módulo sqlite3 solo abre transacciones antes de las escrituras, así que cada
+        lectura vería una instantánea distinta. Las transacciones de escritura toman el
+        candado de escritura desde el inicio, de lo contrario una transacción que primero
+        lee y luego escribe falla con ``database is locked`` si otra ya está escribiendo,
+        sin esperar el tiempo de :method:`connect`.
+
+        Parámetros:
+            - :param:`cursor` (sqlite3.Cursor): Cursor exclusivo de la llamada.
+            - :param:`write` (bool): Indica si la transacción va a escribir en la base de datos.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        cursor.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+
+
+    def upsert(self, table: str, columns: tuple[str], key: str) -> str:
+        """
+        Construye una sentencia ``INSERT ... ON CONFLICT DO UPDATE``
+
+        Parámetros:
+            - :param:`table` (str): Nombre de la tabla.
+            - :param:`columns` (tuple[str]): Columnas a insertar, incluida la llave.
+            - :param:`key` (str): Columna de la llave primaria.
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL
+        """
+
+        values: str = ", ".join(["?"] * len(columns))
+        updates: str = ", ".join(f"{column} = excluded.{column}" for column in columns if column != key)
+
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) ON CONFLICT({key}) DO UPDATE SET {updates}"
+
+
+    def increment(self, table: str, keys: tuple[str], counters: tuple[str]) -> str:
+        """
+        Construye una sentencia ``INSERT ... ON CONFLICT DO UPDATE`` que suma los contadores
+
+        Parámetros:
+            - :param:`table` (str): Nombre de la tabla.
+            - :param:`keys` (tuple[str]): Columnas de la llave primaria.
+            - :param:`counters` (tuple[str]): Columnas que se suman.
+
+        Regresa:
+            - :return:`statement` (str): Sentencia SQL
+        """
+
+        columns: tuple[str] = (*keys, *counters)
+        values: str = ", ".join(["?"] * len(columns))
+        updates: str = ", ".join(f"{counter} = {counter} + excluded.{counter}" for counter in counters)
+
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) "
+            f"ON CONFLICT({', '.join(keys)}) DO UPDATE SET {updates}"
+        )
+
+
+    def create_schema(self) -> None:
+        """
+        Crea las tablas de la aplicación si no existen
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        connection: sqlite3.Connection = self.connect()
+
+        try:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+        finally:
+            connection.close()
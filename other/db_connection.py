@@ -1,31 +1,64 @@
 
-from mysql.connector import MySQLConnection, connect
-from mysql.connector.cursor import MySQLCursor
-from time import strftime
+from contextlib import contextmanager
+from threading import Lock
+from datetime import date as Date, datetime, timedelta
+from typing import ContextManager, Iterator
+
+from other.product import Product
+from other.db_backend import DBBackend, MySQLBackend
+from other.order_delta import OrderDelta
+from other.out_of_stock_error import OutOfStockError
+from other.sales_rollup import SalesRollup
+from other.db_migrations import apply_migrations, legacy_created_at
+from other.connection_pool import ConnectionPool
+from other.instrumentation import instrumentation
 
 
 class DBConnection:
     """
     Contiene los métodos para la conexión con la base de datos
 
-    Requiere una conexión a internet para poder conectarse con la base de
-    datos en AWS.
+    Por defecto se conecta con la base de datos MySQL en AWS, lo que requiere una
+    conexión a internet. Puede recibir cualquier otro motor de la clase :class:`DBBackend`,
+    como :class:`SQLiteBackend` para pruebas de carga sin conexión.
+
+    Cada método toma una conexión del pool, abre su propio cursor dentro de su propia
+    transacción y regresa objetos nuevos en cada llamada, por lo que un mismo objeto
+    puede atender a varias cajas al mismo tiempo.
     """
 
-    def __init__(self) -> None:
-        # Host y contraseña de la base de datos
-        self.__host, self.__password = self._get_db_info()
-        # Atributos privados
-        self.__database: MySQLConnection = connect(
-            host = self.__host,
-            user = "admin",
-            password = self.__password,
-            database = "test_database"
-        )
+    # Columnas de la tabla de órdenes utilizadas por la aplicación
+    ORDER_COLUMNS: str = "id, customer_name, total, origin, created_at"
+    # Margen con el que :method:`get_order_changes` vuelve a leer cambios ya vistos, cubre las
+    # transacciones que marcaron ``updated_at`` antes que otra pero se confirmaron después
+    CHANGES_LAG: timedelta = timedelta(seconds = 10)
+
+    def __init__(self, backend: DBBackend | None = None, pool_size: int = 5) -> None:
+        """
+        Construye la conexión con la base de datos.
+
+        Parámetros:
+            - :param:`backend` (DBBackend | None): Motor de base de datos, si no se indica se
+              utiliza MySQL con la información de :file:`other/db_info.txt`.
+            - :param:`pool_size` (int): Número máximo de conexiones abiertas al mismo tiempo.
+        """
+
+        if backend is None:
+            # Host y contraseña de la base de datos
+            host, password = self._get_db_info()
+            backend = MySQLBackend(host, password)
+
         # Atributos protegidos
-        self._cursor: MySQLCursor = self.__database.cursor()
-        self._employees: list[str] = []
-        self._order_to_send: list = []
+        self._backend: DBBackend = backend
+        self._pool: ConnectionPool = ConnectionPool(backend, pool_size)
+        self._migrated: bool = False
+        self._migration_lock: Lock = Lock()
+        # Marca de agua de la consulta incremental de órdenes, órdenes activas conocidas y
+        # ``updated_at`` de las filas ya leídas dentro del margen
+        self._changes_lock: Lock = Lock()
+        self._last_update: object = None
+        self._known_orders: dict[int, dict] = {}
+        self._seen_updates: dict[int, object] = {}
 
 
     def _get_db_info(self) -> tuple[str]:
@@ -45,6 +78,204 @@ class DBConnection:
         return db_info
 
 
+    @contextmanager
+    def _cursor(self, commit: bool = False) -> Iterator[object]:
+        """
+        Presta un cursor del pool, aplicando antes las migraciones pendientes la primera vez
+
+        Todo el bloque corre dentro de una sola transacción del motor: las lecturas ven
+        la misma instantánea de la base de datos y las escrituras se confirman juntas o
+        se revierten juntas si ocurre un error.
+
+        Parámetros:
+            - :param:`commit` (bool): Abre una transacción de escritura y la confirma al terminar el bloque.
+
+        Regresa:
+            - :return:`cursor` (object): Cursor exclusivo de la llamada
+        """
+
+        if not self._migrated:
+            self.migrate()
+
+        with self._pool.cursor(commit) as cursor:
+            self._backend.begin(cursor, commit)
+            yield cursor
+
+
+    def transaction(self) -> ContextManager[object]:
+        """
+        Abre una transacción de escritura para agrupar varias sentencias
+
+        Se utiliza como ``with db_connection.transaction() as cursor:``. Las sentencias se
+        confirman al salir del bloque o se revierten todas si ocurre un error.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`transaction` (ContextManager[object]): Bloque que presta un cursor exclusivo
+        """
+
+        return self._cursor(commit = True)
+
+
+    def migrate(self) -> None:
+        """
+        Aplica las migraciones pendientes del archivo :file:`db_migrations.py`
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._migration_lock:
+            if self._migrated:
+                return
+
+            with self._pool.connection() as connection:
+                apply_migrations(connection, self._backend)
+
+            self._migrated = True
+
+
+    def is_transient_error(self, error: Exception) -> bool:
+        """
+        Indica si un error de una llamada se puede reintentar, ver :method:`DBBackend.is_transient`
+
+        Parámetros:
+            - :param:`error` (Exception): Error ocurrido durante la llamada.
+
+        Regresa:
+            - :return:`transient` (bool): Verdadero si el error se puede reintentar
+        """
+
+        return self._backend.is_transient(error)
+
+
+    def _parse_order_row(self, row: tuple, products_n_quantities: dict[str, str]) -> dict[str]:
+        """
+        Convierte una fila de la tabla de órdenes en el diccionario utilizado por la aplicación
+
+        Parámetros:
+            - :param:`row` (tuple): Fila con las columnas de :attr:`ORDER_COLUMNS`
+            - :param:`products_n_quantities` (dict[str, str]): Productos y cantidades de la orden
+
+        Regresa:
+            - :return:`order` (dict[str]): Orden con el formato ``{customer_name, products_n_quantities, total, hour, origin}``
+        """
+
+        _id, name, total, origin, created_at = row[0:5]
+
+        return {
+            "customer_name" : name,
+            "products_n_quantities" : products_n_quantities,
+            "total" : total,
+            "hour": self._as_datetime(created_at).strftime("%H:%M") if created_at is not None else "",
+            "origin" : origin
+        }
+
+
+    @staticmethod
+    def _as_datetime(value: datetime | str) -> datetime:
+        """
+        Convierte un valor de la columna ``created_at`` a :class:`datetime`
+
+        MySQL regresa la columna como :class:`datetime` y SQLite como texto ``AAAA-MM-DD HH:MM:SS``.
+
+        Parámetros:
+            - :param:`value` (datetime | str): Valor de la columna.
+
+        Regresa:
+            - :return:`created_at` (datetime): Fecha y hora
+        """
+
+        return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+    def _order_created_at(self, order: dict[str]) -> datetime:
+        """
+        Fecha y hora en que se tomó una comanda
+
+        ``created_at`` siempre guarda la hora local de la caja y siempre la escribe la
+        aplicación, nunca un valor por defecto de la base de datos, cuya zona horaria depende
+        de la sesión; así los filtros por fecha y los resúmenes por hora comparan lo mismo.
+
+        Parámetros:
+            - :param:`order` (dict[str]): Comanda con ``created_at``, o con ``date`` y ``hour``
+              si se tomó antes de la columna ``created_at``.
+
+        Regresa:
+            - :return:`created_at` (datetime): Fecha y hora de la comanda, la actual si no la trae
+        """
+
+        if order.get("created_at"):
+            return self._as_datetime(order["created_at"])
+
+        # Comandas del diario local tomadas antes de la columna created_at
+        if order.get("date") and order.get("hour"):
+            legacy: str | None = legacy_created_at(order["date"], order["hour"])
+
+            if legacy is not None:
+                return datetime.fromisoformat(legacy)
+
+        return datetime.now().replace(microsecond = 0)
+
+
+    @staticmethod
+    def _item_name(product_id: int, product_name: str | None) -> str:
+        """
+        Nombre con el que se muestra un producto de una orden
+
+        Una orden puede guardarse antes de que su producto se registre en la tabla ``products``,
+        o el producto puede salir del catálogo; en ese caso la línea se muestra con su ID.
+
+        Parámetros:
+            - :param:`product_id` (int): ID del producto de la línea.
+            - :param:`product_name` (str | None): Nombre registrado, nulo si el producto no está registrado.
+
+        Regresa:
+            - :return:`name` (str): Nombre del producto
+        """
+
+        return product_name if product_name is not None else f"Producto {product_id}"
+
+
+    def _fetch_items(self, cursor: object, order_ids: list[int]) -> dict[int, dict[str, str]]:
+        """
+        Obtiene en una sola consulta los productos y cantidades de varias órdenes
+
+        Parámetros:
+            - :param:`cursor` (object): Cursor de la llamada en curso.
+            - :param:`order_ids` (list[int]): IDs de las órdenes.
+
+        Regresa:
+            - :return:`items` (dict[int, dict[str, str]]): Productos y cantidades por ID de orden
+        """
+
+        items: dict[int, dict[str, str]] = {order_id : {} for order_id in order_ids}
+
+        if not order_ids:
+            return items
+
+        placeholders: str = ", ".join(["%s"] * len(order_ids))
+        cursor.execute(
+            self._backend.sql(
+                "SELECT oi.order_id, oi.product_id, p.name, oi.quantity FROM order_items oi "
+                "LEFT JOIN products p ON p.id = oi.product_id "
+                f"WHERE oi.order_id IN ({placeholders}) ORDER BY oi.order_id, oi.product_id"
+            ),
+            tuple(order_ids)
+        )
+
+        for order_id, product_id, product_name, quantity in cursor.fetchall():
+            items[order_id][self._item_name(product_id, product_name)] = str(quantity)
+
+        return items
+
+
+    @instrumentation.timed("db.get_employees")
     def get_employees(self) -> list[str]:
         """
         Obtiene los empleados activos de la base de datos
@@ -53,88 +284,757 @@ class DBConnection:
             - No recibe parámetros.
 
         Regresa:
-            - :return:`self._employees` (list[str]): Lista con los nombres de los empleados activos
+            - :return:`employees` (list[str]): Lista nueva con los nombres de los empleados activos
         """
 
-        self._cursor.execute("SELECT name, active FROM employees")
+        with self._cursor() as cursor:
+            cursor.execute("SELECT name FROM employees WHERE active = 1 ORDER BY id")
+            employees: list[str] = [name for name, in cursor.fetchall()]
+
+        return employees
 
-        employees_list: list[str, int] = self._cursor.fetchall()
 
-        for employee in employees_list:
-            name, active = employee
-            if active:
-                self._employees.append(name)
+    @instrumentation.timed("db.send_order_to_db")
+    def send_order_to_db(self, order: dict[str]) -> int | None:
+        """
+        Envía la comanda a la base de datos
 
-        return self._employees
+        La orden y sus productos se guardan en la misma transacción, los productos con
+        una sola inserción por lotes en la tabla ``order_items``.
 
+        Parámetros:
+            - :param:`order` (dict[str]): Diccionario con los datos de la comanda, los productos
+              van en ``items`` como tuplas ``(product_id, quantity, unit_price)``
 
-    def send_order_to_db(self, order: dict[str]) -> None:
+        Regresa:
+            - :return:`order_id` (int | None): ID de la orden creada, None si ya se había enviado
         """
-        Envía la comanda a la base de datos
+
+        return self.send_orders_to_db([order])[0]
+
+
+    @instrumentation.timed("db.send_orders_to_db")
+    def send_orders_to_db(self, orders: list[dict[str]]) -> list[int | None]:
+        """
+        Envía un lote de comandas a la base de datos en una sola transacción
+
+        Cada comanda puede traer un ``submission_id`` único; las comandas cuyo ``submission_id``
+        ya existe en la base de datos se omiten, así reenviar un lote después de un fallo
+        no duplica órdenes. Si la comanda trae ``created_at`` (o ``date`` y ``hour``, de las
+        comandas tomadas antes de esa columna) se respeta, si no se utiliza la fecha y hora
+        actual. Las columnas de texto ``date`` y ``hour`` se siguen llenando por compatibilidad.
+        ``origin`` y ``payment_method`` son opcionales, por defecto ``Local`` y ``Efectivo``.
+
+        Las ventas del lote se suman a ``sales_rollups`` y sus productos se descuentan de las
+        existencias en la misma transacción, con :method:`_take_stock`. Si algún producto no
+        alcanza se lanza :class:`OutOfStockError` y no se guarda ninguna comanda del lote.
 
         Parámetros:
-            - :param:`order` (dict[str]): Diccionario con los datos de la comanda
+            - :param:`orders` (list[dict[str]]): Comandas con el formato de :method:`send_order_to_db`
 
         Regresa:
-            - No regresa ningún valor.
+            - :return:`order_ids` (list[int | None]): ID de cada orden creada, None para las omitidas
         """
 
-        products_and_quantities_str: str = ""
+        # La columna products_n_quantities se conserva vacía por compatibilidad con el esquema
+        sql: str = self._backend.sql(
+            "INSERT INTO orders (customer_name, products_n_quantities, total, employee, active, date, hour, "
+            "created_at, submission_id, origin, payment_method, rolled_up) "
+            "VALUES (%s, '', %s, %s, 1, %s, %s, %s, %s, %s, %s, 1)"
+        )
+        items_sql: str = self._backend.sql(
+            "INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (%s, %s, %s, %s)"
+        )
+
+        order_ids: list[int | None] = []
+        items: list[tuple[int, int, int, int]] = []
+        rollup: SalesRollup = SalesRollup()
 
-        # Convierte el diccionario de referencia de cantidades en un string
-        for product, quantity in order["products_and_quantities"].items():
-            products_and_quantities_str += f"{product} x {quantity}, "
-        else:
-            products_and_quantities_str = products_and_quantities_str[0:products_and_quantities_str.rfind(", ")]
+        # Envía las órdenes y sus productos a la base de datos
+        with self._cursor(commit = True) as cursor:
+            # Se buscan las comandas del lote que ya se habían guardado
+            submission_ids: list[str] = [order["submission_id"] for order in orders if order.get("submission_id")]
+            sent: set[str] = set()
 
-        # Obtiene la fecha y hora actual
-        date: str = strftime("%d/%b/%Y")
-        time: str = strftime("%H:%M:%S")
+            if submission_ids:
+                placeholders: str = ", ".join(["%s"] * len(submission_ids))
+                cursor.execute(
+                    self._backend.sql(f"SELECT submission_id FROM orders WHERE submission_id IN ({placeholders})"),
+                    tuple(submission_ids)
+                )
+                sent = {row[0] for row in cursor.fetchall()}
 
-        sql: str = "INSERT INTO orders (customer_name, products_n_quantities, total, employee, active, date, hour) VALUES (%s, %s, %s, %s, 1, %s, %s)"
-        values: tuple[str] = (order["customer_name"], products_and_quantities_str, order["total"], order["employee"], date, time)
+            for order in orders:
+                if order.get("submission_id") in sent:
+                    order_ids.append(None)
+                    continue
 
-        # Envía la orden a la base de datos
-        self._cursor.execute(sql, values)
-        self.__database.commit()
+                created_at: datetime = self._order_created_at(order)
+                origin: str = order.get("origin", "Local")
+                payment_method: str = order.get("payment_method", "Efectivo")
 
+                values: tuple[str] = (
+                    order["customer_name"], order["total"], order["employee"],
+                    created_at.strftime("%d/%b/%Y"), created_at.strftime("%H:%M:%S"),
+                    created_at.strftime("%Y-%m-%d %H:%M:%S"), order.get("submission_id"), origin, payment_method
+                )
+                cursor.execute(sql, values)
+                rollup.add(created_at, order["total"], payment_method, origin, order["employee"])
+                order_id: int = cursor.lastrowid
+                order_ids.append(order_id)
 
-    def get_orders(self) -> dict[str, list]:
+                items.extend(
+                    (order_id, product_id, quantity, unit_price) for product_id, quantity, unit_price in order["items"]
+                )
+
+            # Los productos de todo el lote se insertan de una sola vez
+            if items:
+                self._take_stock(cursor, items)
+                cursor.executemany(items_sql, items)
+            if rollup:
+                self._add_to_sales_rollups(cursor, rollup)
+
+        return order_ids
+
+
+    @instrumentation.timed("db.get_orders")
+    def get_orders(self, active_only: bool = True, since: Date | None = None, until: Date | None = None) -> dict[str, list]:
         """
         Obtiene las órdenes de la base de datos
 
+        Los filtros se aplican en la consulta con el índice ``(active, created_at)``, de modo que
+        el costo depende de las órdenes que cumplen los filtros y no del historial, y solo
+        se leen las columnas de :attr:`ORDER_COLUMNS`.
+
         Parámetros:
-            - No recibe parámetros.
+            - :param:`active_only` (bool): Verdadero para obtener solo las órdenes activas.
+            - :param:`since` (Date | None): Primer día de las órdenes, None para no filtrar por fecha.
+            - :param:`until` (Date | None): Último día de las órdenes, por defecto el día actual.
 
         Regresa:
             - :return:`orders` (dict[str, list]): Diccionario con las órdenes, con
             el formato ``{id : {name, products_n_quantities, total, origin}}``
         """
 
-        # Obtiene las órdenes de la base de datos
-        self._cursor.execute("SELECT * FROM orders")
-        db_rows: list[tuple[str]] = self._cursor.fetchall()
+        columns: str = ", ".join(f"o.{column}" for column in self.ORDER_COLUMNS.split(", "))
+        conditions: list[str] = []
+        parameters: list[str] = []
+
+        # Sin filtrar por activas se pregunta por ambos valores para que la ventana de fechas
+        # también utilice el índice (active, created_at)
+        if active_only:
+            conditions.append("o.active = 1")
+        elif since is not None:
+            conditions.append("o.active IN (0, 1)")
+        # La ventana va del inicio de since al inicio del día siguiente a until
+        if since is not None:
+            end: Date = (until or Date.today()) + timedelta(days = 1)
+            conditions.append("o.created_at >= %s AND o.created_at < %s")
+            parameters.extend(f"{day.isoformat()} 00:00:00" for day in (since, end))
+
+        where: str = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+        # Obtiene las órdenes con sus productos en una sola consulta
+        with self._cursor() as cursor:
+            cursor.execute(
+                self._backend.sql(
+                    f"SELECT {columns}, oi.product_id, p.name, oi.quantity FROM orders o "
+                    "LEFT JOIN order_items oi ON oi.order_id = o.id "
+                    "LEFT JOIN products p ON p.id = oi.product_id "
+                    f"{where}ORDER BY o.id, oi.product_id"
+                ),
+                tuple(parameters)
+            )
+            db_rows: list[tuple[str]] = cursor.fetchall()
 
         orders: dict[str, list] = {}
 
-        # Se crea un diccionario con las órdenes
-        for order in db_rows:
-            id, name, products_n_quantities, total, origin, hour = order[0], order[1], order[2], order[3], order[5], order[8]
-            products_n_quantities_list: list[str] = products_n_quantities.split(", ")
-            products_n_quantities_dict: dict[str, str] = {}
-
-            # Se crea un diccionario con los productos y cantidades de la orden
-            for product in products_n_quantities_list:
-                product_name, product_quantity = product.split(" x ")
-                products_n_quantities_dict[product_name] = product_quantity
-
-            # Se agrega la orden al diccionario de órdenes
-            orders[id] = {
-                "customer_name" : name,
-                "products_n_quantities" : products_n_quantities_dict,
-                "total" : total,
-                "hour": hour[0:5],
-                "origin" : origin
-            }
-
-        return orders
\ No newline at end of file
+        # Se crea un diccionario con las órdenes, cada fila aporta un producto
+        for row in db_rows:
+            order_id, product_id, product_name, quantity = row[0], row[5], row[6], row[7]
+
+            if order_id not in orders:
+                orders[order_id] = self._parse_order_row(row, {})
+
+            # Las órdenes sin productos traen una sola fila sin línea
+            if product_id is not None:
+                orders[order_id]["products_n_quantities"][self._item_name(product_id, product_name)] = str(quantity)
+
+        return orders
+
+
+    def _lagged(self, updated_at: object) -> object:
+        """
+        Resta :attr:`CHANGES_LAG` a un valor de la columna ``updated_at``
+
+        MySQL regresa la columna como :class:`datetime` y SQLite como texto ``AAAA-MM-DD HH:MM:SS.fff``,
+        el resultado conserva el tipo para compararse en la base de datos.
+
+        Parámetros:
+            - :param:`updated_at` (object): Valor de la columna.
+
+        Regresa:
+            - :return:`lagged` (object): Valor con el margen restado
+        """
+
+        if isinstance(updated_at, datetime):
+            return updated_at - self.CHANGES_LAG
+
+        return (datetime.fromisoformat(updated_at) - self.CHANGES_LAG).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+    @instrumentation.timed("db.get_order_changes")
+    def get_order_changes(self) -> OrderDelta:
+        """
+        Obtiene únicamente las órdenes activas nuevas, modificadas o cerradas desde la última llamada
+
+        La primera llamada regresa todas las órdenes activas como nuevas. Las siguientes leen las
+        filas con ``updated_at`` a partir de la última marca de agua menos :attr:`CHANGES_LAG`, de
+        modo que su costo depende del número de cambios y no del historial de órdenes.
+
+        ``updated_at`` y el ID se asignan al ejecutar cada sentencia, no al confirmar, así que una
+        transacción larga puede hacerse visible después de otra más reciente. Por eso no se
+        utiliza el ID como marca de agua y las filas dentro del margen se vuelven a leer; las que
+        ya se vieron con el mismo ``updated_at`` se descartan sin leer sus productos.
+
+        Las marcas de agua pertenecen a este objeto, cada consumidor de los cambios debe
+        tener su propio objeto de la clase :class:`DBConnection` o compartir el resultado.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`delta` (OrderDelta): Órdenes agregadas, modificadas y eliminadas
+        """
+
+        columns: str = f"{self.ORDER_COLUMNS}, active, updated_at"
+        delta: OrderDelta = OrderDelta()
+
+        with self._changes_lock:
+            with self._cursor() as cursor:
+                last_update: object = self._last_update
+
+                # En la primera llamada se fija la marca de agua antes de leer las órdenes activas
+                if last_update is None:
+                    cursor.execute("SELECT MAX(updated_at) FROM orders")
+                    last_update = cursor.fetchone()[0]
+                    cursor.execute(f"SELECT {columns} FROM orders WHERE active = 1 ORDER BY id")
+                    rows: list[tuple] = cursor.fetchall()
+                # Órdenes nuevas o modificadas desde la marca de agua menos el margen; primero solo
+                # se leen sus IDs y ``updated_at``, y las filas completas solo si alguna no se ha visto
+                else:
+                    lagged: object = self._lagged(last_update)
+                    cursor.execute(self._backend.sql("SELECT id, updated_at FROM orders WHERE updated_at >= %s"), (lagged,))
+                    rows = []
+
+                    if any(self._seen_updates.get(order_id) != updated_at for order_id, updated_at in cursor.fetchall()):
+                        cursor.execute(
+                            self._backend.sql(f"SELECT {columns} FROM orders WHERE updated_at >= %s ORDER BY id"), (lagged,)
+                        )
+                        rows = [row for row in cursor.fetchall() if self._seen_updates.get(row[0]) != row[6]]
+
+                # Productos de las órdenes activas recibidas, en una sola consulta
+                items: dict[int, dict[str, str]] = self._fetch_items(cursor, [row[0] for row in rows if row[5]])
+
+            for row in rows:
+                order_id, active, updated_at = row[0], row[5], row[6]
+
+                if last_update is None or updated_at > last_update:
+                    last_update = updated_at
+                self._seen_updates[order_id] = updated_at
+
+                # Las órdenes cerradas se eliminan si se conocían
+                if not active:
+                    if self._known_orders.pop(order_id, None) is not None:
+                        delta.removed.append(order_id)
+                    continue
+
+                order: dict[str] = self._parse_order_row(row, items[order_id])
+                known: dict[str] | None = self._known_orders.get(order_id)
+
+                # Una fila dentro del margen puede llegar otra vez sin cambios
+                if known is None:
+                    delta.added[order_id] = order
+                elif known != order:
+                    delta.updated[order_id] = order
+                else:
+                    continue
+
+                # Se guarda una copia para que quien recibe los cambios no altere las órdenes conocidas
+                self._known_orders[order_id] = {
+                    **order, "products_n_quantities" : dict(order["products_n_quantities"])
+                }
+
+            self._last_update = last_update
+
+            # Solo se recuerdan las filas que la siguiente consulta vuelve a leer
+            if last_update is not None:
+                lagged = self._lagged(last_update)
+                self._seen_updates = {
+                    order_id : updated_at for order_id, updated_at in self._seen_updates.items() if updated_at >= lagged
+                }
+
+        return delta
+
+
+    def _take_stock(self, cursor: object, items: list[tuple[int, int, int, int]]) -> None:
+        """
+        Descuenta de las existencias los productos de un lote de comandas
+
+        Todas las cantidades se descuentan con una sola sentencia. La sentencia bloquea las filas
+        de los productos hasta que termina la transacción, así que otra caja que descuente los
+        mismos productos espera y después ve las existencias ya descontadas. Si alguna queda
+        negativa se lanza :class:`OutOfStockError` y la transacción se deshace completa; si no,
+        los productos descontados reciben una nueva versión de existencias.
+
+        Parámetros:
+            - :param:`cursor` (object): Cursor de la transacción en curso.
+            - :param:`items` (list[tuple[int, int, int, int]]): Filas ``(order_id, product_id, quantity, unit_price)``
+              de ``order_items``.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        quantities: dict[int, int] = {}
+        for _order_id, product_id, quantity, _unit_price in items:
+            quantities[int(product_id)] = quantities.get(int(product_id), 0) + int(quantity)
+
+        placeholders: str = ", ".join(["%s"] * len(quantities))
+        cases: str = " ".join(["WHEN %s THEN %s"] * len(quantities))
+
+        # Los productos sin existencias (stock nulo) no se tocan
+        cursor.execute(
+            self._backend.sql(
+                f"UPDATE products SET stock = stock - CASE id {cases} END "
+                f"WHERE id IN ({placeholders}) AND stock IS NOT NULL"
+            ),
+            (*[value for pair in quantities.items() for value in pair], *quantities)
+        )
+        cursor.execute(
+            self._backend.sql(f"SELECT id, stock FROM products WHERE id IN ({placeholders}) AND stock IS NOT NULL ORDER BY id"),
+            tuple(quantities)
+        )
+        rows: list[tuple] = cursor.fetchall()
+        short: list[int] = [product_id for product_id, stock in rows if stock < 0]
+
+        if short:
+            raise OutOfStockError(short)
+        if rows:
+            self._bump_stock_versions(cursor, [product_id for product_id, _stock in rows])
+
+
+    def _bump_stock_versions(self, cursor: object, product_ids: list[int]) -> int:
+        """
+        Marca con una nueva versión de existencias los productos que cambiaron en la transacción
+
+        El contador de ``stock_sequence`` queda bloqueado hasta que termina la transacción, por
+        lo que las versiones se confirman en orden: quien lee una versión ya ve confirmadas
+        todas las anteriores. Debe llamarse después de modificar las filas de los productos,
+        así todas las transacciones bloquean primero productos y después el contador.
+
+        Parámetros:
+            - :param:`cursor` (object): Cursor de la transacción en curso.
+            - :param:`product_ids` (list[int]): IDs de los productos que cambiaron.
+
+        Regresa:
+            - :return:`version` (int): Versión asignada a los productos
+        """
+
+        cursor.execute("UPDATE stock_sequence SET version = version + 1 WHERE id = 1")
+        cursor.execute("SELECT version FROM stock_sequence WHERE id = 1")
+        version: int = int(cursor.fetchone()[0])
+
+        placeholders: str = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(
+            self._backend.sql(f"UPDATE products SET stock_version = %s WHERE id IN ({placeholders})"),
+            (version, *product_ids)
+        )
+
+        return version
+
+
+    @instrumentation.timed("db.get_stock")
+    def get_stock(self) -> dict[int, int]:
+        """
+        Obtiene las existencias de los productos que las llevan
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`stock` (dict[int, int]): Existencias por ID del producto
+        """
+
+        with self._cursor() as cursor:
+            cursor.execute("SELECT id, stock FROM products WHERE stock IS NOT NULL")
+            rows: list[tuple] = cursor.fetchall()
+
+        return {int(product_id) : int(stock) for product_id, stock in rows}
+
+
+    @instrumentation.timed("db.set_stock")
+    def set_stock(self, stock: dict[int, int]) -> None:
+        """
+        Fija las existencias de varios productos, por ejemplo al resurtir
+
+        Parámetros:
+            - :param:`stock` (dict[int, int]): Existencias por ID del producto.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        if not stock:
+            return
+
+        with self._cursor(commit = True) as cursor:
+            cursor.executemany(
+                self._backend.sql("UPDATE products SET stock = %s WHERE id = %s"),
+                [(quantity, int(product_id)) for product_id, quantity in stock.items()]
+            )
+            self._bump_stock_versions(cursor, [int(product_id) for product_id in stock])
+
+
+    @instrumentation.timed("db.get_availability_changes")
+    def get_availability_changes(self, since: int = 0) -> dict[str]:
+        """
+        Obtiene la disponibilidad de los productos que cambiaron después de una versión
+
+        Con ``since`` en cero, o mayor a la versión actual si la base de datos se reinició, se
+        regresa el catálogo completo con ``full`` verdadero. Si nada cambió solo se lee el
+        contador de versiones. Quien consulta guarda la versión regresada y la envía en la
+        siguiente consulta.
+
+        Parámetros:
+            - :param:`since` (int): Última versión conocida por quien consulta.
+
+        Regresa:
+            - :return:`changes` (dict[str]): ``{version, full, products}``, con ``products`` como lista
+              de ``{id, name, stock, available, version}``; ``stock`` es nulo si el producto no lleva
+              existencias
+        """
+
+        with self._cursor() as cursor:
+            cursor.execute("SELECT version FROM stock_sequence WHERE id = 1")
+            version: int = int(cursor.fetchone()[0])
+            full: bool = since <= 0 or since > version
+
+            if full:
+                cursor.execute("SELECT id, name, stock, stock_version FROM products ORDER BY id")
+                rows: list[tuple] = cursor.fetchall()
+            elif since == version:
+                rows = []
+            else:
+                cursor.execute(
+                    self._backend.sql("SELECT id, name, stock, stock_version FROM products WHERE stock_version > %s ORDER BY id"),
+                    (since,)
+                )
+                rows = cursor.fetchall()
+
+        # Las versiones se confirman en orden, una fila más reciente que el contador leído
+        # implica que todas las anteriores ya están confirmadas
+        version = max([version, *(int(row[3]) for row in rows)])
+
+        return {
+            "version" : version,
+            "full" : full,
+            "products" : [
+                {
+                    "id" : int(product_id),
+                    "name" : name,
+                    "stock" : None if stock is None else int(stock),
+                    "available" : stock is None or int(stock) > 0,
+                    "version" : int(stock_version),
+                }
+                for product_id, name, stock, stock_version in rows
+            ],
+        }
+
+
+    @instrumentation.timed("db.sync_products")
+    def sync_products(self, products: list[Product]) -> None:
+        """
+        Registra los productos del catálogo en la tabla ``products``
+
+        Las existencias de la base de datos se llenan con la columna ``Cantidad`` del catálogo
+        solo si el producto aún no las tiene, así volver a registrar el catálogo no deshace lo
+        vendido. Para resurtir se utiliza :method:`set_stock`. Los productos nuevos y los que
+        reciben existencias por primera vez obtienen una nueva versión de existencias.
+
+        Parámetros:
+            - :param:`products` (list[Product]): Productos del catálogo
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._cursor(commit = True) as cursor:
+            cursor.execute("SELECT id, stock FROM products")
+            known: dict[int, int | None] = {int(product_id) : stock for product_id, stock in cursor.fetchall()}
+
+            # Productos que el canal de disponibilidad aún no conoce como están
+            changed: list[int] = [
+                int(product.id) for product in products
+                if int(product.id) not in known or (known[int(product.id)] is None and product.stock is not None)
+            ]
+
+            cursor.executemany(
+                self._backend.upsert("products", ("id", "name"), "id"),
+                [(int(product.id), product.name) for product in products]
+            )
+            cursor.executemany(
+                self._backend.sql("UPDATE products SET stock = %s WHERE id = %s AND stock IS NULL"),
+                [(product.stock, int(product.id)) for product in products if product.stock is not None]
+            )
+
+            if changed:
+                self._bump_stock_versions(cursor, changed)
+
+
+    @instrumentation.timed("db.migrate_legacy_order_items")
+    def migrate_legacy_order_items(self, products: list[Product]) -> int:
+        """
+        Convierte las órdenes guardadas con el texto ``"Café x 2, Girella x 1"`` en filas de ``order_items``
+
+        Solo procesa las órdenes que aún no tienen productos en ``order_items``, por lo que
+        puede ejecutarse varias veces. El precio unitario se obtiene del precio de cliente
+        del catálogo; los nombres que no están en el catálogo se registran como productos nuevos.
+
+        Parámetros:
+            - :param:`products` (list[Product]): Productos del catálogo
+
+        Regresa:
+            - :return:`migrated` (int): Número de órdenes convertidas
+        """
+
+        self.sync_products(products)
+
+        catalog: dict[str, Product] = {product.name : product for product in products}
+
+        with self._cursor(commit = True) as cursor:
+            cursor.execute("SELECT id, name FROM products")
+            product_ids: dict[str, int] = {name : product_id for product_id, name in cursor.fetchall()}
+            next_product_id: int = max(product_ids.values(), default = 0) + 1
+
+            cursor.execute(
+                "SELECT o.id, o.products_n_quantities FROM orders o "
+                "WHERE o.products_n_quantities <> '' AND NOT EXISTS "
+                "(SELECT 1 FROM order_items oi WHERE oi.order_id = o.id)"
+            )
+            legacy_rows: list[tuple[int, str]] = cursor.fetchall()
+
+            new_products: list[tuple[int, str]] = []
+            items: list[tuple[int, int, int, int]] = []
+
+            for order_id, products_n_quantities in legacy_rows:
+                quantities: dict[str, int] = {}
+
+                for product in products_n_quantities.split(", "):
+                    # Se separa por la última aparición para tolerar nombres con " x "
+                    product_name, _separator, quantity = product.rpartition(" x ")
+                    quantities[product_name] = quantities.get(product_name, 0) + int(quantity)
+
+                for product_name, quantity in quantities.items():
+                    if product_name not in product_ids:
+                        product_ids[product_name] = next_product_id
+                        new_products.append((next_product_id, product_name))
+                        next_product_id += 1
+
+                    unit_price: int = int(catalog[product_name].price) if product_name in catalog else 0
+                    items.append((order_id, product_ids[product_name], quantity, unit_price))
+
+            if new_products:
+                cursor.executemany(self._backend.sql("INSERT INTO products (id, name) VALUES (%s, %s)"), new_products)
+            if items:
+                cursor.executemany(
+                    self._backend.sql("INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (%s, %s, %s, %s)"),
+                    items
+                )
+
+        return len(legacy_rows)
+
+
+    @instrumentation.timed("db.get_product_totals")
+    def get_product_totals(self) -> dict[int, dict[str]]:
+        """
+        Obtiene las unidades vendidas y el importe por producto, agregados en la base de datos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`totals` (dict[int, dict[str]]): Totales por ID de producto, con el
+            formato ``{id : {name, quantity, amount}}``
+        """
+
+        with self._cursor() as cursor:
+            cursor.execute(
+                "SELECT oi.product_id, p.name, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price) "
+                "FROM order_items oi LEFT JOIN products p ON p.id = oi.product_id "
+                "GROUP BY oi.product_id, p.name"
+            )
+            rows: list[tuple] = cursor.fetchall()
+
+        return {
+            product_id : {"name" : self._item_name(product_id, name), "quantity" : int(quantity), "amount" : int(amount)}
+            for product_id, name, quantity, amount in rows
+        }
+
+
+    def _add_to_sales_rollups(self, cursor: object, rollup: SalesRollup) -> None:
+        """
+        Suma las celdas acumuladas a la tabla ``sales_rollups``
+
+        Parámetros:
+            - :param:`cursor` (object): Cursor de la transacción en curso.
+            - :param:`rollup` (SalesRollup): Ventas acumuladas.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        cursor.executemany(
+            self._backend.increment("sales_rollups", ("day", "hour", "dimension", "label"), ("orders", "amount")),
+            rollup.rows()
+        )
+
+
+    @instrumentation.timed("db.refresh_sales_rollups")
+    def refresh_sales_rollups(self, batch_size: int = 5000) -> int:
+        """
+        Suma a ``sales_rollups`` las órdenes que aún no se han sumado
+
+        Las comandas enviadas con :method:`send_orders_to_db` ya se suman al guardarse, así que
+        normalmente solo quedan pendientes las órdenes insertadas por otros sistemas y, una
+        sola vez, el historial anterior a la tabla de resúmenes. Cada lote se suma y se marca
+        en la misma transacción, bloqueando sus filas para que dos procesos no lo sumen dos veces.
+
+        Las órdenes de otros sistemas que llegan sin ``created_at`` lo toman aquí de sus columnas
+        ``date`` y ``hour``, en la misma hora local con la que la aplicación escribe la columna.
+
+        Parámetros:
+            - :param:`batch_size` (int): Órdenes por transacción.
+
+        Regresa:
+            - :return:`rolled_up` (int): Número de órdenes sumadas
+        """
+
+        rolled_up: int = 0
+
+        while True:
+            with self._cursor(commit = True) as cursor:
+                cursor.execute(
+                    self._backend.sql(
+                        "SELECT id, created_at, date, hour, total, payment_method, origin, employee FROM orders "
+                        f"WHERE rolled_up = 0 ORDER BY id LIMIT %s{self._backend.for_update}"
+                    ),
+                    (batch_size,)
+                )
+                rows: list[tuple] = cursor.fetchall()
+
+                if not rows:
+                    return rolled_up
+
+                rollup: SalesRollup = SalesRollup()
+                filled: list[tuple[str, int]] = []
+
+                for order_id, created_at, date, hour, total, payment_method, origin, employee in rows:
+                    if created_at is None:
+                        created_at = legacy_created_at(date, hour)
+                        # Las órdenes cuya fecha no se reconoce quedan sin created_at
+                        if created_at is None:
+                            continue
+                        filled.append((created_at, order_id))
+
+                    rollup.add(self._as_datetime(created_at), total, payment_method, origin, employee)
+
+                self._add_to_sales_rollups(cursor, rollup)
+                if filled:
+                    cursor.executemany(self._backend.sql("UPDATE orders SET created_at = %s WHERE id = %s"), filled)
+                # Conserva updated_at, si no MySQL la actualiza y el tablero vuelve a publicar
+                # las órdenes sumadas como si hubieran cambiado
+                cursor.executemany(
+                    self._backend.sql("UPDATE orders SET rolled_up = 1, updated_at = updated_at WHERE id = %s"),
+                    [(row[0],) for row in rows]
+                )
+
+            rolled_up += len(rows)
+
+
+    @instrumentation.timed("db.get_sales_summary")
+    def get_sales_summary(self, day: Date | None = None) -> dict[str]:
+        """
+        Obtiene el resumen de ventas de un día para el corte de caja
+
+        Primero suma las órdenes pendientes con :method:`refresh_sales_rollups` y después lee
+        solo las filas del día en ``sales_rollups``, por lo que su costo no depende del historial.
+
+        Parámetros:
+            - :param:`day` (Date | None): Día del resumen, por defecto el día actual.
+
+        Regresa:
+            - :return:`summary` (dict[str]): Resumen con el formato ``{orders, amount, payment_method,
+            origin, employee, hours}``, donde cada dimensión es ``{etiqueta : {orders, amount}}`` y
+            ``hours`` es ``{hora : {orders, amount}}``
+        """
+
+        self.refresh_sales_rollups()
+
+        day = day or Date.today()
+        summary: dict[str] = {
+            "orders" : 0, "amount" : 0, "payment_method" : {}, "origin" : {}, "employee" : {}, "hours" : {}
+        }
+
+        with self._cursor() as cursor:
+            cursor.execute(
+                self._backend.sql("SELECT hour, dimension, label, orders, amount FROM sales_rollups WHERE day = %s"),
+                (day.isoformat(),)
+            )
+            rows: list[tuple] = cursor.fetchall()
+
+        for hour, dimension, label, orders, amount in rows:
+            if dimension == "total":
+                summary["orders"] += int(orders)
+                summary["amount"] += int(amount)
+                summary["hours"][int(hour)] = {"orders" : int(orders), "amount" : int(amount)}
+                continue
+
+            totals: dict[str, int] = summary[dimension].setdefault(label, {"orders" : 0, "amount" : 0})
+            totals["orders"] += int(orders)
+            totals["amount"] += int(amount)
+
+        return summary
+
+
+    @instrumentation.timed("db.get_active_order_counts")
+    def get_active_order_counts(self) -> dict[str, int]:
+        """
+        Cuenta las órdenes activas por origen, agregadas en la base de datos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`counts` (dict[str, int]): Número de órdenes activas por origen
+        """
+
+        with self._cursor() as cursor:
+            cursor.execute("SELECT origin, COUNT(*) FROM orders WHERE active = 1 GROUP BY origin")
+            rows: list[tuple] = cursor.fetchall()
+
+        return {origin : int(count) for origin, count in rows}
+
+
+    def close(self) -> None:
+        """
+        Cierra las conexiones abiertas con la base de datos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._pool.close()
@@ -0,0 +1,591 @@
+
+from typing import Callable
+
+from other.db_backend import DBBackend
+
+
+# Meses abreviados de ``strftime("%b")`` en inglés y en español, para las fechas de texto
+# de las órdenes anteriores a ``created_at``
+_LEGACY_MONTHS: dict[str, int] = {
+    "jan" : 1, "ene" : 1, "feb" : 2, "mar" : 3, "apr" : 4, "abr" : 4, "may" : 5, "jun" : 6,
+    "jul" : 7, "aug" : 8, "ago" : 8, "sep" : 9, "oct" : 10, "nov" : 11, "dec" : 12, "dic" : 12,
+}
+
+# Candado de MySQL que serializa las migraciones entre procesos y segundos de espera
+MIGRATIONS_LOCK: str = "etrigali_migrations"
+MIGRATIONS_LOCK_TIMEOUT: int = 120
+
+
+def _has_column(cursor: object, table: str, column: str) -> bool:
+    """
+    Indica si una tabla de MySQL ya tiene una columna
+
+    MySQL confirma cada sentencia DDL por separado, así que una migración interrumpida
+    puede quedar a medias; las migraciones consultan ``information_schema`` para repetir
+    solo los pasos que faltan.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`table` (str): Nombre de la tabla.
+        - :param:`column` (str): Nombre de la columna.
+
+    Regresa:
+        - :return:`exists` (bool): Verdadero si la columna existe
+    """
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+
+    return cursor.fetchone()[0] > 0
+
+
+def _has_index(cursor: object, table: str, index: str) -> bool:
+    """
+    Indica si una tabla de MySQL ya tiene un índice, ver :func:`_has_column`
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`table` (str): Nombre de la tabla.
+        - :param:`index` (str): Nombre del índice.
+
+    Regresa:
+        - :return:`exists` (bool): Verdadero si el índice existe
+    """
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index)
+    )
+
+    return cursor.fetchone()[0] > 0
+
+
+def _add_orders_updated_at(cursor: object, backend: DBBackend) -> None:
+    """
+    Agrega la columna ``updated_at`` a la tabla de órdenes
+
+    La columna funciona como marca de agua para las consultas incrementales de
+    :method:`DBConnection.get_order_changes`, la base de datos la actualiza en cada
+    inserción y modificación.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_column(cursor, "orders", "updated_at"):
+            cursor.execute(
+                "ALTER TABLE orders ADD COLUMN updated_at TIMESTAMP(6) NOT NULL "
+                "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+            )
+        return
+
+    # SQLite no permite valores por defecto no constantes en ALTER TABLE, la columna
+    # se mantiene con disparadores
+    now: str = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+    cursor.execute("ALTER TABLE orders ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
+    cursor.execute(f"UPDATE orders SET updated_at = {now}")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS orders_updated_at_insert AFTER INSERT ON orders
+        BEGIN
+            UPDATE orders SET updated_at = {now} WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS orders_updated_at_update AFTER UPDATE ON orders
+        WHEN NEW.updated_at = OLD.updated_at
+        BEGIN
+            UPDATE orders SET updated_at = {now} WHERE id = NEW.id;
+        END
+    """)
+
+
+def _create_order_items(cursor: object, backend: DBBackend) -> None:
+    """
+    Crea las tablas ``products`` y ``order_items``
+
+    Los productos de cada orden se guardan como filas normalizadas en lugar del texto
+    ``"Café x 2, Girella x 1"``. La conversión de las órdenes existentes se hace con
+    :method:`DBConnection.migrate_legacy_order_items`, pues necesita el catálogo.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "id INT NOT NULL PRIMARY KEY, "
+            "name VARCHAR(255) NOT NULL)"
+        )
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS order_items ("
+            "order_id INT NOT NULL, "
+            "product_id INT NOT NULL, "
+            "quantity INT NOT NULL, "
+            "unit_price INT NOT NULL, "
+            "PRIMARY KEY (order_id, product_id), "
+            "INDEX order_items_product_id (product_id))"
+        )
+        return
+
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS products ("
+        "id INTEGER PRIMARY KEY, "
+        "name TEXT NOT NULL)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS order_items ("
+        "order_id INTEGER NOT NULL, "
+        "product_id INTEGER NOT NULL, "
+        "quantity INTEGER NOT NULL, "
+        "unit_price INTEGER NOT NULL, "
+        "PRIMARY KEY (order_id, product_id))"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS order_items_product_id ON order_items (product_id)")
+
+
+def _add_orders_submission_id(cursor: object, backend: DBBackend) -> None:
+    """
+    Agrega la columna ``submission_id`` a la tabla de órdenes
+
+    Identifica cada comanda enviada desde la cola de envío, el índice único evita que
+    una comanda reenviada después de un fallo se guarde dos veces.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_column(cursor, "orders", "submission_id"):
+            cursor.execute("ALTER TABLE orders ADD COLUMN submission_id CHAR(32) NULL")
+        if not _has_index(cursor, "orders", "orders_submission_id"):
+            cursor.execute("CREATE UNIQUE INDEX orders_submission_id ON orders (submission_id)")
+        return
+
+    cursor.execute("ALTER TABLE orders ADD COLUMN submission_id TEXT NULL")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS orders_submission_id ON orders (submission_id)")
+
+
+def _add_orders_payment_method(cursor: object, backend: DBBackend) -> None:
+    """
+    Agrega la columna ``payment_method`` a la tabla de órdenes
+
+    Las órdenes existentes quedan como pagadas en efectivo.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_column(cursor, "orders", "payment_method"):
+            cursor.execute("ALTER TABLE orders ADD COLUMN payment_method VARCHAR(32) NOT NULL DEFAULT 'Efectivo'")
+        return
+
+    cursor.execute("ALTER TABLE orders ADD COLUMN payment_method TEXT NOT NULL DEFAULT 'Efectivo'")
+
+
+def _create_sales_rollups(cursor: object, backend: DBBackend) -> None:
+    """
+    Crea la tabla ``sales_rollups`` y la columna ``rolled_up`` de la tabla de órdenes
+
+    La tabla guarda el número de órdenes y el importe por día, hora y dimensión (método
+    de pago, origen, empleado y total), así el corte de caja lee unas cuantas filas sin
+    importar el tamaño del historial. La columna ``rolled_up`` marca las órdenes ya sumadas;
+    las existentes quedan pendientes y se suman con :method:`DBConnection.refresh_sales_rollups`.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS sales_rollups ("
+            "day DATE NOT NULL, "
+            "hour TINYINT NOT NULL, "
+            "dimension VARCHAR(16) NOT NULL, "
+            "label VARCHAR(255) NOT NULL, "
+            "orders INT NOT NULL, "
+            "amount BIGINT NOT NULL, "
+            "PRIMARY KEY (day, dimension, label, hour))"
+        )
+        if not _has_column(cursor, "orders", "rolled_up"):
+            cursor.execute("ALTER TABLE orders ADD COLUMN rolled_up TINYINT NOT NULL DEFAULT 0")
+        if not _has_index(cursor, "orders", "orders_rolled_up"):
+            cursor.execute("CREATE INDEX orders_rolled_up ON orders (rolled_up)")
+        return
+
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS sales_rollups ("
+        "day TEXT NOT NULL, "
+        "hour INTEGER NOT NULL, "
+        "dimension TEXT NOT NULL, "
+        "label TEXT NOT NULL, "
+        "orders INTEGER NOT NULL, "
+        "amount INTEGER NOT NULL, "
+        "PRIMARY KEY (day, dimension, label, hour))"
+    )
+    cursor.execute("ALTER TABLE orders ADD COLUMN rolled_up INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("CREATE INDEX IF NOT EXISTS orders_rolled_up ON orders (rolled_up)")
+
+
+def _create_order_indexes(cursor: object, backend: DBBackend) -> None:
+    """
+    Crea el índice ``orders_updated_at`` de la tabla de órdenes
+
+    Atiende a la consulta de órdenes modificadas de :method:`DBConnection.get_order_changes`,
+    así no recorre el historial completo. Las ventanas de fechas de las órdenes activas no
+    se indexan aquí: la columna ``date`` es texto con el mes abreviado y no se ordena como
+    fecha, su índice llega con ``created_at`` en :func:`_add_orders_created_at`.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_index(cursor, "orders", "orders_updated_at"):
+            cursor.execute("CREATE INDEX orders_updated_at ON orders (updated_at)")
+        return
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS orders_updated_at ON orders (updated_at)")
+
+
+def legacy_created_at(date: str, hour: str) -> str | None:
+    """
+    Convierte la fecha y hora de texto de una orden anterior a ``created_at``
+
+    Parámetros:
+        - :param:`date` (str): Fecha con el formato ``%d/%b/%Y``, por ejemplo ``17/Oct/2026``.
+        - :param:`hour` (str): Hora con el formato ``%H:%M:%S`` o ``%H:%M``.
+
+    Regresa:
+        - :return:`created_at` (str | None): Fecha y hora con el formato ``AAAA-MM-DD HH:MM:SS``,
+          None si el texto no se reconoce
+    """
+
+    try:
+        day, month, year = date.strip().split("/")
+        hours, minutes, seconds = ([int(part) for part in hour.strip().split(":")] + [0, 0])[0:3]
+
+        return (
+            f"{int(year):04d}-{_LEGACY_MONTHS[month[:3].lower()]:02d}-{int(day):02d} "
+            f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        )
+    except (ValueError, KeyError):
+        return None
+
+
+def _add_orders_created_at(cursor: object, backend: DBBackend, batch_size: int = 5000) -> None:
+    """
+    Agrega la columna ``created_at`` a la tabla de órdenes y la llena en las órdenes existentes
+
+    La fecha y hora de las órdenes se guardaban como texto con el mes abreviado según el
+    idioma del sistema, que no se puede comparar por rango. ``created_at`` guarda el mismo
+    momento como fecha nativa y el índice ``(active, created_at)`` convierte las ventanas de
+    tiempo en recorridos de rango. Las bases que aún tengan el índice ``(active, date)`` de
+    una versión anterior lo pierden aquí.
+
+    Las órdenes existentes se convierten por lotes a partir de sus columnas ``date`` y ``hour``;
+    las que no se reconocen quedan con ``created_at`` nulo. En MySQL cada paso revisa si ya
+    se aplicó y solo se convierten las órdenes sin ``created_at``, así una migración
+    interrumpida se puede repetir. Los valores por defecto de la base de datos que se fijan
+    aquí para las órdenes nuevas se quitan en :func:`_drop_orders_created_at_default`.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+        - :param:`batch_size` (int): Órdenes convertidas por consulta.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_column(cursor, "orders", "created_at"):
+            cursor.execute("ALTER TABLE orders ADD COLUMN created_at DATETIME NULL")
+    else:
+        cursor.execute("ALTER TABLE orders ADD COLUMN created_at TEXT NULL")
+
+    last_id: int = 0
+
+    while True:
+        cursor.execute(
+            backend.sql(
+                "SELECT id, date, hour FROM orders WHERE id > %s AND created_at IS NULL ORDER BY id LIMIT %s"
+            ),
+            (last_id, batch_size)
+        )
+        rows: list[tuple] = cursor.fetchall()
+
+        if not rows:
+            break
+
+        cursor.executemany(
+            backend.sql("UPDATE orders SET created_at = %s WHERE id = %s"),
+            [(legacy_created_at(date, hour), order_id) for order_id, date, hour in rows]
+        )
+        last_id = rows[-1][0]
+
+    if backend.name == "mysql":
+        # El valor por defecto se fija después de convertir, si no las órdenes existentes lo tomarían
+        cursor.execute("ALTER TABLE orders MODIFY created_at DATETIME NULL DEFAULT CURRENT_TIMESTAMP")
+        if not _has_index(cursor, "orders", "orders_active_created_at"):
+            cursor.execute("CREATE INDEX orders_active_created_at ON orders (active, created_at)")
+        if _has_index(cursor, "orders", "orders_active_date"):
+            cursor.execute("DROP INDEX orders_active_date ON orders")
+        return
+
+    # SQLite no permite valores por defecto no constantes en ALTER TABLE
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS orders_created_at_insert AFTER INSERT ON orders
+        WHEN NEW.created_at IS NULL
+        BEGIN
+            UPDATE orders SET created_at = datetime('now', 'localtime') WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS orders_active_created_at ON orders (active, created_at)")
+    cursor.execute("DROP INDEX IF EXISTS orders_active_date")
+
+
+def _add_products_stock(cursor: object, backend: DBBackend) -> None:
+    """
+    Agrega la columna ``stock`` a la tabla de productos
+
+    Guarda las existencias de cada producto, compartidas por todas las cajas. Un valor nulo
+    indica que el producto no lleva existencias. La columna se llena con la columna
+    ``Cantidad`` del catálogo la primera vez que se registra cada producto con
+    :method:`DBConnection.sync_products`.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_column(cursor, "products", "stock"):
+            cursor.execute("ALTER TABLE products ADD COLUMN stock INT NULL")
+        return
+
+    cursor.execute("ALTER TABLE products ADD COLUMN stock INTEGER NULL")
+
+
+def _add_products_stock_version(cursor: object, backend: DBBackend) -> None:
+    """
+    Agrega la versión de existencias ``stock_version`` a la tabla de productos
+
+    La tabla ``stock_sequence`` guarda en una sola fila el contador de versiones. Cada
+    transacción que cambia existencias lo incrementa y marca con el nuevo valor los productos
+    que tocó, así :method:`DBConnection.get_availability_changes` lee solo los productos con
+    una versión mayor a la que ya conoce quien consulta.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        if not _has_column(cursor, "products", "stock_version"):
+            cursor.execute("ALTER TABLE products ADD COLUMN stock_version BIGINT NOT NULL DEFAULT 0")
+        if not _has_index(cursor, "products", "products_stock_version"):
+            cursor.execute("CREATE INDEX products_stock_version ON products (stock_version)")
+        cursor.execute("CREATE TABLE IF NOT EXISTS stock_sequence (id INT PRIMARY KEY, version BIGINT NOT NULL)")
+    else:
+        cursor.execute("ALTER TABLE products ADD COLUMN stock_version INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("CREATE INDEX IF NOT EXISTS products_stock_version ON products (stock_version)")
+        cursor.execute("CREATE TABLE IF NOT EXISTS stock_sequence (id INTEGER PRIMARY KEY, version INTEGER NOT NULL)")
+
+    # La fila del contador puede existir si una ejecución anterior se interrumpió en MySQL
+    cursor.execute("SELECT COUNT(*) FROM stock_sequence WHERE id = 1")
+
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("INSERT INTO stock_sequence (id, version) VALUES (1, 0)")
+
+
+def _limit_orders_updated_at_trigger(cursor: object, backend: DBBackend) -> None:
+    """
+    Limita el disparador de ``updated_at`` de SQLite a las columnas que muestran las órdenes
+
+    Marcar una orden como sumada con ``rolled_up`` no la cambia para el tablero de órdenes;
+    con el disparador anterior cada lote de :method:`DBConnection.refresh_sales_rollups`
+    marcaba sus órdenes como modificadas y :method:`DBConnection.get_order_changes` volvía a
+    publicar el historial completo. En MySQL la sentencia de los resúmenes conserva
+    ``updated_at`` de forma explícita, así que no hay nada que migrar.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        return
+
+    cursor.execute("DROP TRIGGER IF EXISTS orders_updated_at_update")
+    cursor.execute("""
+        CREATE TRIGGER orders_updated_at_update
+        AFTER UPDATE OF customer_name, products_n_quantities, total, employee, origin, active,
+            date, hour, submission_id, payment_method, created_at ON orders
+        WHEN NEW.updated_at = OLD.updated_at
+        BEGIN
+            UPDATE orders SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+        END
+    """)
+
+
+def _drop_orders_created_at_default(cursor: object, backend: DBBackend) -> None:
+    """
+    Quita los valores por defecto de ``created_at`` en la tabla de órdenes
+
+    ``created_at`` guarda la hora local de la caja y la escribe la aplicación. El valor por
+    defecto de MySQL usaba la zona horaria de la sesión y el disparador de SQLite la del
+    servidor, así una misma ventana de fechas mezclaba horas de distintas zonas. Las órdenes
+    de otros sistemas que llegan sin ``created_at`` lo toman de sus columnas ``date`` y
+    ``hour`` en :method:`DBConnection.refresh_sales_rollups`.
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - No regresa ningún valor.
+    """
+
+    if backend.name == "mysql":
+        cursor.execute("ALTER TABLE orders MODIFY created_at DATETIME NULL DEFAULT NULL")
+        return
+
+    cursor.execute("DROP TRIGGER IF EXISTS orders_created_at_insert")
+
+
+# Migraciones en orden de aplicación: (versión, descripción, función)
+MIGRATIONS: list[tuple[int, str, Callable[[object, DBBackend], None]]] = [
+    (1, "Marca de agua updated_at en orders", _add_orders_updated_at),
+    (2, "Tablas products y order_items", _create_order_items),
+    (3, "Identificador de envío submission_id en orders", _add_orders_submission_id),
+    (4, "Método de pago payment_method en orders", _add_orders_payment_method),
+    (5, "Resúmenes de ventas sales_rollups", _create_sales_rollups),
+    (6, "Índice updated_at en orders", _create_order_indexes),
+    (7, "Fecha y hora nativa created_at en orders", _add_orders_created_at),
+    (8, "Existencias stock en products", _add_products_stock),
+    (9, "Versión de existencias stock_version en products", _add_products_stock_version),
+    (10, "Disparador de updated_at limitado a las columnas de las órdenes", _limit_orders_updated_at_trigger),
+    (11, "Fecha y hora created_at escrita solo por la aplicación", _drop_orders_created_at_default),
+]
+
+
+def _pending(cursor: object) -> list[tuple[int, str, Callable[[object, DBBackend], None]]]:
+    """
+    Migraciones que aún no están registradas en la tabla ``schema_migrations``
+
+    Parámetros:
+        - :param:`cursor` (object): Cursor de la transacción de migración.
+
+    Regresa:
+        - :return:`pending` (list[tuple]): Migraciones pendientes en orden de aplicación
+    """
+
+    cursor.execute("SELECT version FROM schema_migrations")
+    done: set[int] = {row[0] for row in cursor.fetchall()}
+
+    return [migration for migration in MIGRATIONS if migration[0] not in done]
+
+
+def apply_migrations(connection: object, backend: DBBackend) -> list[int]:
+    """
+    Aplica las migraciones pendientes sobre la base de datos
+
+    Las versiones aplicadas se registran en la tabla ``schema_migrations``, por lo que
+    llamar a esta función varias veces no repite ninguna migración. Si hay migraciones
+    pendientes se toman bajo un candado compartido por todos los procesos (``GET_LOCK`` en
+    MySQL, el candado de escritura de ``BEGIN IMMEDIATE`` en SQLite) y se vuelven a leer las
+    versiones aplicadas, así dos cajas que arrancan a la vez no aplican la misma migración.
+
+    Parámetros:
+        - :param:`connection` (object): Conexión con la base de datos.
+        - :param:`backend` (DBBackend): Motor de la base de datos.
+
+    Regresa:
+        - :return:`applied` (list[int]): Versiones aplicadas en esta llamada
+    """
+
+    applied: list[int] = []
+    cursor: object = connection.cursor()
+    locked: bool = False
+
+    try:
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY)")
+        connection.commit()
+
+        if not _pending(cursor):
+            connection.commit()
+            return applied
+
+        if backend.name == "mysql":
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATIONS_LOCK, MIGRATIONS_LOCK_TIMEOUT))
+            locked = cursor.fetchone()[0] == 1
+
+            if not locked:
+                raise TimeoutError(f"No se obtuvo el candado {MIGRATIONS_LOCK} para aplicar las migraciones")
+
+        while True:
+            # En SQLite el candado de escritura dura una transacción, cada migración se
+            # confirma junto con su registro y la siguiente vuelve a leer las versiones
+            backend.begin(cursor, write = True)
+            pending: list[tuple] = _pending(cursor)
+
+            if not pending:
+                connection.commit()
+                break
+
+            version, _description, migration = pending[0]
+            migration(cursor, backend)
+            cursor.execute(backend.sql("INSERT INTO schema_migrations (version) VALUES (%s)"), (version,))
+            connection.commit()
+            applied.append(version)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        if locked:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATIONS_LOCK,))
+            cursor.fetchall()
+        cursor.close()
+
+    return applied
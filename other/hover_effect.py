@@ -0,0 +1,57 @@
+
+import flet as ft
+
+from other.instrumentation import instrumentation
+
+
+class HoverEffect:
+    """
+    Efecto al pasar el cursor sobre tarjetas y botones: elevación de la tarjeta y color del borde.
+
+    El control cambia directo a su estado final con una sola llamada a ``update()`` y el
+    navegador se encarga de la animación: las tarjetas animan su elevación por sí mismas
+    y los contenedores con ``animate`` animan el borde. Antes cada paso de la elevación
+    era un mensaje al navegador.
+
+    El efecto no guarda estado, así que una misma instancia se comparte entre todas las
+    tarjetas o botones del mismo tipo.
+    """
+
+    def __init__(self, elevation: int = 0, border: ft.Border | None = None, rest_border: ft.Border | None = None) -> None:
+        """
+        Construye el efecto.
+
+        Parámetros:
+            - :param:`elevation` (int): Elevación de la tarjeta con el cursor encima.
+            - :param:`border` (ft.Border | None): Borde del contenedor con el cursor encima, None para no cambiarlo.
+            - :param:`rest_border` (ft.Border | None): Borde del contenedor sin el cursor encima.
+        """
+
+        self._elevation: int = elevation
+        self._border: ft.Border | None = border
+        self._rest_border: ft.Border | None = rest_border
+
+
+    @instrumentation.timed("ui.hover")
+    def apply(self, event: ft.HoverEvent, container: ft.Container, card: ft.Card | None = None) -> None:
+        """
+        Aplica el estado que corresponde al evento y lo envía al navegador en un solo mensaje
+
+        Parámetros:
+            - :param:`event` (ft.HoverEvent): Evento de pasar el cursor sobre el control.
+            - :param:`container` (ft.Container): Contenedor al que se le cambia el borde.
+            - :param:`card` (ft.Card | None): Tarjeta que se eleva, None si solo cambia el borde.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        hovered: bool = event.data == "true"
+
+        if card is not None:
+            card.elevation = self._elevation if hovered else 0
+        if self._border is not None:
+            container.border = self._border if hovered else self._rest_border
+
+        # La tarjeta contiene al contenedor, basta con actualizarla a ella
+        (card or container).update()
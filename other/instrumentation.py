@@ -0,0 +1,346 @@
+
+import os
+import logging
+import threading
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Callable
+
+import flet as ft
+
+from other.latency_histogram import LatencyHistogram
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class Instrumentation:
+    """
+    Mediciones de las rutas críticas: manejadores de eventos de Flet y métodos de la base de datos.
+
+    Cada operación marcada con :method:`timed` guarda su latencia en un :class:`LatencyHistogram`
+    y cuenta sus errores. Con :method:`count_updates` también se cuenta cuántas veces se llama
+    a ``update()`` dentro de cada manejador, es decir, cuántos mensajes envía al navegador.
+
+    Las mediciones se exponen en formato de texto de Prometheus, ya sea en un servidor local
+    con :method:`serve` o en un archivo que se reescribe cada cierto tiempo con :method:`start_dump`.
+    """
+
+    def __init__(self, prefix: str = "etrigali") -> None:
+        """
+        Construye el registro de mediciones vacío.
+
+        Parámetros:
+            - :param:`prefix` (str): Prefijo del nombre de las métricas.
+        """
+
+        self._prefix: str = prefix
+        self._lock: threading.Lock = threading.Lock()
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._errors: dict[str, int] = {}
+        self._updates: dict[str, int] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        # Operaciones en curso de cada hilo, la última recibe los update()
+        self._local: threading.local = threading.local()
+        self._server: ThreadingHTTPServer | None = None
+        self._dump_stop: threading.Event | None = None
+
+
+    def _histogram(self, operation: str) -> LatencyHistogram:
+        """
+        Regresa el histograma de una operación, creándolo la primera vez
+
+        Parámetros:
+            - :param:`operation` (str): Nombre de la operación.
+
+        Regresa:
+            - :return:`histogram` (LatencyHistogram): Histograma de la operación
+        """
+
+        histogram: LatencyHistogram | None = self._histograms.get(operation)
+
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(operation, LatencyHistogram())
+
+        return histogram
+
+
+    def _stack(self) -> list[str]:
+        """
+        Operaciones en curso del hilo actual
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`stack` (list[str]): Nombres de las operaciones, la última es la más interna
+        """
+
+        stack: list[str] | None = getattr(self._local, "stack", None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+
+    def timed(self, operation: str) -> Callable:
+        """
+        Decorador que mide la latencia y los errores de una función
+
+        Parámetros:
+            - :param:`operation` (str): Nombre de la operación, por ejemplo ``cashier.send_order``.
+
+        Regresa:
+            - :return:`decorator` (Callable): Decorador de la función
+        """
+
+        histogram: LatencyHistogram = self._histogram(operation)
+
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs) -> object:
+                stack: list[str] = self._stack()
+                stack.append(operation)
+                start: float = perf_counter()
+
+                try:
+                    return function(*args, **kwargs)
+                except Exception:
+                    with self._lock:
+                        self._errors[operation] = self._errors.get(operation, 0) + 1
+                    raise
+                finally:
+                    histogram.observe(perf_counter() - start)
+                    stack.pop()
+
+            return wrapper
+
+        return decorator
+
+
+    def count_updates(self) -> None:
+        """
+        Cuenta las llamadas a ``update()`` de los controles de Flet por operación en curso
+
+        Las llamadas fuera de una operación medida se cuentan como ``other``.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for control_class in (ft.Control, ft.Page):
+            original: Callable = control_class.update
+
+            # Solo se reemplaza una vez
+            if getattr(original, "_counted", False):
+                continue
+
+            def counted_update(control: ft.Control, *args, _original: Callable = original, **kwargs) -> object:
+                stack: list[str] = self._stack()
+                operation: str = stack[-1] if stack else "other"
+
+                with self._lock:
+                    self._updates[operation] = self._updates.get(operation, 0) + 1
+
+                return _original(control, *args, **kwargs)
+
+            counted_update._counted = True
+            control_class.update = counted_update
+
+
+    def add_gauge(self, name: str, function: Callable[[], float]) -> None:
+        """
+        Registra un valor que se lee cada vez que se exportan las mediciones
+
+        Parámetros:
+            - :param:`name` (str): Nombre de la métrica sin prefijo, por ejemplo ``order_queue_depth``.
+            - :param:`function` (Callable[[], float]): Función que regresa el valor actual.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            self._gauges[name] = function
+
+
+    def snapshot(self) -> dict[str]:
+        """
+        Copia de las mediciones
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`snapshot` (dict[str]): Histogramas, errores y ``update()`` por operación
+        """
+
+        with self._lock:
+            histograms: dict[str, LatencyHistogram] = dict(self._histograms)
+            errors: dict[str, int] = dict(self._errors)
+            updates: dict[str, int] = dict(self._updates)
+
+        return {
+            "histograms" : {operation : histogram.snapshot() for operation, histogram in histograms.items()},
+            "errors" : errors,
+            "updates" : updates,
+        }
+
+
+    def prometheus_text(self) -> str:
+        """
+        Mediciones en el formato de texto de Prometheus
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`text` (str): Mediciones listas para exponer
+        """
+
+        snapshot: dict[str] = self.snapshot()
+        name: str = f"{self._prefix}_operation_seconds"
+        lines: list[str] = [
+            f"# HELP {name} Latencia de los manejadores de eventos y de los métodos de la base de datos.",
+            f"# TYPE {name} histogram",
+        ]
+
+        for operation, histogram in sorted(snapshot["histograms"].items()):
+            # Las operaciones que nunca se llamaron no se exportan
+            if not histogram["count"]:
+                continue
+            for bound, count in histogram["buckets"]:
+                le: str = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{operation="{operation}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{operation="{operation}"}} {histogram["sum"]}')
+            lines.append(f'{name}_count{{operation="{operation}"}} {histogram["count"]}')
+
+        for metric, help_text, values in (
+            ("operation_errors_total", "Errores por operación.", snapshot["errors"]),
+            ("ui_updates_total", "Llamadas a update() de Flet por operación, cada una es un mensaje al navegador.", snapshot["updates"]),
+        ):
+            lines.append(f"# HELP {self._prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {self._prefix}_{metric} counter")
+            for operation, value in sorted(values.items()):
+                lines.append(f'{self._prefix}_{metric}{{operation="{operation}"}} {value}')
+
+        with self._lock:
+            gauges: dict[str, Callable[[], float]] = dict(self._gauges)
+
+        for gauge, function in sorted(gauges.items()):
+            try:
+                value: float = function()
+            except Exception:
+                continue
+            lines.append(f"# TYPE {self._prefix}_{gauge} gauge")
+            lines.append(f"{self._prefix}_{gauge} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> None:
+        """
+        Expone las mediciones en ``http://host:port/metrics`` desde un hilo en segundo plano
+
+        Parámetros:
+            - :param:`port` (int): Puerto del servidor.
+            - :param:`host` (str): Dirección del servidor, por defecto solo la máquina local.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        instrumentation: Instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body: bytes = instrumentation.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target = self._server.serve_forever, name = "metrics-server", daemon = True).start()
+        logger.info("Métricas en http://%s:%d/metrics", host, port)
+
+
+    def dump(self, path: str) -> None:
+        """
+        Escribe las mediciones en un archivo de forma atómica
+
+        Parámetros:
+            - :param:`path` (str): Ruta del archivo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        temporary_path: str = f"{path}.tmp"
+
+        with open(temporary_path, "w", encoding = "utf-8") as file:
+            file.write(self.prometheus_text())
+
+        os.replace(temporary_path, path)
+
+
+    def start_dump(self, path: str, interval: float = 15.0) -> None:
+        """
+        Reescribe el archivo de mediciones cada cierto tiempo desde un hilo en segundo plano
+
+        Parámetros:
+            - :param:`path` (str): Ruta del archivo.
+            - :param:`interval` (float): Segundos entre escrituras.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        stop: threading.Event = threading.Event()
+        self._dump_stop = stop
+
+        def run() -> None:
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as error:
+                    logger.warning("No se pudieron escribir las métricas: %r", error)
+
+        threading.Thread(target = run, name = "metrics-dump", daemon = True).start()
+
+
+    def stop(self) -> None:
+        """
+        Detiene el servidor y la escritura periódica de las mediciones
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_stop = None
+
+
+# Mediciones compartidas por todo el proceso
+instrumentation: Instrumentation = Instrumentation()
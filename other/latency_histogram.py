@@ -0,0 +1,73 @@
+
+from bisect import bisect_left
+from threading import Lock
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con cubetas fijas, en segundos, al estilo de Prometheus.
+
+    Registrar una latencia solo busca su cubeta y suma, por lo que su costo es constante
+    y puede dejarse activo en producción.
+    """
+
+    # Límites superiores de las cubetas en segundos, la última cubeta es +Inf
+    BUCKETS: tuple[float, ...] = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    )
+
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self._counts: list[int] = [0] * (len(self.BUCKETS) + 1)
+        self._sum: float = 0.0
+        self._count: int = 0
+        self._max: float = 0.0
+
+
+    def observe(self, seconds: float) -> None:
+        """
+        Registra una latencia
+
+        Parámetros:
+            - :param:`seconds` (float): Latencia en segundos.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        index: int = bisect_left(self.BUCKETS, seconds)
+
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+            if seconds > self._max:
+                self._max = seconds
+
+
+    def snapshot(self) -> dict[str]:
+        """
+        Copia del histograma con las cubetas acumuladas
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`snapshot` (dict[str]): Cubetas acumuladas ``[(límite, cuenta)]``, suma,
+            número de latencias y latencia máxima
+        """
+
+        with self._lock:
+            counts: list[int] = list(self._counts)
+            total: float = self._sum
+            count: int = self._count
+            maximum: float = self._max
+
+        buckets: list[tuple[float, int]] = []
+        cumulative: int = 0
+
+        for bound, bucket_count in zip((*self.BUCKETS, float("inf")), counts):
+            cumulative += bucket_count
+            buckets.append((bound, cumulative))
+
+        return {"buckets" : buckets, "sum" : total, "count" : count, "max" : maximum}
@@ -2,12 +2,17 @@
 import flet as ft
 
 from styles.styles import Styles
+from other.hover_effect import HoverEffect
 
 
 # Propiedades de estilo de los componentes de la tarjeta de orden, 
 # se obtienen de la clase :class:`Styles` del archivo :file:`styles.py`
 styles: dict[str] = Styles.orders_styles()
 
+# Efectos de la tarjeta de orden y de sus botones al pasar el cursor sobre ellos
+_card_hover: HoverEffect = HoverEffect(border = ft.border.all(1, "#8B9DDE"), rest_border = ft.border.all(1, "#00000000"))
+_button_hover: HoverEffect = HoverEffect(border = ft.border.all(3, "#F4FF2B"), rest_border = ft.border.all(3, "#00000000"))
+
 
 class OrderCard:
     """
@@ -35,13 +40,7 @@ class OrderCard:
             - No regresa nada.
         """
 
-        if _.data == "true":
-            card.border = ft.border.all(1, "#8B9DDE")
-            card.update()
-
-        else:
-            card.border = ft.border.all(1, "#00000000")
-            card.update()
+        _card_hover.apply(_, card)
 
 
     def _button_on_hover(self, _: ft.HoverEvent, button: ft.Container) -> None:
@@ -56,13 +55,7 @@ class OrderCard:
             - No regresa nada.
         """
 
-        if _.data == "true":
-            button.border = ft.border.all(3, "#F4FF2B")
-            button.update()
-
-        else:
-            button.border = ft.border.all(3, "#00000000")
-            button.update()
+        _button_hover.apply(_, button)
 
 
     def _origin_tag(self) -> ft.Container:
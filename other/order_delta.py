@@ -0,0 +1,61 @@
+
+class OrderDelta:
+    """
+    Contiene los cambios en las órdenes activas desde la última consulta.
+
+    Lo regresa el método :method:`get_order_changes` de la clase :class:`DBConnection`:
+        - added: Órdenes nuevas, con el formato ``{id : {customer_name, products_n_quantities, total, hour, origin}}``
+        - updated: Órdenes que ya se conocían y cambiaron, con el mismo formato
+        - removed: IDs de las órdenes que se cerraron o eliminaron
+    """
+
+    def __init__(self, added: dict[int, dict] | None = None, updated: dict[int, dict] | None = None,
+                 removed: list[int] | None = None) -> None:
+        """
+        Construye un objeto OrderDelta con los cambios proporcionados.
+
+        Parámetros:
+            - :param:`added` (dict[int, dict]): Órdenes nuevas.
+            - :param:`updated` (dict[int, dict]): Órdenes modificadas.
+            - :param:`removed` (list[int]): IDs de las órdenes cerradas o eliminadas.
+        """
+
+        self.added: dict[int, dict] = added if added is not None else {}
+        self.updated: dict[int, dict] = updated if updated is not None else {}
+        self.removed: list[int] = removed if removed is not None else []
+
+
+    def is_empty(self) -> bool:
+        """
+        Indica si no hubo cambios
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`empty` (bool): Verdadero si no hay órdenes nuevas, modificadas ni eliminadas
+        """
+
+        return not (self.added or self.updated or self.removed)
+
+
+    def apply_to(self, orders: dict[int, dict]) -> None:
+        """
+        Aplica los cambios sobre un diccionario de órdenes
+
+        Parámetros:
+            - :param:`orders` (dict[int, dict]): Diccionario de órdenes a actualizar
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        orders.update(self.added)
+        orders.update(self.updated)
+
+        for order_id in self.removed:
+            orders.pop(order_id, None)
+
+
+    def __repr__(self) -> str:
+        return f"OrderDelta(added={list(self.added)}, updated={list(self.updated)}, removed={self.removed})"
@@ -0,0 +1,315 @@
+
+import logging
+from threading import Condition, Lock, RLock, Thread
+from typing import Callable
+
+from other.order_delta import OrderDelta
+from other.db_connection import DBConnection
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class OrderPoller:
+    """
+    Consulta periódica de las órdenes activas, compartida por todas las pantallas del
+    Sistema Digital de Comandas (SCD).
+
+    Un solo hilo por proceso consulta los cambios con :method:`DBConnection.get_order_changes`
+    y los reparte a cada pantalla suscrita, así diez pantallas cuestan una consulta por
+    intervalo y no diez. Si no hay pantallas suscritas no se consulta la base de datos.
+
+    Al suscribirse, una pantalla recibe primero todas las órdenes activas como nuevas y
+    después solo los cambios, siempre en orden. La consulta y las entregas se hacen sin el
+    candado de las suscripciones, así una base de datos o un navegador lento no detienen a
+    la pantalla que se está suscribiendo. Las pantallas no deben modificar los diccionarios
+    de órdenes que reciben.
+
+    El número de órdenes activas por origen se lleva aquí una sola vez para todas las
+    pantallas, sumando y restando con cada cambio.
+    """
+
+    def __init__(self, db_connection: DBConnection, interval: float = 2.0) -> None:
+        """
+        Construye la consulta periódica sin iniciarla.
+
+        Parámetros:
+            - :param:`db_connection` (DBConnection): Conexión con la base de datos.
+            - :param:`interval` (float): Segundos entre consultas.
+        """
+
+        self._db_connection: DBConnection = db_connection
+        self._interval: float = interval
+
+        # Órdenes activas conocidas y funciones suscritas a sus cambios
+        self._orders: dict[int, dict] = {}
+        self._subscribers: list[Callable[[OrderDelta], None]] = []
+        # Pantallas que aún reciben las órdenes conocidas, con los cambios que llegaron mientras
+        self._joining: dict[Callable[[OrderDelta], None], list[OrderDelta]] = {}
+        # Número de órdenes activas por origen
+        self._origin_counts: dict[str, int] = {}
+
+        # El candado del estado solo se toma para leer o aplicar cambios, nunca durante la
+        # consulta ni las entregas; el de la consulta mantiene las consultas y sus entregas en orden
+        self._lock: RLock = RLock()
+        self._condition: Condition = Condition(self._lock)
+        self._poll_lock: Lock = Lock()
+        self._thread: Thread | None = None
+        self._running: bool = False
+
+        self.polls: int = 0
+        self.last_error: str = ""
+
+
+    def _publish(self, delta: OrderDelta, subscribers: list[Callable[[OrderDelta], None]]) -> None:
+        """
+        Entrega los cambios a las funciones suscritas
+
+        Un error en una pantalla no impide la entrega a las demás.
+
+        Parámetros:
+            - :param:`delta` (OrderDelta): Cambios en las órdenes activas.
+            - :param:`subscribers` (list[Callable[[OrderDelta], None]]): Funciones que reciben los cambios.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for callback in subscribers:
+            try:
+                callback(delta)
+            except Exception:
+                logger.exception("Error al entregar los cambios de las órdenes")
+
+
+    def _count(self, delta: OrderDelta) -> None:
+        """
+        Ajusta el número de órdenes por origen con los cambios, antes de aplicarlos
+
+        Parámetros:
+            - :param:`delta` (OrderDelta): Cambios en las órdenes activas.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        # Las órdenes eliminadas o modificadas restan en su origen anterior
+        for order_id in [*delta.removed, *delta.updated, *delta.added]:
+            previous: dict | None = self._orders.get(order_id)
+            if previous is not None:
+                self._origin_counts[previous["origin"]] -= 1
+
+        # Las órdenes nuevas o modificadas suman en su origen actual
+        for order in [*delta.added.values(), *delta.updated.values()]:
+            self._origin_counts[order["origin"]] = self._origin_counts.get(order["origin"], 0) + 1
+
+
+    def poll(self) -> OrderDelta:
+        """
+        Consulta los cambios en las órdenes activas y los entrega a las pantallas suscritas
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`delta` (OrderDelta): Cambios desde la consulta anterior
+        """
+
+        with self._poll_lock:
+            delta: OrderDelta = self._db_connection.get_order_changes()
+
+            with self._lock:
+                self.polls += 1
+
+                if delta.is_empty():
+                    return delta
+
+                self._count(delta)
+                delta.apply_to(self._orders)
+                subscribers: list[Callable[[OrderDelta], None]] = list(self._subscribers)
+
+                # Las pantallas que se están suscribiendo reciben el cambio después de las órdenes conocidas
+                for backlog in self._joining.values():
+                    backlog.append(delta)
+
+            self._publish(delta, subscribers)
+
+            return delta
+
+
+    def _run(self) -> None:
+        """
+        Ciclo del hilo que consulta la base de datos cada intervalo
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        while True:
+            with self._condition:
+                self._condition.wait(self._interval)
+
+                if not self._running:
+                    return
+                if not (self._subscribers or self._joining):
+                    continue
+
+            try:
+                self.poll()
+            except Exception as error:
+                # Se reintenta en el siguiente intervalo
+                self.last_error = repr(error)
+                logger.warning("La consulta de órdenes falló: %r", error)
+
+
+    def start(self) -> None:
+        """
+        Inicia el hilo de consulta
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = Thread(target = self._run, name = "order-poller", daemon = True)
+        self._thread.start()
+
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Detiene el hilo de consulta
+
+        Parámetros:
+            - :param:`timeout` (float): Segundos máximos de espera.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+    def subscribe(self, callback: Callable[[OrderDelta], None]) -> Callable[[], None]:
+        """
+        Suscribe una pantalla a los cambios en las órdenes activas
+
+        Si ya se conocen órdenes activas, la función las recibe de inmediato como nuevas, en el
+        hilo de quien se suscribe, seguidas de los cambios que se consultaron mientras tanto.
+
+        Parámetros:
+            - :param:`callback` (Callable[[OrderDelta], None]): Función que recibe los cambios
+
+        Regresa:
+            - :return:`unsubscribe` (Callable[[], None]): Función que cancela la suscripción
+        """
+
+        backlog: list[OrderDelta] = []
+
+        with self._condition:
+            orders: dict[int, dict] = dict(self._orders)
+            self._joining[callback] = backlog
+
+            # Se adelanta la siguiente consulta para no mostrar órdenes atrasadas
+            self._condition.notify_all()
+
+        if orders:
+            self._publish(OrderDelta(added = orders), [callback])
+
+        # La pantalla pasa a recibir los cambios de la consulta cuando ya no le quedan
+        # cambios pendientes, así nunca recibe uno antes que los anteriores
+        while True:
+            with self._lock:
+                if self._joining.get(callback) is not backlog:
+                    break
+
+                pending: list[OrderDelta] = list(backlog)
+                backlog.clear()
+
+                if not pending:
+                    del self._joining[callback]
+                    self._subscribers.append(callback)
+                    break
+
+            for delta in pending:
+                self._publish(delta, [callback])
+
+        return lambda: self.unsubscribe(callback)
+
+
+    def unsubscribe(self, callback: Callable[[OrderDelta], None]) -> None:
+        """
+        Cancela la suscripción de una pantalla
+
+        Parámetros:
+            - :param:`callback` (Callable[[OrderDelta], None]): Función suscrita
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            self._joining.pop(callback, None)
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+
+    def origin_counts(self) -> dict[str, int]:
+        """
+        Número de órdenes activas por origen
+
+        Antes de la primera consulta los cuenta la base de datos con ``GROUP BY origin``, sin
+        leer las órdenes, para que los contadores se muestren desde el primer momento.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`counts` (dict[str, int]): Órdenes activas por origen
+        """
+
+        with self._lock:
+            if self.polls > 0:
+                return {origin : count for origin, count in self._origin_counts.items() if count}
+
+        # El conteo de la base de datos se hace sin el candado, puede ser más antiguo que los
+        # cambios que ya recibió una pantalla y ella decide si lo aplica
+        return self._db_connection.get_active_order_counts()
+
+
+    @property
+    def subscribers(self) -> int:
+        """
+        Número de pantallas suscritas
+        """
+
+        return len(self._subscribers) + len(self._joining)
+
+
+    def orders(self) -> dict[int, dict]:
+        """
+        Copia de las órdenes activas conocidas
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`orders` (dict[int, dict]): Órdenes activas por ID
+        """
+
+        with self._lock:
+            return dict(self._orders)
@@ -0,0 +1,500 @@
+
+import os
+import json
+import logging
+from collections import deque
+from threading import Condition, Thread
+from time import monotonic, strftime
+from typing import Callable
+from uuid import uuid4
+
+from other.db_connection import DBConnection
+from other.out_of_stock_error import OutOfStockError
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class OrderQueue:
+    """
+    Cola de envío de comandas en segundo plano.
+
+    :method:`submit` guarda la comanda en un diario local, la agrega a la cola y regresa
+    de inmediato, sin esperar a la base de datos. Un hilo en segundo plano envía las
+    comandas pendientes por lotes y reintenta con espera exponencial si la base de datos
+    no responde.
+
+    El diario es un archivo de líneas JSON con tres tipos de registro:
+        - ``{"op": "order", "order": {...}}``: comanda aceptada
+        - ``{"op": "done", "submission_id": "..."}``: comanda guardada en la base de datos
+        - ``{"op": "rejected", "submission_id": "...", "product_ids": [...]}``: comanda rechazada
+          por falta de existencias, no se reintenta
+        - ``{"op": "failed", "submission_id": "...", "error": "..."}``: comanda descartada por un
+          error que no es de conexión, no se reintenta
+
+    Al iniciar se reenvían las comandas del diario que no tienen registro ``done``. Como cada
+    comanda lleva un ``submission_id`` único, reenviar una comanda ya guardada no la duplica.
+
+    Solo los errores transitorios, como una conexión perdida, se reintentan. Con cualquier otro
+    error el lote se envía comanda por comanda y solo se descarta la que falla, así una comanda
+    inválida no detiene a las que vienen detrás.
+
+    Las funciones registradas con :method:`on_flushed` y :method:`on_rejected` se llaman en el
+    hilo de envío después de registrar cada lote guardado o cada comanda rechazada o descartada.
+    """
+
+    def __init__(self, db_connection: DBConnection, journal_path: str = "orders_journal.jsonl",
+                 batch_size: int = 20, flush_interval: float = 0.25, max_backoff: float = 30.0) -> None:
+        """
+        Construye la cola de envío de comandas.
+
+        Parámetros:
+            - :param:`db_connection` (DBConnection): Conexión con la base de datos.
+            - :param:`journal_path` (str): Ruta del diario local de comandas.
+            - :param:`batch_size` (int): Número máximo de comandas por lote.
+            - :param:`flush_interval` (float): Segundos que se espera para juntar un lote.
+            - :param:`max_backoff` (float): Segundos máximos de espera entre reintentos.
+        """
+
+        self._db_connection: DBConnection = db_connection
+        self._journal_path: str = journal_path
+        self._batch_size: int = batch_size
+        self._flush_interval: float = flush_interval
+        self._max_backoff: float = max_backoff
+
+        self._pending: deque[dict] = deque()
+        self._condition: Condition = Condition()
+        self._thread: Thread | None = None
+        self._running: bool = False
+
+        # Métricas de la cola
+        self._flushed_total: int = 0
+        self._failed_flushes: int = 0
+        self._rejected_total: int = 0
+        self._failed_total: int = 0
+        self._last_flush_latency: float = 0.0
+        self._flush_latencies: deque[float] = deque(maxlen = 100)
+        self._last_error: str = ""
+
+        self._journal = None
+
+        # Funciones que reciben los lotes guardados y las comandas rechazadas
+        self._flushed_callbacks: list[Callable[[list[dict]], None]] = []
+        self._rejected_callbacks: list[Callable[[dict, Exception], None]] = []
+
+
+    def on_flushed(self, callback: Callable[[list[dict]], None]) -> None:
+        """
+        Registra una función que recibe cada lote de comandas guardado en la base de datos
+
+        Parámetros:
+            - :param:`callback` (Callable[[list[dict]], None]): Función que recibe el lote.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._flushed_callbacks.append(callback)
+
+
+    def on_rejected(self, callback: Callable[[dict, Exception], None]) -> None:
+        """
+        Registra una función que recibe cada comanda rechazada por falta de existencias o
+        descartada por un error que no se puede reintentar
+
+        Parámetros:
+            - :param:`callback` (Callable[[dict, Exception], None]): Función que recibe la
+              comanda y el error, :class:`OutOfStockError` si faltaron existencias.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._rejected_callbacks.append(callback)
+
+
+    def _notify(self, callbacks: list[Callable], *args) -> None:
+        """
+        Llama a las funciones registradas, un error en una no impide llamar a las demás
+
+        Se llama sin :attr:`_condition` tomado, así las funciones pueden consultar la cola.
+
+        Parámetros:
+            - :param:`callbacks` (list[Callable]): Funciones registradas.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("Error al notificar un envío de comandas")
+
+
+    def _write_journal(self, *records: dict) -> None:
+        """
+        Escribe registros en el diario y los lleva al disco antes de regresar
+
+        Se llama con :attr:`_condition` tomado. Los registros de un lote se escriben juntos y
+        se llevan al disco con un solo ``fsync``.
+
+        Parámetros:
+            - :param:`records` (dict): Registros a escribir
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._journal.write("".join(json.dumps(record, ensure_ascii = False) + "\n" for record in records))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+
+    def _replay_journal(self) -> None:
+        """
+        Recupera del diario las comandas que no alcanzaron a guardarse en la base de datos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        if not os.path.exists(self._journal_path):
+            return
+
+        pending: dict[str, dict] = {}
+
+        with open(self._journal_path, "r", encoding = "utf-8") as file:
+            for line in file:
+                try:
+                    record: dict = json.loads(line)
+                # Una línea incompleta al final del archivo indica un corte durante la escritura
+                except json.JSONDecodeError:
+                    continue
+
+                if record["op"] == "order":
+                    pending[record["order"]["submission_id"]] = record["order"]
+                elif record["op"] in ("done", "rejected", "failed"):
+                    pending.pop(record["submission_id"], None)
+
+        self._pending.extend(pending.values())
+
+
+    def _compact_journal(self) -> None:
+        """
+        Reescribe el diario solo con las comandas pendientes
+
+        Se llama con :attr:`_condition` tomado cuando la cola se vacía, así el diario no crece
+        indefinidamente.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._journal.close()
+
+        temporary_path: str = self._journal_path + ".tmp"
+        with open(temporary_path, "w", encoding = "utf-8") as file:
+            for order in self._pending:
+                file.write(json.dumps({"op" : "order", "order" : order}, ensure_ascii = False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, self._journal_path)
+        self._journal = open(self._journal_path, "a", encoding = "utf-8")
+
+
+    def _next_batch(self) -> list[dict]:
+        """
+        Espera a que haya comandas pendientes y regresa el siguiente lote sin sacarlo de la cola
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`batch` (list[dict]): Lote de comandas, vacío si la cola se detuvo
+        """
+
+        with self._condition:
+            while self._running and not self._pending:
+                self._condition.wait()
+
+            if not self._pending:
+                return []
+
+            # Se da un momento para juntar más comandas en el mismo lote
+            if len(self._pending) < self._batch_size:
+                self._condition.wait(self._flush_interval)
+
+            return [self._pending[idx] for idx in range(min(self._batch_size, len(self._pending)))]
+
+
+    def _flush(self, batch: list[dict]) -> None:
+        """
+        Envía un lote a la base de datos y lo marca como guardado en el diario
+
+        Parámetros:
+            - :param:`batch` (list[dict]): Lote de comandas
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        start: float = monotonic()
+
+        try:
+            self._db_connection.send_orders_to_db(batch)
+        except Exception as error:
+            # Los errores transitorios dejan el lote en la cola para reintentarlo
+            if not isinstance(error, OutOfStockError) and self._db_connection.is_transient_error(error):
+                raise
+
+            # Un lote rechazado se envía comanda por comanda, así solo se descartan las que fallan
+            if len(batch) > 1:
+                for order in batch:
+                    self._flush([order])
+            else:
+                self._reject(batch[0], error)
+            return
+
+        latency: float = monotonic() - start
+
+        with self._condition:
+            self._write_journal(*[{"op" : "done", "submission_id" : order["submission_id"]} for order in batch])
+            for _order in batch:
+                self._pending.popleft()
+
+            self._flushed_total += len(batch)
+            self._last_flush_latency = latency
+            self._flush_latencies.append(latency)
+
+            if not self._pending:
+                self._compact_journal()
+
+            self._condition.notify_all()
+
+        self._notify(self._flushed_callbacks, batch)
+
+
+    def _reject(self, order: dict, error: Exception) -> None:
+        """
+        Saca de la cola una comanda rechazada por falta de existencias o descartada por un error
+        que no se puede reintentar, y la registra en el diario
+
+        Parámetros:
+            - :param:`order` (dict): Comanda rechazada, la primera de la cola.
+            - :param:`error` (Exception): Error de la comanda, :class:`OutOfStockError` con los
+              productos que no alcanzaron si faltaron existencias.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._condition:
+            if isinstance(error, OutOfStockError):
+                self._write_journal({
+                    "op" : "rejected", "submission_id" : order["submission_id"], "product_ids" : error.product_ids
+                })
+                self._rejected_total += 1
+            else:
+                logger.error("Comanda %s descartada: %r", order["submission_id"], error)
+                self._write_journal({"op" : "failed", "submission_id" : order["submission_id"], "error" : repr(error)})
+                self._failed_total += 1
+
+            self._pending.popleft()
+            self._last_error = repr(error)
+
+            if not self._pending:
+                self._compact_journal()
+
+            self._condition.notify_all()
+
+        self._notify(self._rejected_callbacks, order, error)
+
+
+    def _run(self) -> None:
+        """
+        Ciclo del hilo en segundo plano que vacía la cola
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        backoff: float = self._flush_interval
+
+        while True:
+            batch: list[dict] = self._next_batch()
+
+            if not batch:
+                return
+
+            try:
+                self._flush(batch)
+                backoff = self._flush_interval
+            except Exception as error:
+                # Error transitorio: las comandas siguen en la cola y en el diario, se reintenta más tarde
+                self._failed_flushes += 1
+                self._last_error = repr(error)
+
+                deadline: float = monotonic() + backoff
+
+                with self._condition:
+                    # Las comandas nuevas despiertan al hilo, pero no adelantan el reintento
+                    while self._running and monotonic() < deadline:
+                        self._condition.wait(deadline - monotonic())
+                    if not self._running:
+                        return
+
+                backoff = min(backoff * 2, self._max_backoff)
+
+
+    def start(self) -> None:
+        """
+        Recupera las comandas pendientes del diario e inicia el hilo de envío
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._condition:
+            if self._running:
+                return
+
+            self._replay_journal()
+            self._journal = open(self._journal_path, "a", encoding = "utf-8")
+            self._running = True
+
+        self._thread = Thread(target = self._run, name = "order-queue", daemon = True)
+        self._thread.start()
+
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Intenta enviar las comandas pendientes y detiene el hilo de envío
+
+        Las comandas que no alcancen a enviarse permanecen en el diario para el siguiente inicio.
+
+        Parámetros:
+            - :param:`timeout` (float): Segundos máximos de espera.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self.wait_until_empty(timeout)
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+        with self._condition:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+    def submit(self, order: dict[str]) -> str:
+        """
+        Acepta una comanda, la guarda en el diario local y regresa sin esperar a la base de datos
+
+        Parámetros:
+            - :param:`order` (dict[str]): Comanda con el formato de :method:`DBConnection.send_order_to_db`
+
+        Regresa:
+            - :return:`submission_id` (str): Identificador único de la comanda
+        """
+
+        # Se fija la fecha y hora en que se tomó la comanda, no la del envío
+        order = {
+            **order,
+            "items" : [list(item) for item in order["items"]],
+            "submission_id" : order.get("submission_id") or uuid4().hex,
+            "created_at" : order.get("created_at") or strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        with self._condition:
+            if self._journal is None:
+                raise RuntimeError("La cola de envío no se ha iniciado, llama a start() primero")
+
+            self._write_journal({"op" : "order", "order" : order})
+            self._pending.append(order)
+            self._condition.notify_all()
+
+        return order["submission_id"]
+
+
+    def wait_until_empty(self, timeout: float | None = None) -> bool:
+        """
+        Espera a que todas las comandas pendientes se guarden en la base de datos
+
+        Parámetros:
+            - :param:`timeout` (float | None): Segundos máximos de espera, None para esperar sin límite.
+
+        Regresa:
+            - :return:`empty` (bool): Verdadero si la cola quedó vacía
+        """
+
+        deadline: float | None = None if timeout is None else monotonic() + timeout
+
+        with self._condition:
+            while self._pending and self._running:
+                remaining: float | None = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            return not self._pending
+
+
+    @property
+    def depth(self) -> int:
+        """
+        Número de comandas aceptadas que aún no se guardan en la base de datos
+        """
+
+        return len(self._pending)
+
+
+    def metrics(self) -> dict[str]:
+        """
+        Métricas de la cola de envío
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`metrics` (dict[str]): Profundidad de la cola, comandas enviadas, envíos
+            fallidos, comandas rechazadas por falta de existencias, comandas descartadas por
+            errores que no se reintentan, latencia del último envío y latencia promedio de los
+            últimos 100 envíos
+        """
+
+        with self._condition:
+            latencies: list[float] = list(self._flush_latencies)
+
+            return {
+                "depth" : len(self._pending),
+                "flushed_total" : self._flushed_total,
+                "failed_flushes" : self._failed_flushes,
+                "rejected_total" : self._rejected_total,
+                "failed_total" : self._failed_total,
+                "last_flush_latency_seconds" : self._last_flush_latency,
+                "avg_flush_latency_seconds" : sum(latencies) / len(latencies) if latencies else 0.0,
+                "last_error" : self._last_error,
+            }
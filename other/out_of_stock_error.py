@@ -0,0 +1,19 @@
+
+class OutOfStockError(Exception):
+    """
+    Error al guardar comandas que piden más productos de los que quedan en existencia.
+
+    Lo lanza :method:`DBConnection.send_orders_to_db` antes de confirmar la transacción, por
+    lo que ninguna comanda del lote se guarda ni descuenta existencias.
+    """
+
+    def __init__(self, product_ids: list[int]) -> None:
+        """
+        Construye el error.
+
+        Parámetros:
+            - :param:`product_ids` (list[int]): IDs de los productos sin existencias suficientes.
+        """
+
+        super().__init__(f"Sin existencias suficientes de los productos {product_ids}")
+        self.product_ids: list[int] = product_ids
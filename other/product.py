@@ -11,7 +11,8 @@ class Product:
         - price: Precio del producto
         - employee_price: Precio de empleado del producto
         - partner_price: Precio de socio del producto
-        - quantity: Cantidad de productos disponibles
+        - prices: Vector de precios indexado por :class:`CustomerType`
+        - quantity: Cantidad de productos disponibles, se actualiza con las existencias de la base de datos
         - image: Dirección de la imagen del producto en assets/images
         - additional_info: Información adicional del producto como alérgenos, etc.
     """
@@ -37,6 +38,31 @@ class Product:
         self.price: int = price
         self.employee_price: int = employee_price
         self.partner_price: int = partner_price
+        # Precios en el orden de CustomerType, se calculan una sola vez por producto
+        self.prices: tuple[int, int, int] = (price, employee_price, partner_price)
         self.quantity: int = quantity
         self.image: str = image
         self.additional_info: str = additional_info
+
+
+    @property
+    def stock(self) -> int | None:
+        """
+        Existencias del producto, None si el catálogo no las lleva (columna ``Cantidad`` vacía)
+        """
+
+        try:
+            return int(self.quantity)
+        except (TypeError, ValueError):
+            return None
+
+
+    @property
+    def sold_out(self) -> bool:
+        """
+        Verdadero si el producto lleva existencias y ya no le quedan
+        """
+
+        stock: int | None = self.stock
+
+        return stock is not None and stock <= 0
@@ -4,71 +4,114 @@ import flet as ft
 from styles.styles import Styles
 from other.product import Product
 from other.product_list import ProductList
+from other.customer_type import CustomerType
+from other.hover_effect import HoverEffect
+from other.instrumentation import instrumentation
 
 
 # Propiedades de estilo de los componentes de productos, se obtienen de la clase
 # Styles del archivo styles.py
 styles: dict[str] = Styles.product_styles()
 
+# Efecto de las tarjetas al pasar el cursor sobre ellas, compartido por todas las tarjetas
+_card_hover: HoverEffect = HoverEffect(
+    elevation = 10,
+    border = ft.border.all(1, "#8B9DDE"),
+    rest_border = ft.border.all(0, "#00000000")
+)
+
 
 class ProductCard:
     """
     Contiene los métodos para la creación de la tarjeta de producto.
 
     Require de la creación de un objeto de la clase :class:`Product` para poder construir la tarjeta. 
+
+    Los precios se toman del vector :attr:`Product.prices` con el tipo de cliente de la comanda,
+    y la tarjeta del catálogo guarda su texto de precio para cambiarlo con :method:`show_price`.
+    Un producto agotado se muestra atenuado, con el texto ``Agotado`` y sin poder agregarse,
+    y :method:`show_stock` cambia ese estado sin reconstruir la tarjeta.
     """
 
     def __init__(self, producto: Product) -> None:
         self._product: Product = producto
         self._card: ft.Card = ft.Card()
         self._ticket_card: ft.Card = ft.Card()
+        # Texto del precio en la tarjeta del catálogo
+        self._price_text: ft.Text = ft.Text()
+        # Estado de agotado mostrado en la tarjeta del catálogo
+        self._sold_out: bool = False
 
 
-    def _card_on_hover(self, _: ft.HoverEvent) -> None:
+    @property
+    def card(self) -> ft.Card:
         """
-        Permite a la tarjeta elevarse al pasar el cursor sobre ella
+        Tarjeta del catálogo construida con :method:`build_card`
         """
 
-        if _.data == "true":
-            for __ in range(10):
-                self._card.elevation += 1
-                self._card.update()
+        return self._card
 
-            self._card.content.border = ft.border.all(1, "#8B9DDE")
-            self._card.content.update()
 
-        else:
-            for __ in range(10):
-                self._card.elevation -= 1
-                self._card.update()
+    def show_price(self, customer_type: CustomerType) -> None:
+        """
+        Escribe el precio del tipo de cliente en la tarjeta del catálogo, sin enviarlo al navegador
 
-            self._card.content.border = ft.border.all(0, "#00000000")
-            self._card.content.update()
+        Parámetros:
+            - :param:`customer_type` (CustomerType): Tipo de cliente.
 
+        Regresa:
+            - No regresa ningún valor.
+        """
 
-    def _ticket_card_on_hover(self, _: ft.HoverEvent) -> None:
+        price: int = self._product.prices[customer_type]
+
+        self._price_text.value = "Agotado" if self._sold_out else f"${price}"
+        self._price_text.key = price
+
+
+    def show_stock(self) -> bool:
+        """
+        Muestra u oculta el estado de agotado de la tarjeta del catálogo según las existencias
+        del producto, sin enviarlo al navegador
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`changed` (bool): Verdadero si el estado de la tarjeta cambió
+        """
+
+        sold_out: bool = self._product.sold_out
+
+        if sold_out == self._sold_out or self._card.content is None:
+            return False
+
+        self._sold_out = sold_out
+        self._card.content.opacity = styles["card"]["sold_out_opacity"] if sold_out else 1
+        self._card.content.disabled = sold_out
+        self._price_text.value = "Agotado" if sold_out else f"${self._price_text.key}"
+
+        return True
+
+
+    def _card_on_hover(self, _: ft.HoverEvent) -> None:
         """
         Permite a la tarjeta elevarse al pasar el cursor sobre ella
         """
 
-        if _.data == "true":
-            for __ in range(10):
-                self._ticket_card.elevation += 1
-                self._ticket_card.update()
+        _card_hover.apply(_, self._card.content, self._card)
 
-            self._ticket_card.content.border = ft.border.all(1, "#8B9DDE")
-            self._ticket_card.content.update()
 
-        else:
-            for __ in range(10):
-                self._ticket_card.elevation -= 1
-                self._ticket_card.update()
+    def _ticket_card_on_hover(self, _: ft.HoverEvent) -> None:
+        """
+        Permite a la tarjeta elevarse al pasar el cursor sobre ella
+        """
 
-            self._ticket_card.content.border = ft.border.all(0, "#00000000")
-            self._ticket_card.content.update()
+        _card_hover.apply(_, self._ticket_card.content, self._ticket_card)
 
 
-    def _add_to_cart(self, _: ft.ControlEvent, product_list_content: ft.Container, product_list: ProductList, total: ft.Container, customer_type: str) -> None:
+    @instrumentation.timed("cashier.add_to_cart")
+    def _add_to_cart(self, _: ft.ControlEvent, product_list_content: ft.Container, product_list: ProductList, total: ft.Container) -> None:
         """
         Agrega un producto al carrito de compras
 
@@ -76,21 +119,30 @@ class ProductCard:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos añadidos.
             - :param:`product_list` (ProductList): Lista de productos.
             - :param:`total` (ft.Container): Contenedor del total de la compra.
-            - :param:`customer_type` (str): Tipo de cliente.
 
         Regresa:
             - No regresa ningún valor.
         """
 
-        product_to_add: ft.Card = self.build_ticket_card(product_list_content, product_list, total, customer_type)
+        # Las existencias pudieron acabarse después de mostrar la tarjeta
+        if self._product.sold_out:
+            return
+
+        # Si el producto ya está en la lista se reutiliza su tarjeta, su precio ya corresponde
+        # al tipo de cliente de la comanda
+        product_to_add: ft.Card | None = product_list.ticket_card(int(self._product.id))
+
+        if product_to_add is None:
+            product_to_add = self.build_ticket_card(product_list_content, product_list, total)
+
         product_list.add_to_list(product_list_content, product_to_add, total)
 
 
-    def build_card(self, odd_row: bool, product_list_content: ft.Container , product_list: ProductList, total: ft.Container, customer_type: str) -> ft.Card:
+    def build_card(self, odd_row: bool, product_list_content: ft.Container , product_list: ProductList, total: ft.Container) -> ft.Card:
         """
         Construye una tarjeta de producto a partir de un objeto de la clase :class:`Product`.
 
-        Contiene el nombre del producto, su precio y su imagen.
+        Contiene el nombre del producto, su precio según el tipo de cliente de la comanda y su imagen.
 
         Parámetros:
             - odd_row (bool): Indica si la tarjeta se encuentra en una fila par o impar.
@@ -99,7 +151,6 @@ class ProductCard:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos añadidos.
             - :param:`product_list` (ProductList): Lista de productos.
             - :param:`total` (ft.Container): Contenedor del total de la compra.
-            - :param:`customer_type` (str): Tipo de cliente.
 
         Regresa:
             - :return:`card` (ft.Card): Tarjeta de producto construida.
@@ -113,14 +164,14 @@ class ProductCard:
             styles["card"]["bgcolor_1"] = "#2F374C"
             styles["card"]["bgcolor_2"] = "#4F5467"
 
-        price_str: str = ""
-
-        if customer_type == r"Empleado - 15% descuento":
-            price_str = self._product.employee_price
-        elif customer_type == r"Socio - 30% descuento":
-            price_str = self._product.partner_price
-        else:
-            price_str = self._product.price
+        # Texto del precio, se conserva para cambiarlo en su lugar con el tipo de cliente
+        self._price_text = ft.Text(
+            font_family = styles["price"]["font"],
+            size = styles["price"]["font_size"],
+            color = styles["price"]["font_color"],
+            weight = ft.FontWeight.W_300
+        )
+        self.show_price(product_list.customer_type)
 
         # Nombre del producto
         name: ft.Container = ft.Container(
@@ -141,14 +192,7 @@ class ProductCard:
         price: ft.Container = ft.Container(
             height = styles["price"]["height"],
             alignment = ft.alignment.center,
-            content = ft.Text(
-                f"${price_str}",
-                key = price_str,
-                font_family = styles["price"]["font"],
-                size = styles["price"]["font_size"],
-                color = styles["price"]["font_color"],
-                weight = ft.FontWeight.W_300
-            )
+            content = self._price_text
         )
 
         # Imagen del producto
@@ -197,7 +241,7 @@ class ProductCard:
                 ]
             ),
             on_hover = lambda _: self._card_on_hover(_),
-            on_click = lambda _: self._add_to_cart(_, product_list_content, product_list, total, customer_type),
+            on_click = lambda _: self._add_to_cart(_, product_list_content, product_list, total),
         )
 
         # Se coloca el contenido de la tarjeta dentro de un objeto de la clase ft.Card
@@ -209,33 +253,29 @@ class ProductCard:
             surface_tint_color = styles["card"]["tint_color"],
             content = card_content
         )
+        self.show_stock()
 
         return self._card
 
 
-    def build_ticket_card(self, product_list_content: ft.Container, product_list: ProductList, total: ft.Container, customer_type: str) -> ft.Card:
+    def build_ticket_card(self, product_list_content: ft.Container, product_list: ProductList, total: ft.Container) -> ft.Card:
         """
         Construye una tarjeta de producto a partir de un objeto de la clase :class:`Product`.
 
         Versión simplificada de la tarjeta de producto, contiene únicamente el nombre del producto, precio
         y la cantidad del producto en la lista, así como un botón para eliminar el producto de la lista.
+        El precio es el del tipo de cliente de la comanda.
 
         Parámetros:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos añadidos.
             - :param:`product_list` (ProductList): Lista de productos.
             - :param:`total` (ft.Container): Contenedor del total de la compra.
-            - :param:`customer_type` (str): Tipo de cliente.
 
         Regresa:
             - :return:`simple_card` (ft.Card): Tarjeta de producto simplificada construida.
         """
 
-        if customer_type == r"Empleado - 15% descuento":
-            price_str = self._product.employee_price
-        elif customer_type == r"Socio - 30% descuento":
-            price_str = self._product.partner_price
-        else:
-            price_str = self._product.price
+        price_str: str = self._product.prices[product_list.customer_type]
 
         # Nombre del producto
         name: ft.Container = ft.Container(
@@ -346,6 +386,8 @@ class ProductCard:
         # Se coloca el contenido de la tarjeta dentro de un objeto de la clase ft.Card
         # para poder elevarla al pasar el cursor sobre ella
         self._ticket_card = ft.Card(
+            # El producto viaja con la tarjeta para volver a tasarla al cambiar el tipo de cliente
+            data = self._product,
             elevation = 0,
             color = styles["ticket_card"]["hover_color"],
             shadow_color = styles["ticket_card"]["shadow_color"],
@@ -0,0 +1,131 @@
+
+from collections import OrderedDict
+
+import flet as ft
+
+from other.product import Product
+from other.customer_type import CustomerType
+from other.product_list import ProductList
+from other.product_card import ProductCard
+
+
+class ProductCardCache:
+    """
+    Caché de tarjetas del catálogo por producto y paridad de la fila.
+
+    Cada tarjeta se construye una sola vez con :method:`ProductCard.build_card` y se reutiliza
+    cada vez que se vuelve a mostrar. Al cambiar el tipo de cliente no se construye ninguna
+    tarjeta: :method:`show_prices` solo cambia el texto del precio de cada una. Del mismo modo
+    :method:`show_stock` marca como agotadas las tarjetas cuyos productos se acabaron, y cada
+    tarjeta que se vuelve a mostrar revisa sus existencias.
+
+    Las tarjetas guardan referencias al resumen de la comanda en el que agregan productos,
+    por lo que la caché pertenece a un solo resumen de la comanda.
+
+    Con un tamaño máximo la caché conserva solo las tarjetas usadas más recientemente, así un
+    catálogo virtualizado no guarda construidas todas las tarjetas por las que ya se desplazó.
+    """
+
+    def __init__(self, product_list_content: ft.Container, product_list: ProductList, total: ft.Container,
+                 max_size: int | None = None) -> None:
+        """
+        Construye la caché de tarjetas.
+
+        Parámetros de acarreo:
+            - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos añadidos.
+            - :param:`product_list` (ProductList): Lista de productos.
+            - :param:`total` (ft.Container): Contenedor del total de la compra.
+
+        Parámetros:
+            - :param:`max_size` (int | None): Número máximo de tarjetas, None para no limitarlo.
+        """
+
+        self._product_list_content: ft.Container = product_list_content
+        self._product_list: ProductList = product_list
+        self._total: ft.Container = total
+        self._max_size: int | None = max_size
+        # Tarjetas de la menos a la más recientemente usada
+        self._cards: OrderedDict[tuple[int, bool], ProductCard] = OrderedDict()
+
+
+    def get(self, product: Product, odd_row: bool) -> ft.Card:
+        """
+        Regresa la tarjeta de un producto, construyéndola solo la primera vez
+
+        Parámetros:
+            - :param:`product` (Product): Producto de la tarjeta.
+            - :param:`odd_row` (bool): Indica si la tarjeta se encuentra en una fila par o impar.
+
+        Regresa:
+            - :return:`card` (ft.Card): Tarjeta del producto
+        """
+
+        key: tuple[int, bool] = (int(product.id), odd_row)
+        product_card: ProductCard | None = self._cards.get(key)
+
+        # La tarjeta se construye con el tipo de cliente actual de la comanda
+        if product_card is None:
+            product_card = ProductCard(product)
+            product_card.build_card(odd_row, self._product_list_content, self._product_list, self._total)
+            self._cards[key] = product_card
+
+            # Se descarta la tarjeta usada hace más tiempo
+            if self._max_size is not None and len(self._cards) > self._max_size:
+                self._cards.popitem(last = False)
+        else:
+            self._cards.move_to_end(key)
+            product_card.show_stock()
+
+        return product_card.card
+
+
+    def show_prices(self, customer_type: CustomerType) -> None:
+        """
+        Cambia el precio mostrado en todas las tarjetas sin volver a construirlas
+
+        Parámetros:
+            - :param:`customer_type` (CustomerType): Tipo de cliente.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for product_card in self._cards.values():
+            product_card.show_price(customer_type)
+
+
+    def show_stock(self) -> bool:
+        """
+        Cambia el estado de agotado de las tarjetas según las existencias, sin volver a construirlas
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`changed` (bool): Verdadero si alguna tarjeta cambió
+        """
+
+        changed: bool = False
+
+        for product_card in self._cards.values():
+            changed = product_card.show_stock() or changed
+
+        return changed
+
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+
+    def clear(self) -> None:
+        """
+        Descarta todas las tarjetas, por ejemplo cuando cambia el catálogo
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._cards.clear()
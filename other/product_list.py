@@ -1,65 +1,81 @@
 
 import flet as ft
 
+from other.cart_line import CartLine
+from other.customer_type import CustomerType
+from other.instrumentation import instrumentation
+
 
 class ProductList:
     """
     Contiene los métodos para el manejo de la lista de productos.
 
     Requiere de objetos de la clase :class:`Product` para agregarlos a la lista de productos.
+
+    El carrito se guarda en renglones :class:`CartLine` indexados por el ID del producto y
+    el total se mantiene al día con cada cambio, así agregar o reducir un producto no recorre
+    la lista ni vuelve a sumar el total. Las tarjetas del resumen de la comanda solo muestran
+    ese estado; al eliminar un producto su tarjeta se quita de la lista de controles de Flet,
+    lo que sí la recorre, aunque una comanda tiene pocos renglones.
+
+    El tipo de cliente de la comanda vive aquí: define el precio con el que se agregan los
+    productos y al cambiarlo con :method:`reprice` se vuelven a tasar los renglones.
     """
 
     def __init__(self) -> None:
-        self._product_list: list[ft.Card] = []
-        self._quantity_ref_dict: dict[str, int] = {}
+        # Renglones del carrito por ID del producto, en el orden en que se agregaron
+        self._lines: dict[int, CartLine] = {}
         self._total: int = 0
+        self.customer_type: CustomerType = CustomerType.CLIENTE
 
 
-    def _get_product_atributes(self, product: ft.Card) -> tuple[str, str]:
+    def _get_product_atributes(self, product: ft.Card) -> tuple[int, str, str]:
         """
-        Extrae el nombre y el precio de un producto y los regresa en una tupla.
+        Extrae el ID, el nombre y el precio de un producto y los regresa en una tupla.
 
         Parámetros:
             - :param:`product` (ft.Card): Producto del cual se extraerán los atributos.
 
         Regresa:
-            - :return:`product_atributes` (tuple[str, str]): Tupla con el nombre y el precio del producto.
+            - :return:`product_atributes` (tuple[int, str, str]): Tupla con el ID, el nombre y el precio del producto.
         """
 
+        product_id: int = int(product.data.id)
         product_name: str = product.content.content.controls[1].content.value
         product_price: str = product.content.content.controls[3].content.key
 
-        return product_name, product_price
+        return product_id, product_name, product_price
 
 
-    def _calculate_total(self) -> None:
+    def _set_line(self, line: CartLine, quantity: int, unit_price: int) -> None:
         """
-        Calcula el total de la comanda.
+        Cambia la cantidad y el precio de un renglón y ajusta el total con la diferencia.
 
         - Parámetros:
-            - No recibe parámetros.
+            - :param:`line` (CartLine): Renglón a actualizar.
+            - :param:`quantity` (int): Nueva cantidad del producto.
+            - :param:`unit_price` (int): Nuevo precio unitario del producto.
 
         - Regresa:
             - No regresa ningún valor.
         """
 
-        # Se calcula el total de la comanda sumando los subtotales de cada producto
-        # en el diccionario de referencia de cantidades
-        total = sum(
-            int(product.content.content.controls[3].content.value.replace("$", ""))
-            for product in self._product_list
-        )
+        self._total -= line.subtotal
+        line.quantity = quantity
+        line.unit_price = unit_price
+        self._total += line.subtotal
 
-        self._total = total
+        line.render()
 
 
-    def _add_it(self, product_list_content: ft.Container, product: ft.Card, name: str, price: str) -> None:
+    def _add_it(self, product_list_content: ft.Container, product: ft.Card, product_id: int, name: str, price: str) -> None:
         """
         Función añadir para agregar un producto a la lista de productos.
 
         - Parámetros:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos.
             - :param:`product` (ft.Card): Producto a añadir a la lista de productos.
+            - :param:`product_id` (int): ID del producto a actualizar.
             - :param:`name` (str): Nombre del producto a actualizar.
             - :param:`price` (str): Precio del producto a actualizar.
 
@@ -67,142 +83,147 @@ class ProductList:
             - No regresa ningún valor.
         """
 
-        # Se obtiene la cantidad del producto a actualizar, si no existe se crea
-        # y se le asigna el valor de 1
-        self._quantity_ref_dict[name] = self._quantity_ref_dict.get(name, 0) + 1
-        # Se obtiene el índice del producto a actualizar, si no existe se asigna None
-        product_index: int | None = next(
-            (index for (index, product) in enumerate(self._product_list) if product.content.content.controls[1].content.value == name),
-            None
-        )
-
-        # Si el producto ya está en la lista, es decir, ya está en la referencia de cantidades
-        # se actualiza la cantidad del producto en la lista y en la referencia de cantidades
-        if product_index is not None:
-            self._product_list[product_index] = product
-            product_list_content.content.controls[product_index] = product
-            product_list_content.content.controls[product_index].content.content.controls[2].content.controls[1].value = self._quantity_ref_dict[name]
-            # Se actualiza el subtotal del producto
-            subtotal: int = int(price) * self._quantity_ref_dict[name]
-            product_list_content.content.controls[product_index].content.content.controls[3].content.value = f"${subtotal}"
-        # Si el producto no está en la lista, es decir, no está en la referencia de cantidades
-        # se agrega a la lista y se agrega a la referencia de cantidades
-        else:
-            self._product_list.append(product)
+        line: CartLine | None = self._lines.get(product_id)
+
+        # Si el producto no está en la lista, se crea su renglón y se agrega su tarjeta
+        # al resumen de la comanda
+        if line is None:
+            line = CartLine(product_id, name, int(price), product, product.data.prices)
+            self._lines[product_id] = line
             product_list_content.content.controls.append(product)
 
-        # Se actualiza el total de la comanda
-        self._calculate_total()
+        # Se suma uno a la cantidad con el precio con el que se agregó el producto
+        self._set_line(line, line.quantity + 1, int(price))
 
 
-    def _add_it_from_text_field(self, product_list_content: ft.Container, product: ft.Card, name: str, price: str) -> None:
+    def _add_it_from_text_field(self, product_list_content: ft.Container, product: ft.Card, product_id: int) -> None:
         """
         Función auxiliar para añadir una cantidad de un producto a la lista de productos.
 
         - Parámetros:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos.
             - :param:`product` (ft.Card): Producto a actualizar en la lista de productos.
-            - :param:`name` (str): Nombre del producto a actualizar.
-            - :param:`price` (str): Precio del producto a actualizar.
+            - :param:`product_id` (int): ID del producto a actualizar.
 
         - Regresa:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el índice del producto a actualizar, si no existe se asigna None
-        product_index: int | None = next(
-            (index for (index, product) in enumerate(self._product_list) if product.content.content.controls[1].content.value == name),
-            None
-        )
+        line: CartLine | None = self._lines.get(product_id)
 
-        # Se actualiza la cantidad del producto en la lista del producto y la
-        # tarjeta del producto en la lista de productos
-        if product_index is not None:
+        # Se actualiza la cantidad del producto con la escrita en su tarjeta
+        if line is not None:
             try:
                 new_quantity: int = int(product.content.content.controls[2].content.controls[1].value)
                 # Si la cantidad del producto a actualizar es menor a 1, se elimina el producto
                 if new_quantity < 1:
-                    self._delete_it(product_list_content, name)
+                    self._delete_it(product_list_content, product_id)
                 # Si la cantidad del producto a actualizar es mayor a 1, se actualiza la cantidad
                 else:
-                    self._quantity_ref_dict[name] = new_quantity
-                    product_list_content.content.controls[product_index].content.content.controls[2].content.controls[1].value = self._quantity_ref_dict[name]
-                    # Se actualiza el subtotal del producto
-                    subtotal: int = int(price) * self._quantity_ref_dict[name]
-                    product_list_content.content.controls[product_index].content.content.controls[3].content.value = f"${subtotal}"
+                    self._set_line(line, new_quantity, line.unit_price)
             except ValueError:
                 pass
 
-        # Se actualiza el total de la comanda
-        self._calculate_total()
-
 
-    def _reduce_quantity(self, product_list_content: ft.Container, name: str, price: str) -> None:
+    def _reduce_quantity(self, product_list_content: ft.Container, product_id: int) -> None:
         """
         Función auxiliar para reducir en uno un producto de la lista de productos.
 
         - Parámetros:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos.
-            - :param:`name` (str): Nombre del producto a actualizar.
-            - :param:`price` (str): Precio del producto a actualizar.
+            - :param:`product_id` (int): ID del producto a actualizar.
 
         - Regresa:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el índice del producto a actualizar, si no existe se asigna None
-        product_index: int | None = next(
-            (index for (index, product) in enumerate(self._product_list) if product.content.content.controls[1].content.value == name),
-            None
-        )
+        line: CartLine | None = self._lines.get(product_id)
 
-        if product_index is not None:
+        if line is not None:
             # Si la cantidad del producto a actualizar es mayor a 1, se reduce en uno
-            # la cantidad del producto en la lista y en la referencia de cantidades
-            if self._quantity_ref_dict[name] > 1:
-                self._quantity_ref_dict[name] -= 1
-                product_list_content.content.controls[product_index].content.content.controls[2].content.controls[1].value = self._quantity_ref_dict[name]
-                # Se actualiza el subtotal del producto
-                subtotal: int = int(price) * self._quantity_ref_dict[name]
-                product_list_content.content.controls[product_index].content.content.controls[3].content.value = f"${subtotal}"
+            if line.quantity > 1:
+                self._set_line(line, line.quantity - 1, line.unit_price)
             # Si la cantidad del producto a actualizar es igual a 1, se elimina el producto
-            # de la lista y de la referencia de cantidades
-            elif self._quantity_ref_dict[name] == 1:
-                self._delete_it(product_list_content, name)
+            else:
+                self._delete_it(product_list_content, product_id)
 
-        # Se actualiza el total de la comanda
-        self._calculate_total()
 
-
-    def _delete_it(self, product_list_content: ft.Container, name: str) -> None:
+    def _delete_it(self, product_list_content: ft.Container, product_id: int) -> None:
         """
         Función auxiliar para eliminar un producto de la lista de productos.
 
         - Parámetros:
             - :param:`product_list_content` (ft.Container): Contenedor de la lista de productos.
-            - :param:`name` (str): Nombre del producto a eliminar.
+            - :param:`product_id` (int): ID del producto a eliminar.
 
         - Regresa:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el índice del producto a eliminar, si no existe se asigna None
-        product_idx: int | None = next(
-            (idx for (idx, product) in enumerate(self._product_list) if product.content.content.controls[1].content.value == name),
-            None
-        )
+        line: CartLine | None = self._lines.pop(product_id, None)
 
-        if product_idx is not None:
-            # Se elimina el producto de la lista de productos, de la referencia de cantidades
-            # y del resumen de la comanda
-            self._product_list.pop(product_idx)
-            product_list_content.content.controls.pop(product_idx)
-            del self._quantity_ref_dict[name]
+        # Se elimina el producto del carrito y de su total; quitar la tarjeta del resumen de
+        # la comanda recorre la lista de controles
+        if line is not None:
+            self._total -= line.subtotal
+            product_list_content.content.controls.remove(line.card)
 
-        # Se actualiza el total de la comanda
-        self._calculate_total()
+
+    def ticket_card(self, product_id: int) -> ft.Card | None:
+        """
+        Regresa la tarjeta de un producto en el resumen de la comanda.
+
+        - Parámetros:
+            - :param:`product_id` (int): ID del producto.
+
+        - Regresa:
+            - :return:`card` (ft.Card | None): Tarjeta del producto, None si no está en la lista
+        """
+
+        line: CartLine | None = self._lines.get(product_id)
+
+        return None if line is None else line.card
+
+
+    def order_items(self) -> list[tuple[int, int, int]]:
+        """
+        Productos de la comanda en el formato de :method:`DBConnection.send_order_to_db`.
+
+        - Parámetros:
+            - No recibe parámetros.
+
+        - Regresa:
+            - :return:`items` (list[tuple[int, int, int]]): ID, cantidad y precio unitario de cada producto
+        """
+
+        return [(line.product_id, line.quantity, line.unit_price) for line in self._lines.values()]
+
+
+    def reprice(self, customer_type: CustomerType, total: ft.Container) -> None:
+        """
+        Cambia el tipo de cliente de la comanda y vuelve a tasar sus renglones.
+
+        Solo escribe los nuevos precios en las tarjetas y el total; no envía los cambios al
+        navegador, quien lo llama los envía junto con los precios del catálogo.
+
+        - Parámetros:
+            - :param:`customer_type` (CustomerType): Nuevo tipo de cliente.
+            - :param:`total` (ft.Container): Contenedor del total de la comanda.
+
+        - Regresa:
+            - No regresa ningún valor.
+        """
+
+        self.customer_type = customer_type
+
+        for line in self._lines.values():
+            if line.prices:
+                self._set_line(line, line.quantity, int(line.prices[customer_type]))
+
+        total.content.value = f"Total: ${self._total}"
 
 
+    @instrumentation.timed("cashier.add_to_list")
     def add_to_list(self, product_list_content: ft.Container, product: ft.Card, total: ft.Container) -> None:
         """
         Añade un producto a la lista de productos y lo muestra en el resumen de la comanda.
@@ -218,11 +239,11 @@ class ProductList:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el nombre del producto a agregar
-        name, price = self._get_product_atributes(product)
+        # Se obtiene el ID, el nombre y el precio del producto a agregar
+        product_id, name, price = self._get_product_atributes(product)
 
         # Se llama al método auxiliar para agregar el producto a la lista de productos
-        self._add_it(product_list_content, product, name, price)
+        self._add_it(product_list_content, product, product_id, name, price)
 
         # Se actualiza el total de la comanda
         total.content.value = f"Total: ${self._total}"
@@ -231,6 +252,7 @@ class ProductList:
         total.update()
 
 
+    @instrumentation.timed("cashier.add_from_text_field")
     def add_from_text_field(self, product_list_content: ft.Container, product: ft.Card, total: ft.Container) -> None:
         """
         Agrega la cantidad de un producto escrito en el cuadro de texto del contador en la tarjeta del producto.
@@ -245,11 +267,11 @@ class ProductList:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el nombre del producto a actualizar su cantidad
-        name, price = self._get_product_atributes(product)
+        # Se obtiene el ID del producto a actualizar su cantidad
+        product_id, _, _ = self._get_product_atributes(product)
 
         # Se llama al método auxiliar para agregar la cantidad del producto
-        self._add_it_from_text_field(product_list_content, product, name, price)
+        self._add_it_from_text_field(product_list_content, product, product_id)
 
         # Se actualiza el total de la comanda
         total.content.value = f"Total: ${self._total}"
@@ -258,6 +280,7 @@ class ProductList:
         total.update()
 
 
+    @instrumentation.timed("cashier.reduce_one")
     def reduce_one(self, product_list_content: ft.Container, product: ft.Card, total: ft.Container) -> None:
         """
         Reduce en uno la cantidad de un producto en la lista de productos y lo muestra en el resumen de la comanda.
@@ -271,11 +294,11 @@ class ProductList:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el nombre del producto a reducir
-        name, price = self._get_product_atributes(product)
+        # Se obtiene el ID del producto a reducir
+        product_id, _, _ = self._get_product_atributes(product)
 
         # Se llama al método auxiliar para reducir en uno la cantidad del producto
-        self._reduce_quantity(product_list_content, name, price)
+        self._reduce_quantity(product_list_content, product_id)
 
         # Se actualiza el total de la comanda
         total.content.value = f"Total: ${self._total}"
@@ -284,6 +307,7 @@ class ProductList:
         total.update()
 
 
+    @instrumentation.timed("cashier.delete")
     def delete(self, product_list_content: ft.Container, product: ft.Card, total: ft.Container) -> None:
         """
         Elimina un producto de la lista de productos y lo elimina del resumen de la comanda.
@@ -297,11 +321,11 @@ class ProductList:
             - No regresa ningún valor.
         """
 
-        # Se obtiene el nombre del producto a eliminar
-        name, _= self._get_product_atributes(product)
+        # Se obtiene el ID del producto a eliminar
+        product_id, _, _ = self._get_product_atributes(product)
 
         # Se llama al método auxiliar para eliminar el producto de la lista de productos
-        self._delete_it(product_list_content, name)
+        self._delete_it(product_list_content, product_id)
 
         # Se actualiza el total de la comanda
         total.content.value = f"Total: ${self._total}"
@@ -312,7 +336,7 @@ class ProductList:
 
     def clear(self) -> None:
         """
-        Limpia la lista de productos y la referencia de cantidades.
+        Limpia los renglones del carrito y el total.
 
         - Parámetros:
             - No recibe parámetros.
@@ -321,6 +345,5 @@ class ProductList:
             - No regresa ningún valor.
         """
 
-        self._product_list.clear()
-        self._quantity_ref_dict.clear()
+        self._lines.clear()
         self._total = 0
@@ -0,0 +1,143 @@
+
+import unicodedata
+from functools import lru_cache
+
+from other.product import Product
+
+
+class ProductSearch:
+    """
+    Índice de búsqueda de productos por nombre e ID.
+
+    Los nombres se normalizan sin acentos ni mayúsculas, así "cafe" encuentra "Café".
+    Las consultas de menos de tres caracteres se resuelven con un índice de prefijos de
+    palabras; las demás con un índice de trigramas, cuyos candidatos se confirman
+    buscando la consulta dentro del nombre. Los resultados de las consultas recientes se
+    guardan en una caché LRU.
+
+    Los resultados se ordenan por relevancia: nombre idéntico, nombre que empieza con la
+    consulta, palabra que empieza con la consulta y, al final, coincidencia en medio del nombre.
+    """
+
+    def __init__(self, products: list[Product], cache_size: int = 256) -> None:
+        """
+        Construye el índice de búsqueda.
+
+        Parámetros:
+            - :param:`products` (list[Product]): Productos del catálogo.
+            - :param:`cache_size` (int): Número de consultas recientes que se guardan en caché.
+        """
+
+        # Nombre normalizado y posición en el catálogo de cada producto
+        self._names: dict[int, str] = {}
+        self._order: dict[int, int] = {}
+        self._prefixes: dict[str, set[int]] = {}
+        self._trigrams: dict[str, set[int]] = {}
+
+        for position, product in enumerate(products):
+            product_id: int = int(product.id)
+            name: str = self.normalize(product.name)
+
+            self._names[product_id] = name
+            self._order[product_id] = position
+
+            # Prefijos de cada palabra del nombre y del ID
+            for word in name.split() + [str(product_id)]:
+                for end in range(1, len(word) + 1):
+                    self._prefixes.setdefault(word[:end], set()).add(product_id)
+
+            for trigram in self._split_trigrams(name):
+                self._trigrams.setdefault(trigram, set()).add(product_id)
+
+        # Caché de las consultas recientes
+        self.search = lru_cache(maxsize = cache_size)(self._search)
+
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normaliza un texto para compararlo sin acentos, mayúsculas ni espacios repetidos
+
+        Parámetros:
+            - :param:`text` (str): Texto a normalizar
+
+        Regresa:
+            - :return:`normalized` (str): Texto normalizado
+        """
+
+        decomposed: str = unicodedata.normalize("NFKD", str(text))
+        without_accents: str = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+        return " ".join(without_accents.casefold().split())
+
+
+    def _split_trigrams(self, text: str) -> set[str]:
+        """
+        Divide un texto en sus trigramas
+
+        Parámetros:
+            - :param:`text` (str): Texto normalizado
+
+        Regresa:
+            - :return:`trigrams` (set[str]): Trigramas del texto
+        """
+
+        return {text[idx:idx + 3] for idx in range(len(text) - 2)}
+
+
+    def _rank(self, product_id: int, query: str) -> tuple[int, int, int]:
+        """
+        Calcula la llave de orden de un producto que coincide con la consulta
+
+        Parámetros:
+            - :param:`product_id` (int): ID del producto.
+            - :param:`query` (str): Consulta normalizada.
+
+        Regresa:
+            - :return:`rank` (tuple[int, int, int]): Tipo de coincidencia, posición de la coincidencia
+            y posición del producto en el catálogo
+        """
+
+        name: str = self._names[product_id]
+        position: int = name.find(query)
+
+        if name == query or str(product_id) == query:
+            match_type: int = 0
+        elif position == 0:
+            match_type = 1
+        elif position > 0 and name[position - 1] == " ":
+            match_type = 2
+        else:
+            match_type = 3
+
+        return match_type, max(position, 0), self._order[product_id]
+
+
+    def _search(self, query: str) -> tuple[int, ...]:
+        """
+        Busca los productos que coinciden con la consulta, sin pasar por la caché
+
+        Parámetros:
+            - :param:`query` (str): Texto ingresado en la barra de búsqueda.
+
+        Regresa:
+            - :return:`product_ids` (tuple[int, ...]): IDs de los productos ordenados por relevancia
+        """
+
+        query = self.normalize(query)
+
+        # Sin consulta se muestran todos los productos en el orden del catálogo
+        if not query:
+            return tuple(sorted(self._names, key = self._order.__getitem__))
+
+        if len(query) < 3:
+            candidates: set[int] = self._prefixes.get(query, set())
+        else:
+            trigram_sets: list[set[int]] = [self._trigrams.get(trigram, set()) for trigram in self._split_trigrams(query)]
+            candidates = set.intersection(*sorted(trigram_sets, key = len))
+            # Los trigramas no garantizan el orden, se confirma la coincidencia en el nombre
+            candidates = {product_id for product_id in candidates if query in self._names[product_id]}
+            # El ID del producto también se puede buscar
+            candidates |= self._prefixes.get(query, set()) if query.isdigit() else set()
+
+        return tuple(sorted(candidates, key = lambda product_id: self._rank(product_id, query)))
@@ -1,6 +1,8 @@
 
 import pandas as pd
 
+from other.catalog_snapshot import CatalogSnapshot
+
 
 class ProductTable:
     """
@@ -19,6 +21,9 @@ class ProductTable:
 
     El archivo de Excel debe tener el nombre :file:`catalogo.xlsm` y debe estar en la raíz del proyecto.
 
+    La tabla se carga desde la copia binaria de :class:`CatalogSnapshot`, que solo vuelve a leer
+    el archivo de Excel cuando este cambia.
+
     Esta clase es de suma importancia pues es la base para el funcionamiento de la aplicación.
     """
 
@@ -33,12 +38,14 @@ class ProductTable:
             - No regresa ningún valor.
         """
 
-        self._table: pd.DataFrame = pd.DataFrame()
+        # La copia binaria ya tiene el índice por ID y los valores NaN reemplazados
+        snapshot: dict = CatalogSnapshot(spreadsheet_file).load()
 
-        self._table = pd.read_excel(spreadsheet_file)
-        self._table.set_index("ID", inplace = True)
-        # Previene que se muestren valores NaN en la tabla
-        self._table = self._table.fillna("")
+        self._table: pd.DataFrame = pd.DataFrame(
+            snapshot["data"],
+            columns = snapshot["columns"],
+            index = pd.Index(snapshot["index"], name = snapshot["index_name"])
+        )
 
 
     def get_table(self) -> pd.DataFrame:
@@ -0,0 +1,64 @@
+
+from datetime import datetime
+
+
+class SalesRollup:
+    """
+    Acumula ventas por día, hora y dimensión antes de sumarlas a la tabla ``sales_rollups``.
+
+    Cada orden suma su importe en una celda ``(día, hora, dimensión, etiqueta)`` por cada
+    dimensión: ``payment_method``, ``origin``, ``employee`` y ``total`` (con etiqueta vacía).
+    Las celdas de un lote de órdenes se agrupan aquí, así cada lote escribe como máximo una
+    fila por celda sin importar cuántas órdenes traiga.
+
+    El día se guarda como ``AAAA-MM-DD`` y la hora como entero de 0 a 23, a partir de la
+    columna ``created_at`` de las órdenes.
+    """
+
+    # Dimensiones de las celdas, ``total`` suma todas las órdenes
+    DIMENSIONS: tuple[str, ...] = ("payment_method", "origin", "employee", "total")
+
+    def __init__(self) -> None:
+        # Número de órdenes e importe por celda
+        self._cells: dict[tuple[str, int, str, str], list[int]] = {}
+
+
+    def add(self, created_at: datetime, total: int, payment_method: str, origin: str, employee: str) -> None:
+        """
+        Suma una orden a sus celdas
+
+        Parámetros:
+            - :param:`created_at` (datetime): Fecha y hora de la orden.
+            - :param:`total` (int): Importe de la orden.
+            - :param:`payment_method` (str): Método de pago.
+            - :param:`origin` (str): Origen de la orden.
+            - :param:`employee` (str): Empleado que atendió.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        day: str = created_at.strftime("%Y-%m-%d")
+
+        for dimension, label in zip(self.DIMENSIONS, (payment_method, origin, employee, "")):
+            cell: list[int] = self._cells.setdefault((day, created_at.hour, dimension, label), [0, 0])
+            cell[0] += 1
+            cell[1] += int(total)
+
+
+    def rows(self) -> list[tuple[str, int, str, str, int, int]]:
+        """
+        Celdas acumuladas listas para sumarse a la tabla ``sales_rollups``
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`rows` (list[tuple]): Filas ``(day, hour, dimension, label, orders, amount)``
+        """
+
+        return [(*key, orders, amount) for key, (orders, amount) in self._cells.items()]
+
+
+    def __len__(self) -> int:
+        return len(self._cells)
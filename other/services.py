@@ -0,0 +1,571 @@
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+from uuid import uuid4
+
+from other.product import Product
+from other.order_queue import OrderQueue
+from other.order_poller import OrderPoller
+from other.product_search import ProductSearch
+from other.product_table import ProductTable
+from other.db_connection import DBConnection
+from other.availability_feed import AvailabilityFeed
+from other.instrumentation import instrumentation
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class Services:
+    """
+    Servicios compartidos por las páginas de la aplicación: la conexión con la base de
+    datos, la cola de envío de comandas, la consulta de órdenes activas, el catálogo de
+    productos con sus existencias, el canal de disponibilidad y los empleados.
+
+    Importar los módulos de estilos no abre conexiones ni lee el catálogo. Cada servicio
+    se crea la primera vez que se necesita, y :method:`start` adelanta en segundo plano
+    las cargas lentas (empleados, órdenes activas, registro del catálogo) para que una
+    base de datos lenta no detenga el primer cuadro de la aplicación.
+
+    La duración de cada paso del arranque queda en :attr:`timings`, en segundos.
+    """
+
+    def __init__(self, catalog_path: str = "catalogo.xlsm") -> None:
+        """
+        Construye los servicios sin iniciar ninguno.
+
+        Parámetros:
+            - :param:`catalog_path` (str): Ruta del archivo de Excel con el catálogo de productos.
+        """
+
+        self._catalog_path: str = catalog_path
+        self._lock: Lock = Lock()
+        self._catalog_lock: Lock = Lock()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers = 3, thread_name_prefix = "services")
+        self._started: bool = False
+
+        self._db_connection: DBConnection | None = None
+        self._order_queue: OrderQueue | None = None
+        self._order_poller: OrderPoller | None = None
+        self._products: list[Product] | None = None
+        self._products_by_name: dict[str, Product] = {}
+        self._products_by_id: dict[int, Product] = {}
+        self._product_search: ProductSearch | None = None
+        self._availability_feed: AvailabilityFeed | None = None
+        # Última versión de existencias leída por :method:`refresh_stock` y la de cada producto
+        self._stock_version: int = 0
+        self._stock_versions: dict[int, int] = {}
+        # Existencias apartadas por las comandas de este proceso que aún no se guardan, por
+        # producto y por comanda junto con la función que recibe su rechazo
+        self._reserved: dict[int, int] = {}
+        self._reservations: dict[str, tuple[list[tuple[int, int]], Callable | None]] = {}
+        self._employees: Future | None = None
+
+        self.timings: dict[str, float] = {}
+
+
+    def _timed(self, step: str, function: Callable, *args) -> object:
+        """
+        Ejecuta una función y guarda su duración en :attr:`timings`
+
+        Parámetros:
+            - :param:`step` (str): Nombre del paso del arranque.
+            - :param:`function` (Callable): Función a ejecutar.
+
+        Regresa:
+            - :return:`result` (object): Resultado de la función
+        """
+
+        start: float = perf_counter()
+
+        try:
+            return function(*args)
+        finally:
+            self.timings[step] = perf_counter() - start
+            logger.info("%s: %.3f s", step, self.timings[step])
+
+
+    def _submit(self, step: str, function: Callable, *args) -> Future:
+        """
+        Ejecuta una función en segundo plano, registrando su duración y sus errores
+
+        Parámetros:
+            - :param:`step` (str): Nombre del paso del arranque.
+            - :param:`function` (Callable): Función a ejecutar.
+
+        Regresa:
+            - :return:`future` (Future): Resultado pendiente de la función
+        """
+
+        future: Future = self._executor.submit(self._timed, step, function, *args)
+        future.add_done_callback(
+            lambda done: done.exception() and logger.warning("%s falló: %r", step, done.exception())
+        )
+
+        return future
+
+
+    def db_connection(self) -> DBConnection:
+        """
+        Conexión compartida con la base de datos, se crea la primera vez que se solicita
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`db_connection` (DBConnection): Conexión con la base de datos
+        """
+
+        with self._lock:
+            if self._db_connection is None:
+                self._db_connection = DBConnection()
+
+            return self._db_connection
+
+
+    def order_queue(self) -> OrderQueue:
+        """
+        Cola de envío de comandas, se inicia la primera vez que se solicita
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`order_queue` (OrderQueue): Cola de envío de comandas
+        """
+
+        db_connection: DBConnection = self.db_connection()
+
+        with self._lock:
+            if self._order_queue is None:
+                self._order_queue = OrderQueue(db_connection)
+                self._order_queue.on_flushed(self._orders_flushed)
+                self._order_queue.on_rejected(self._order_rejected)
+                self._order_queue.start()
+                instrumentation.add_gauge("order_queue_depth", lambda: self._order_queue.depth)
+
+            return self._order_queue
+
+
+    def order_poller(self) -> OrderPoller:
+        """
+        Consulta periódica de las órdenes activas, se inicia la primera vez que se solicita
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`order_poller` (OrderPoller): Consulta de órdenes compartida por las pantallas del SCD
+        """
+
+        db_connection: DBConnection = self.db_connection()
+
+        with self._lock:
+            if self._order_poller is None:
+                self._order_poller = OrderPoller(db_connection)
+                self._order_poller.start()
+                instrumentation.add_gauge("order_poller_subscribers", lambda: self._order_poller.subscribers)
+
+            return self._order_poller
+
+
+    def availability_feed(self) -> AvailabilityFeed:
+        """
+        Canal de disponibilidad para los canales de entrega, se crea la primera vez que se solicita
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`availability_feed` (AvailabilityFeed): Canal de disponibilidad de productos
+        """
+
+        db_connection: DBConnection = self.db_connection()
+
+        with self._lock:
+            if self._availability_feed is None:
+                self._availability_feed = AvailabilityFeed(db_connection)
+
+            return self._availability_feed
+
+
+    def products(self) -> list[Product]:
+        """
+        Productos del catálogo, se leen del archivo de Excel la primera vez que se solicitan
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`products` (list[Product]): Productos del catálogo
+        """
+
+        with self._catalog_lock:
+            if self._products is None:
+                self._products = self._timed("catalog", self._load_products)
+                self._products_by_name = {product.name : product for product in self._products}
+                self._products_by_id = {int(product.id) : product for product in self._products}
+
+            return self._products
+
+
+    def products_by_name(self) -> dict[str, Product]:
+        """
+        Productos del catálogo indexados por nombre
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`products_by_name` (dict[str, Product]): Productos por nombre
+        """
+
+        self.products()
+
+        return self._products_by_name
+
+
+    def products_by_id(self) -> dict[int, Product]:
+        """
+        Productos del catálogo indexados por ID
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`products_by_id` (dict[int, Product]): Productos por ID
+        """
+
+        self.products()
+
+        return self._products_by_id
+
+
+    def product_search(self) -> ProductSearch:
+        """
+        Índice de búsqueda sobre los productos del catálogo, compartido por todas las sesiones
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`product_search` (ProductSearch): Índice de búsqueda de productos
+        """
+
+        products: list[Product] = self.products()
+
+        with self._catalog_lock:
+            if self._product_search is None:
+                self._product_search = self._timed("product_search", ProductSearch, products)
+
+            return self._product_search
+
+
+    def _load_products(self) -> list[Product]:
+        """
+        Lee el catálogo de productos del archivo de Excel
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`products` (list[Product]): Productos del catálogo
+        """
+
+        product_table = ProductTable(self._catalog_path).get_table()
+        products: list[Product] = []
+
+        for index, row in product_table.iterrows():
+            product: Product = Product(
+                index,
+                row["Nombre"],
+                row["Precio"],
+                row["Precio empleado"],
+                row["Precio socio"],
+                row["Cantidad"],
+                row["Imagen"],
+                row["Información adicional"]
+            )
+            products.append(product)
+
+        return products
+
+
+    def _load_employees(self) -> list[str]:
+        """
+        Obtiene los nombres de los empleados activos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`employees` (list[str]): Nombres de los empleados activos
+        """
+
+        return list(self.db_connection().get_employees())
+
+
+    def _sync_products(self) -> None:
+        """
+        Registra el catálogo en la base de datos y lee sus existencias
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self.db_connection().sync_products(self.products())
+        self.refresh_stock()
+
+
+    def refresh_stock(self) -> None:
+        """
+        Lee de la base de datos las existencias que cambiaron y las escribe en los productos del catálogo
+
+        Solo se leen los productos con una versión de existencias mayor a la última leída, así
+        las ventas de otras cajas y de otros procesos llegan sin leer el catálogo completo. A
+        cada producto se le restan las existencias apartadas por las comandas de este proceso
+        que aún no se guardan, y una lectura con una versión que ya se aplicó se ignora, así
+        una consulta lenta no regresa un producto a un valor anterior.
+
+        Los productos son los mismos objetos en todas las sesiones, así cada caja ve las
+        existencias en cuanto vuelve a mostrar sus tarjetas.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        changes: dict[str] = self.db_connection().get_availability_changes(self._stock_version)
+        products_by_id: dict[int, Product] = self.products_by_id()
+
+        with self._catalog_lock:
+            for row in changes["products"]:
+                product: Product | None = products_by_id.get(row["id"])
+
+                if product is None or row["version"] <= self._stock_versions.get(row["id"], -1):
+                    continue
+
+                product.quantity = "" if row["stock"] is None else row["stock"] - self._reserved.get(row["id"], 0)
+                self._stock_versions[row["id"]] = row["version"]
+
+            self._stock_version = max(self._stock_version, changes["version"])
+
+
+    def submit_order(self, order: dict[str], on_rejected: Callable[[dict, Exception], None] | None = None) -> str:
+        """
+        Aparta las existencias de una comanda en el catálogo y la agrega a la cola de envío
+
+        El apartado muestra los productos agotados en todas las sesiones sin esperar a la base
+        de datos. Cuando la cola guarda la comanda el apartado se libera y se leen las existencias
+        de la base de datos, que ya incluyen la venta; si la base de datos la rechaza por falta de
+        existencias o la cola la descarta por un error que no se puede reintentar, el apartado se
+        devuelve y se llama a :attr:`on_rejected` desde el hilo de envío.
+
+        Parámetros:
+            - :param:`order` (dict[str]): Comanda con el formato de :method:`DBConnection.send_order_to_db`.
+            - :param:`on_rejected` (Callable[[dict, Exception], None] | None): Función que recibe
+              la comanda y el error si se rechaza.
+
+        Regresa:
+            - :return:`submission_id` (str): Identificador único de la comanda
+        """
+
+        order = {**order, "submission_id" : order.get("submission_id") or uuid4().hex}
+        self._reserve_stock(order["submission_id"], order["items"], on_rejected)
+
+        try:
+            return self.order_queue().submit(order)
+        except Exception:
+            self._release_stock(order["submission_id"], restore = True)
+            raise
+
+
+    def _reserve_stock(self, submission_id: str, items: list[tuple[int, int, int]],
+                       on_rejected: Callable[[dict, Exception], None] | None) -> None:
+        """
+        Descuenta de los productos del catálogo lo pedido en una comanda y lo registra como apartado
+
+        Parámetros:
+            - :param:`submission_id` (str): Identificador único de la comanda.
+            - :param:`items` (list[tuple[int, int, int]]): ID, cantidad y precio unitario de cada producto.
+            - :param:`on_rejected` (Callable[[dict, Exception], None] | None): Función que recibe el rechazo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        products_by_id: dict[int, Product] = self.products_by_id()
+        reserved: list[tuple[int, int]] = []
+
+        with self._catalog_lock:
+            for product_id, quantity, _unit_price in items:
+                product: Product | None = products_by_id.get(int(product_id))
+
+                if product is not None and product.stock is not None:
+                    product.quantity = product.stock - int(quantity)
+                    self._reserved[product.id] = self._reserved.get(product.id, 0) + int(quantity)
+                    reserved.append((product.id, int(quantity)))
+
+            self._reservations[submission_id] = (reserved, on_rejected)
+
+
+    def _release_stock(self, submission_id: str, restore: bool) -> Callable | None:
+        """
+        Libera el apartado de una comanda, devolviendo o no sus existencias a los productos
+
+        Parámetros:
+            - :param:`submission_id` (str): Identificador único de la comanda.
+            - :param:`restore` (bool): Verdadero si la comanda no se guardó y sus existencias regresan.
+
+        Regresa:
+            - :return:`on_rejected` (Callable | None): Función que recibe el rechazo de la comanda, nula
+              si no tiene o si la comanda no se apartó en este proceso
+        """
+
+        products_by_id: dict[int, Product] = self.products_by_id()
+
+        with self._catalog_lock:
+            reservation: tuple[list[tuple[int, int]], Callable | None] | None = self._reservations.pop(submission_id, None)
+
+            # Las comandas recuperadas del diario no se apartaron en este proceso
+            if reservation is None:
+                return None
+
+            for product_id, quantity in reservation[0]:
+                self._reserved[product_id] -= quantity
+                product: Product = products_by_id[product_id]
+
+                if restore and product.stock is not None:
+                    product.quantity = product.stock + quantity
+
+            return reservation[1]
+
+
+    def _orders_flushed(self, batch: list[dict]) -> None:
+        """
+        Libera el apartado de las comandas guardadas y lee las existencias que ya incluyen la venta
+
+        Se llama desde el hilo de la cola de envío.
+
+        Parámetros:
+            - :param:`batch` (list[dict]): Comandas guardadas.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        for order in batch:
+            self._release_stock(order["submission_id"], restore = False)
+
+        self._submit("refresh_stock", self.refresh_stock)
+
+
+    def _order_rejected(self, order: dict, error: Exception) -> None:
+        """
+        Devuelve el apartado de una comanda rechazada o descartada y avisa a la caja que la envió
+
+        Se llama desde el hilo de la cola de envío.
+
+        Parámetros:
+            - :param:`order` (dict): Comanda rechazada.
+            - :param:`error` (Exception): Error de la comanda, :class:`OutOfStockError` si faltaron existencias.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        on_rejected: Callable | None = self._release_stock(order["submission_id"], restore = True)
+        self._submit("refresh_stock", self.refresh_stock)
+
+        if on_rejected is not None:
+            on_rejected(order, error)
+
+
+    def _load_initial_orders(self) -> None:
+        """
+        Hace la primera consulta de las órdenes activas, antes de que se abra el tablero de órdenes
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self.order_poller().poll()
+
+
+    def start(self) -> None:
+        """
+        Inicia en segundo plano las cargas lentas, sin esperar a que terminen
+
+        Puede llamarse varias veces, solo la primera tiene efecto.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self._employees = self._submit("employees", self._load_employees)
+        self._submit("initial_orders", self._load_initial_orders)
+        self._submit("sync_products", self._sync_products)
+        self._submit("order_queue", self.order_queue)
+
+
+    def on_employees(self, callback: Callable[[list[str]], None]) -> None:
+        """
+        Llama a una función con los empleados activos en cuanto estén disponibles
+
+        Si la consulta falla la función no se llama y el error queda en el registro.
+
+        Parámetros:
+            - :param:`callback` (Callable[[list[str]], None]): Función que recibe los nombres
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self.start()
+        self._employees.add_done_callback(lambda done: done.exception() is None and callback(done.result()))
+
+
+    def shutdown(self) -> None:
+        """
+        Vacía la cola de envío y cierra las conexiones con la base de datos
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        if self._availability_feed is not None:
+            self._availability_feed.stop()
+        if self._order_poller is not None:
+            self._order_poller.stop()
+        if self._order_queue is not None:
+            self._order_queue.stop()
+        if self._db_connection is not None:
+            self._db_connection.close()
+
+        self._executor.shutdown(wait = False)
+
+
+# Servicios compartidos por todas las sesiones del proceso
+services: Services = Services()
@@ -0,0 +1,184 @@
+
+from math import ceil
+from threading import Lock
+from typing import Callable, Sequence
+
+import flet as ft
+
+
+class VirtualGrid:
+    """
+    Cuadrícula virtualizada sobre un :class:`ft.ListView`.
+
+    Solo existen en la página las filas visibles más unas cuantas de reserva arriba y abajo.
+    Dos espaciadores ocupan la altura de las filas que no se muestran, así la barra de
+    desplazamiento corresponde a la cuadrícula completa. Al desplazarse, las mismas filas se
+    reciclan con las celdas de su nueva posición y las celdas se piden a :attr:`build_cell`
+    solo cuando entran a la ventana, por lo que el primer despliegue no depende del número
+    de elementos.
+
+    Todas las filas miden :attr:`row_height`, incluida la separación entre filas. En una
+    cuadrícula horizontal las filas son columnas que se recorren de izquierda a derecha y
+    :attr:`row_height` es su ancho.
+    """
+
+    def __init__(self, build_cell: Callable[[object, int], ft.Control], columns: int, row_height: int,
+                 viewport_height: int, overscan: int = 2, horizontal: bool = False, **list_view_properties) -> None:
+        """
+        Construye la cuadrícula vacía.
+
+        Parámetros:
+            - :param:`build_cell` (Callable[[object, int], ft.Control]): Regresa el control de un
+              elemento, recibe el elemento y el índice de su fila.
+            - :param:`columns` (int): Elementos por fila.
+            - :param:`row_height` (int): Altura de cada fila, incluida la separación, o su ancho
+              si la cuadrícula es horizontal.
+            - :param:`viewport_height` (int): Altura visible de la cuadrícula, o su ancho visible
+              si es horizontal.
+            - :param:`overscan` (int): Filas de reserva arriba y abajo de las visibles.
+            - :param:`horizontal` (bool): Verdadero para desplazar la cuadrícula de izquierda a derecha.
+            - :param:`list_view_properties` (dict): Propiedades de estilo del :class:`ft.ListView`.
+        """
+
+        self._build_cell: Callable[[object, int], ft.Control] = build_cell
+        self._columns: int = columns
+        self._row_height: int = row_height
+        self._overscan: int = overscan
+        self._horizontal: bool = horizontal
+        # Propiedad de los contenedores que mide su tamaño en la dirección del desplazamiento
+        self._extent: str = "width" if horizontal else "height"
+        self._items: Sequence = []
+        self._first_row: int = 0
+        self._lock: Lock = Lock()
+
+        # Espaciadores que ocupan la altura de las filas que no están en la página
+        self._top_spacer: ft.Container = ft.Container(**{self._extent : 0})
+        self._bottom_spacer: ft.Container = ft.Container(**{self._extent : 0})
+
+        self.list_view: ft.ListView = ft.ListView(
+            horizontal = horizontal,
+            spacing = 0,
+            on_scroll_interval = 50,
+            on_scroll = self._on_scroll,
+            controls = [self._top_spacer, self._bottom_spacer],
+            **list_view_properties
+        )
+
+        # Filas reutilizables de la ventana, van entre los espaciadores
+        self._rows: list[ft.Container] = []
+        self._resize(viewport_height)
+
+
+    def _resize(self, viewport_height: float) -> bool:
+        """
+        Ajusta el número de filas de la ventana a la altura visible
+
+        Parámetros:
+            - :param:`viewport_height` (float): Altura visible de la cuadrícula.
+
+        Regresa:
+            - :return:`resized` (bool): Verdadero si se agregaron filas
+        """
+
+        needed: int = ceil(viewport_height / self._row_height) + 1 + 2 * self._overscan
+
+        if needed <= len(self._rows):
+            return False
+
+        # Las celdas de una fila van lado a lado, en una cuadrícula horizontal van una sobre otra
+        new_rows: list[ft.Container] = [
+            ft.Container(
+                content = ft.Column(spacing = 1) if self._horizontal else ft.Row(spacing = 1),
+                **{self._extent : self._row_height}
+            )
+            for _ in range(needed - len(self._rows))
+        ]
+        self._rows.extend(new_rows)
+        self.list_view.controls[-1:-1] = new_rows
+
+        return True
+
+
+    @property
+    def row_count(self) -> int:
+        """
+        Número de filas de la cuadrícula completa
+        """
+
+        return ceil(len(self._items) / self._columns)
+
+
+    def _render(self, first_row: int) -> None:
+        """
+        Llena las filas de la ventana a partir de una fila de la cuadrícula
+
+        Parámetros:
+            - :param:`first_row` (int): Índice de la primera fila de la ventana.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._first_row = first_row
+        row_count: int = self.row_count
+
+        for offset, row in enumerate(self._rows):
+            row_index: int = first_row + offset
+            start: int = row_index * self._columns
+
+            # Las filas que quedan fuera de la cuadrícula se ocultan
+            row.visible = row_index < row_count
+            row.content.controls = [
+                self._build_cell(item, row_index) for item in self._items[start:start + self._columns]
+            ] if row.visible else []
+
+        shown: int = max(0, min(len(self._rows), row_count - first_row))
+        setattr(self._top_spacer, self._extent, first_row * self._row_height)
+        setattr(self._bottom_spacer, self._extent, max(0, row_count - first_row - shown) * self._row_height)
+
+
+    def set_items(self, items: Sequence, keep_position: bool = False) -> None:
+        """
+        Reemplaza los elementos de la cuadrícula, sin enviar los cambios al navegador
+
+        Parámetros:
+            - :param:`items` (Sequence): Elementos de la cuadrícula en orden.
+            - :param:`keep_position` (bool): Verdadero para conservar la posición del desplazamiento,
+              falso para regresar al inicio.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            self._items = items
+            first_row: int = max(0, min(self._first_row, self.row_count - len(self._rows))) if keep_position else 0
+            self._render(first_row)
+
+        if not keep_position and self.list_view.page is not None:
+            self.list_view.scroll_to(offset = 0)
+
+
+    def _on_scroll(self, event: ft.OnScrollEvent) -> None:
+        """
+        Recorre la ventana cuando el desplazamiento cambia la primera fila visible
+
+        Parámetros:
+            - :param:`event` (ft.OnScrollEvent): Evento de desplazamiento de la lista.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            resized: bool = self._resize(event.viewport_dimension or 0)
+            visible_row: int = int(max(0.0, event.pixels) // self._row_height)
+            first_row: int = max(0, min(visible_row - self._overscan, self.row_count - len(self._rows)))
+
+            if first_row == self._first_row and not resized:
+                return
+
+            self._render(first_row)
+
+        if self.list_view.page is not None:
+            self.list_view.update()
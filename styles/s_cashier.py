@@ -3,126 +3,129 @@ import flet as ft
 
 from styles.styles import Styles
 from other.product import Product
+from other.out_of_stock_error import OutOfStockError
+from other.services import services
 from other.product_list import ProductList
-from other.product_card import ProductCard
-from other.product_table import ProductTable
-from other.db_connection import DBConnection
-
-
-# Conexión con la base de datos
-db_connection: DBConnection = DBConnection()
-# Lista de empleados
-employees: list[str] = db_connection.get_employees()
-# Convierte los empleados en opciones para el dropdown
-for idx, employee in enumerate(employees):
-    employees[idx] = ft.dropdown.Option(employee)
-
-
-# Tabla de productos
-product_table: ProductTable = ProductTable("catalogo.xlsm").get_table()
-products: list[Product] = []
-
-for index, row in product_table.iterrows():
-    product: Product = Product(
-        index,
-        row["Nombre"],
-        row["Precio"],
-        row["Precio empleado"],
-        row["Precio socio"],
-        row["Cantidad"],
-        row["Imagen"],
-        row["Información adicional"]
-    )
-    products.append(product)
+from other.customer_type import CustomerType
+from other.hover_effect import HoverEffect
+from other.virtual_grid import VirtualGrid
+from other.instrumentation import instrumentation
+from other.product_card_cache import ProductCardCache
 
 
 # Propiedades de estilo de la página de caja, se obtienen de la clase
 # Styles del archivo styles.py
 styles: dict[str] = Styles.cashier_styles()
 
-# Selector de empleado en caja
-_employee_selector_content: ft.Dropdown = ft.Dropdown(
-    value = "",
-    label = "Atiende:",
-    label_style = ft.TextStyle(
-        font_family = styles["employee_selector"]["font"],
-        size = styles["employee_selector"]["label_font_size"],
-        color = styles["employee_selector"]["font_color"],
-    ),
-    text_style = ft.TextStyle(
-        font_family = styles["employee_selector"]["font"],
-        size = styles["employee_selector"]["text_font_size"],
-        color = styles["employee_selector"]["font_color"],
-    ),
-    options = employees,
-    border_radius = styles["employee_selector"]["border_radius"],
-    bgcolor = styles["employee_selector"]["bgcolor"],
-    border_color = styles["employee_selector"]["border_color"],
-    focused_bgcolor = styles["employee_selector"]["bgcolor"],
-    focused_border_color = styles["employee_selector"]["border_color"],
-)
-
-# Nombre del cliente
-_customer_name_text_field: ft.TextField = ft.TextField(
-    label = "Nombre del cliente",
-    label_style = ft.TextStyle(
-        font_family = styles["title"]["font"],
-        color = styles["title"]["font_color"],
-    ),
-    text_style = ft.TextStyle(
-        font_family = styles["title"]["font_customer"],
-        size = styles["title"]["font_size_customer"],
-        color = styles["title"]["font_color"],
-    ),
-    border_color = styles["title"]["text_field_border_color"],
-    border_radius = styles["title"]["text_field_border_radius"],
-    text_align = ft.TextAlign.START,
-)
-
-# Lista de productos que se mostrarán en el resumen de la comanda
-_product_list: ProductList = ProductList()
-
-# Contenedor de la lista de productos que se mostrarán en el resumen de la comanda
-# Se crea de manera global para poder acceder a él desde la clase ProductList
-_on_screen_product_list: ft.Container = ft.Container(
-    width = styles["product_list"]["width"],
-    height = styles["product_list"]["height"],
-    content = ft.Column(
-        alignment = ft.MainAxisAlignment.CENTER,
-        scroll = True
-    )
-)
-
-# Total de la compra
-_total: ft.Container = ft.Container(
-    alignment = ft.alignment.center,
-    content = ft.Text(
-        f"Total: ${_product_list._total}",
-        width = styles["card"]["width"],
-        height = 60,
-        font_family = styles["total"]["font"],
-        size = styles["total"]["font_size"],
-        color = styles["total"]["font_color"],
-        weight = ft.FontWeight.W_300,
-        text_align = ft.TextAlign.CENTER
-    )
-)
-
-# Objeto de la clase ft.ListView para contener los productos del catálogo
-_list_view: ft.ListView = ft.ListView(
-    spacing = styles["catalog"]["spacing"],
-    width = styles["catalog"]["width_list"],
-    height = styles["catalog"]["height"],
-    key = "Cliente"
-)
+# Tarjetas del catálogo que cada sesión conserva construidas, las demás se construyen al mostrarse
+CATALOG_CARD_CACHE_SIZE: int = 512
+
+# Efecto de los botones al pasar el cursor sobre ellos
+_button_hover: HoverEffect = HoverEffect(border = ft.border.all(3, "#F4FF2B"), rest_border = ft.border.all(3, "#00000000"))
 
 
 class SCashier:
     """
     Propiedades de los controles utilizados por la función :function:`Cashier`
     del archivo :file:`cashier.py` para la creación de la página de caja.
+
+    Cada instancia es una sesión de caja: la comanda, el total, el nombre del cliente,
+    quién atiende y el catálogo con su tipo de cliente y búsqueda son propios de cada
+    terminal. El catálogo de productos, el índice de búsqueda y los empleados se leen
+    de :data:`services` y se comparten entre todas las sesiones del proceso.
     """
 
+    def __init__(self) -> None:
+        # Selector de empleado en caja
+        self._employee_selector_content: ft.Dropdown = ft.Dropdown(
+            value = "",
+            label = "Atiende:",
+            label_style = ft.TextStyle(
+                font_family = styles["employee_selector"]["font"],
+                size = styles["employee_selector"]["label_font_size"],
+                color = styles["employee_selector"]["font_color"],
+            ),
+            text_style = ft.TextStyle(
+                font_family = styles["employee_selector"]["font"],
+                size = styles["employee_selector"]["text_font_size"],
+                color = styles["employee_selector"]["font_color"],
+            ),
+            # Las opciones se llenan en cuanto la consulta de empleados termina
+            options = [],
+            border_radius = styles["employee_selector"]["border_radius"],
+            bgcolor = styles["employee_selector"]["bgcolor"],
+            border_color = styles["employee_selector"]["border_color"],
+            focused_bgcolor = styles["employee_selector"]["bgcolor"],
+            focused_border_color = styles["employee_selector"]["border_color"],
+        )
+
+        # Nombre del cliente
+        self._customer_name_text_field: ft.TextField = ft.TextField(
+            label = "Nombre del cliente",
+            label_style = ft.TextStyle(
+                font_family = styles["title"]["font"],
+                color = styles["title"]["font_color"],
+            ),
+            text_style = ft.TextStyle(
+                font_family = styles["title"]["font_customer"],
+                size = styles["title"]["font_size_customer"],
+                color = styles["title"]["font_color"],
+            ),
+            border_color = styles["title"]["text_field_border_color"],
+            border_radius = styles["title"]["text_field_border_radius"],
+            text_align = ft.TextAlign.START,
+        )
+
+        # Lista de productos que se mostrarán en el resumen de la comanda
+        self._product_list: ProductList = ProductList()
+
+        # Contenedor de la lista de productos que se mostrarán en el resumen de la comanda
+        self._on_screen_product_list: ft.Container = ft.Container(
+            width = styles["product_list"]["width"],
+            height = styles["product_list"]["height"],
+            content = ft.Column(
+                alignment = ft.MainAxisAlignment.CENTER,
+                scroll = True
+            )
+        )
+
+        # Total de la compra
+        self._total: ft.Container = ft.Container(
+            alignment = ft.alignment.center,
+            content = ft.Text(
+                f"Total: ${self._product_list._total}",
+                width = styles["card"]["width"],
+                height = 60,
+                font_family = styles["total"]["font"],
+                size = styles["total"]["font_size"],
+                color = styles["total"]["font_color"],
+                weight = ft.FontWeight.W_300,
+                text_align = ft.TextAlign.CENTER
+            )
+        )
+
+        # Caché de tarjetas del catálogo por producto y paridad de la fila
+        # Las tarjetas agregan productos a la comanda de esta sesión, por lo que no se comparten
+        self._card_cache: ProductCardCache = ProductCardCache(
+            self._on_screen_product_list, self._product_list, self._total, CATALOG_CARD_CACHE_SIZE
+        )
+
+        # Cuadrícula virtualizada del catálogo, 4 productos por fila, solo construye las
+        # tarjetas de las filas visibles
+        self._catalog_grid: VirtualGrid = VirtualGrid(
+            self._catalog_cell,
+            columns = 4,
+            row_height = styles["catalog"]["row_height"],
+            viewport_height = styles["catalog"]["height"],
+            width = styles["catalog"]["width_list"],
+            height = styles["catalog"]["height"],
+        )
+        # Objeto de la clase ft.ListView que contiene las filas del catálogo
+        self._list_view: ft.ListView = self._catalog_grid.list_view
+        # Texto de la búsqueda en curso
+        self._search_query: str = ""
+
+
     def _button_on_hover(self, _: ft.HoverEvent, button: ft.Container) -> None:
         """
         Permite al botón elevarse al pasar el cursor sobre él
@@ -135,18 +138,30 @@ class SCashier:
             - No regresa ningún valor.
         """
 
-        if _.data == "true":
-            button.border = ft.border.all(3, "#F4FF2B")
-            button.update()
+        _button_hover.apply(_, button)
 
-        else:
-            button.border = ft.border.all(3, "#00000000")
-            button.update()
+
+    def _catalog_cell(self, product: Product, row_index: int) -> ft.Card:
+        """
+        Tarjeta de un producto del catálogo, la pide la cuadrícula cuando su fila entra a la vista
+
+        Parámetros:
+            - :param:`product` (Product): Producto de la tarjeta.
+            - :param:`row_index` (int): Fila de la tarjeta, se alterna el color de fondo de las filas.
+
+        Regresa:
+            - :return:`card` (ft.Card): Tarjeta del producto
+        """
+
+        return self._card_cache.get(product, row_index % 2 != 0)
 
 
     def _build_catalog(self) -> None:
         """
-        Construye el catálogo de productos
+        Construye el catálogo de productos con los productos que coinciden con la búsqueda en curso
+
+        La cuadrícula solo construye las filas visibles, el resto se construye al desplazarse,
+        y las tarjetas se toman de la caché de tarjetas.
 
         Parámetros:
             - No recibe parámetros.
@@ -155,34 +170,16 @@ class SCashier:
             - No regresa ningún valor.
         """
 
-        _counter: int = 0
-        _row_counter: int = 0
+        products_by_id: dict[int, Product] = services.products_by_id()
 
-        # Se recorre la lista de productos y se agregan a la lista de productos
-        for row in range(len(products)):
-            list_row = ft.Row(spacing = 1)
-            # Se agregan 4 productos por fila
-            for product in range(4):
-                try:
-                    # Se alterna el color de fondo de las filas
-                    is_odd_row: bool = _row_counter % 2 != 0
-                    # Se crea la tarjeta del producto
-                    product_card: ft.Card = ProductCard(products[_counter]).build_card(
-                        is_odd_row, _on_screen_product_list, _product_list, _total, _list_view.key
-                    )
-                    # Se agregan los productos a la lista de productos y aumenta el contador
-                    list_row.controls.append(product_card)
-                    _counter += 1
+        # Se obtienen los IDs de los productos que coinciden desde el índice de búsqueda,
+        # ordenados por relevancia
+        matches: tuple[int, ...] = services.product_search().search(self._search_query)
 
-                # Si se llega al final de la lista de productos, se termina el ciclo
-                except IndexError:
-                    break
-
-            # Se agregan las filas a la lista de productos
-            _list_view.controls.append(list_row)
-            _row_counter += 1
+        self._catalog_grid.set_items([products_by_id[product_id] for product_id in matches])
 
 
+    @instrumentation.timed("cashier.show_products")
     def _show_products(self, _: ft.ControlEvent, query: str) -> None:
         """
         Muestra los productos en el catálogo de productos
@@ -199,64 +196,40 @@ class SCashier:
             - No regresa ningún valor.
         """
 
-        # Se limpia la lista de productos
-        _list_view.controls.clear()
-
-        _counter: int = 0
-        _row_counter: int = 0
-
-        # Se recorre la lista de productos y se agregan a la lista de productos
-        for row in range(len(products)):
-            list_row = ft.Row(spacing = 1)
-            # Se agregan 4 productos por fila
-            for product in range(4):
-                try:
-                    # Se alterna el color de fondo de las filas
-                    is_odd_row: bool = _row_counter % 2 != 0
-                    # Se crea la tarjeta del producto
-                    product_card: ft.Card = ProductCard(products[_counter]).build_card(
-                        is_odd_row, _on_screen_product_list, _product_list, _total, _list_view.key
-                    )
-                    # Se agregan los productos a la lista de productos solo si coinciden
-                    # con el texto ingresado
-                    if query.capitalize() in products[_counter].name:
-                        list_row.controls.append(product_card)
-                    _counter += 1
-
-                # Si se llega al final de la lista de productos, se termina el ciclo
-                except IndexError:
-                    break
-
-            # Se agregan las filas a la lista de productos
-            _list_view.controls.append(list_row)
-            _row_counter += 1
+        self._search_query = query
+
+        # La cuadrícula regresa al inicio con los productos que coinciden
+        self._build_catalog()
 
         # Se actualiza la lista de productos
-        _list_view.update()
+        self._list_view.update()
 
 
-    def _apply_customer_type_discount(self, _: ft.ControlEvent, customer_type: str) -> None:
+    @instrumentation.timed("cashier.apply_customer_type")
+    def _apply_customer_type_discount(self, _: ft.ControlEvent, customer_type: CustomerType) -> None:
         """
-        Aplica el descuento correspondiente al tipo de cliente y actualiza el catálogo de productos
+        Aplica el descuento correspondiente al tipo de cliente al catálogo y a la comanda en curso
+
+        Solo cambian los textos de los precios y los renglones de la comanda; las tarjetas,
+        las filas y la búsqueda en curso se conservan. Todos los cambios se envían al navegador
+        en un solo mensaje.
 
         Parámetros:
             - :param:`_` (ft.ControlEvent): Evento de cambio en el tipo de cliente.
-            - :param:`customer_type` (str): Tipo de cliente.
+            - :param:`customer_type` (CustomerType): Tipo de cliente.
 
         Regresa:
             - No regresa ningún valor.
         """
 
-        # Se limpia la lista de productos y se actualiza el tipo de cliente
-        _list_view.controls.clear()
-        _list_view.key = customer_type
+        # Se vuelve a tasar la comanda con los precios del tipo de cliente
+        self._product_list.reprice(customer_type, self._total)
 
-        # Se aplica el descuento correspondiente al tipo de cliente y 
-        # se muestran los nuevos precios
-        self._build_catalog()
+        # Se muestran los nuevos precios en las tarjetas del catálogo
+        self._card_cache.show_prices(customer_type)
 
-        # Se actualiza la lista de productos
-        _list_view.update()
+        if self._list_view.page is not None:
+            self._list_view.page.update(self._list_view, self._on_screen_product_list, self._total)
 
 
     def _clear_order_summary(self) -> None:
@@ -271,22 +244,23 @@ class SCashier:
         """
 
         # Limpia la lista de productos
-        _product_list.clear()
+        self._product_list.clear()
         # Limpia el nombre del cliente
-        _customer_name_text_field.value = ""
-        _customer_name_text_field.update()
+        self._customer_name_text_field.value = ""
+        self._customer_name_text_field.update()
         # Limpia el selector de empleado en caja
-        _employee_selector_content.value = ""
-        _employee_selector_content.clean()
-        _employee_selector_content.update()
+        self._employee_selector_content.value = ""
+        self._employee_selector_content.clean()
+        self._employee_selector_content.update()
         # Limpia la lista de productos que se muestran en el resumen de la comanda
-        _on_screen_product_list.content.controls.clear()
-        _on_screen_product_list.update()
+        self._on_screen_product_list.content.controls.clear()
+        self._on_screen_product_list.update()
         # Limpia el total de la compra
-        _total.content.value = f"Total: ${_product_list._total}"
-        _total.update()
+        self._total.content.value = f"Total: ${self._product_list._total}"
+        self._total.update()
 
 
+    @instrumentation.timed("cashier.cancel_order")
     def _cancel_button_on_click(self, _: ft.ControlEvent) -> None:
         """
         Permite cancelar la comanda y regresa el botón a su estado original
@@ -335,23 +309,23 @@ class SCashier:
         page.update()
 
 
-    def _send_button_on_click(self, _: ft.ControlEvent, page) -> None:
+    def _build_alert(self, page: ft.Page, title: str, message: str) -> ft.AlertDialog:
         """
-        Permite enviar la comanda al SCD y regresa el botón a su estado original
+        Construye un cuadro de alerta con un botón para cerrarlo
 
         Parámetros:
-            - :param:`_` (ft.ControlEvent): Evento de hacer clic en el botón.
             - :param:`page` (ft.Page): Página actual.
+            - :param:`title` (str): Título del cuadro de alerta.
+            - :param:`message` (str): Mensaje del cuadro de alerta.
 
         Regresa:
-            - No regresa ningún valor.
+            - :return:`alert` (ft.AlertDialog): Cuadro de alerta cerrado
         """
 
-        # Se crea el cuadro de alerta
         alert: ft.AlertDialog = ft.AlertDialog(
             # Título del cuadro de alerta
             title = ft.Text(
-                "No se puede enviar la comanda",
+                title,
                 font_family = styles["alert"]["font"],
                 size = styles["alert"]["title_font_size"],
                 color = styles["alert"]["font_color"],
@@ -360,7 +334,7 @@ class SCashier:
             ),
             # Mensaje del cuadro de alerta
             content = ft.Text(
-                "Por favor, verifica que hayan productos en el resumen de la comanda, y\nque el nombre del cliente y quién esté atendiendo no estén vacíos.",
+                message,
                 font_family = styles["alert"]["font"],
                 size = styles["alert"]["content_font_size"],
                 color = styles["alert"]["font_color"],
@@ -393,42 +367,131 @@ class SCashier:
             actions_alignment = ft.MainAxisAlignment.CENTER
         )
 
+        return alert
+
+
+    @instrumentation.timed("cashier.send_order")
+    def _send_button_on_click(self, _: ft.ControlEvent, page) -> None:
+        """
+        Permite enviar la comanda al SCD y regresa el botón a su estado original
+
+        Parámetros:
+            - :param:`_` (ft.ControlEvent): Evento de hacer clic en el botón.
+            - :param:`page` (ft.Page): Página actual.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
         # Se verifica que haya productos en el resumen de la comanda, y que el nombre
         # del cliente y quién esté atendiendo no estén vacíos
         params_to_verify: tuple[bool, bool] = (
-            not _on_screen_product_list.content.controls,
-            _customer_name_text_field.value == "",
-            _employee_selector_content.value == ""
+            not self._on_screen_product_list.content.controls,
+            self._customer_name_text_field.value == "",
+            self._employee_selector_content.value == ""
         )
 
         # Se abre el cuadro de alerta si no se cumplen las condiciones
         if any(params_to_verify):
-            self._open_alert(page, alert)
-        # Si se cumplen las condiciones, se envia la comanda al Sistema Digital de Comandas (SCD)
-        # y se limpia la lista de productos, el total de la compra y el nombre del cliente
+            self._open_alert(page, self._build_alert(
+                page,
+                "No se puede enviar la comanda",
+                "Por favor, verifica que hayan productos en el resumen de la comanda, y\nque el nombre del cliente y quién esté atendiendo no estén vacíos."
+            ))
+            return
+
+        # Se guardan los datos de la comanda en un diccionario
+        order: dict[str] = {
+            "customer_name" : self._customer_name_text_field.value,
+            "items" : self._product_list.order_items(),
+            "total" : self._product_list._total,
+            "employee" : self._employee_selector_content.value,
+        }
+
+        # Se verifica que queden existencias de los productos antes de enviar la comanda
+        short_products: list[Product] = self._short_products(order["items"])
+
+        if short_products:
+            self._card_cache.show_stock()
+            self._open_alert(page, self._build_alert(
+                page,
+                "Sin existencias",
+                "No quedan existencias suficientes de:\n" + "\n".join(product.name for product in short_products)
+            ))
+            return
+
+        # Se guarda la comanda en la cola de envío, el envío al SCD ocurre en segundo plano;
+        # sus existencias se apartan en el catálogo y se marcan las tarjetas agotadas, el
+        # cuadro de alerta envía los cambios de las tarjetas junto con la página
+        services.submit_order(order, lambda rejected, error: self._order_rejected(page, rejected, error))
+        self._card_cache.show_stock()
+
+        self._open_alert(page, self._build_alert(
+            page,
+            "¡Comanda enviada!",
+            "La comanda se ha enviado correctamente al Sistema Digital de Comandas."
+        ))
+
+        self._clear_order_summary()
+
+
+    def _order_rejected(self, page: ft.Page, order: dict, error: Exception) -> None:
+        """
+        Avisa a la caja que la base de datos rechazó una comanda por falta de existencias o que
+        la cola de envío la descartó por un error que no se puede reintentar
+
+        Se llama desde el hilo de la cola de envío, después de devolver sus existencias al catálogo.
+
+        Parámetros:
+            - :param:`page` (ft.Page): Página de la caja que envió la comanda.
+            - :param:`order` (dict): Comanda rechazada.
+            - :param:`error` (Exception): Error de la comanda, :class:`OutOfStockError` con los
+              productos que no alcanzaron si faltaron existencias.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        message: str = f"La comanda de {order['customer_name']} no llegó al Sistema Digital de Comandas, "
+
+        if isinstance(error, OutOfStockError):
+            products_by_id: dict[int, Product] = services.products_by_id()
+            names: list[str] = [
+                products_by_id[product_id].name if product_id in products_by_id else str(product_id)
+                for product_id in error.product_ids
+            ]
+            message += "no quedaron existencias suficientes de:\n" + "\n".join(names)
         else:
-            # Se guardan los datos de la comanda en un diccionario
-            order: dict[str] = {
-                "customer_name" : _customer_name_text_field.value,
-                "products_and_quantities" : _product_list._quantity_ref_dict,
-                "total" : _product_list._total,
-                "employee" : _employee_selector_content.value,
-            }
+            message += f"la base de datos no la aceptó y se descartó, vuelve a capturarla.\nError: {error}"
+
+        self._card_cache.show_stock()
+        self._open_alert(page, self._build_alert(page, "Comanda rechazada", message))
+
+
+    def _short_products(self, items: list[tuple[int, int, int]]) -> list[Product]:
+        """
+        Productos de la comanda con menos existencias de las que se piden
 
-            # Se envía la comanda al SCD
-            db_connection.send_order_to_db(order)
+        Parámetros:
+            - :param:`items` (list[tuple[int, int, int]]): ID, cantidad y precio unitario de cada producto.
 
-            # Se crea el cuadro de alerta
-            alert.title.value = "¡Comanda enviada!"
-            alert.content.value = "La comanda se ha enviado correctamente al Sistema Digital de Comandas."
+        Regresa:
+            - :return:`short_products` (list[Product]): Productos sin existencias suficientes
+        """
 
-            # Se abre el cuadro de alerta
-            self._open_alert(page, alert)
+        products_by_id: dict[int, Product] = services.products_by_id()
+        short_products: list[Product] = []
 
-            self._clear_order_summary()
+        for product_id, quantity, _unit_price in items:
+            product: Product | None = products_by_id.get(int(product_id))
 
+            if product is not None and product.stock is not None and int(quantity) > product.stock:
+                short_products.append(product)
 
-    def catalog_title() -> ft.Container:
+        return short_products
+
+
+    def catalog_title(self) -> ft.Container:
         """
         Título del catálogo de productos.
 
@@ -510,7 +573,7 @@ class SCashier:
         catalog_content = ft.Container(
             width = styles["catalog"]["width_container"],
             alignment = ft.alignment.center,
-            content = _list_view,
+            content = self._list_view,
         )
 
         return catalog_content
@@ -530,7 +593,7 @@ class SCashier:
         """
 
         _dropdown: ft.Dropdown = ft.Dropdown(
-            value = "Cliente",
+            value = CustomerType.CLIENTE.label,
             label = "Tipo de cliente",
             label_style = ft.TextStyle(
                 font_family = styles["customer_type"]["font"],
@@ -542,17 +605,13 @@ class SCashier:
                 size = styles["customer_type"]["font_size"],
                 color = styles["customer_type"]["font_color"],
             ),
-            options = [
-                ft.dropdown.Option("Cliente"),
-                ft.dropdown.Option(r"Empleado - 15% descuento"),
-                ft.dropdown.Option(r"Socio - 30% descuento")
-            ],
+            options = [ft.dropdown.Option(customer_type.label) for customer_type in CustomerType],
             border_radius = styles["customer_type"]["border_radius"],
             bgcolor = styles["customer_type"]["bgcolor"],
             border_color = styles["customer_type"]["border_color"],
             focused_bgcolor = styles["customer_type"]["bgcolor"],
             focused_border_color = styles["customer_type"]["border_color"],
-            on_change = lambda _: self._apply_customer_type_discount(_, _dropdown.value)
+            on_change = lambda _: self._apply_customer_type_discount(_, CustomerType.from_label(_dropdown.value))
         )
 
         selector_content: ft.Container = ft.Container(
@@ -565,7 +624,27 @@ class SCashier:
         return selector_content
 
 
-    def _title() -> ft.Container:
+    def _fill_employee_selector(self, employees: list[str]) -> None:
+        """
+        Llena las opciones del selector de empleado en caja
+
+        Se llama desde el hilo de carga de empleados, por lo que el selector puede
+        estar o no en la página en ese momento.
+
+        Parámetros:
+            - :param:`employees` (list[str]): Nombres de los empleados activos.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._employee_selector_content.options = [ft.dropdown.Option(employee) for employee in employees]
+
+        if self._employee_selector_content.page is not None:
+            self._employee_selector_content.update()
+
+
+    def _title(self) -> ft.Container:
         """
         Título del cuadro de resumen.
 
@@ -586,17 +665,20 @@ class SCashier:
             text_align = ft.TextAlign.CENTER
         )
 
+        # Se llenan las opciones del selector de empleado sin esperar a la base de datos
+        services.on_employees(self._fill_employee_selector)
+
         # Selector de empleado en caja
         _employee_selector: ft.Container = ft.Container(
             width = styles["employee_selector"]["width"],
             height = styles["employee_selector"]["height"],
             alignment = ft.alignment.center,
-            content = _employee_selector_content
+            content = self._employee_selector_content
         )
 
         # Nombre del cliente
         _customer_name: ft.Container = ft.Container(
-            content = _customer_name_text_field
+            content = self._customer_name_text_field
         )
 
         # Se coloca el título y el cuadro de texto para el nombre del cliente dentro
@@ -619,7 +701,7 @@ class SCashier:
         return title_content
 
 
-    def _subtitle() -> ft.Container:
+    def _subtitle(self) -> ft.Container:
         """
         Subtítulo del cuadro de resumen.
 
@@ -730,7 +812,7 @@ class SCashier:
         return buttons_content
 
 
-    def order_summary(page) -> ft.Container:
+    def order_summary(self, page: ft.Page) -> ft.Container:
         """
         Resumen de la comanda.
 
@@ -746,11 +828,11 @@ class SCashier:
         """
 
         # Título del cuadro de resumen y cuadro de texto para el nombre del cliente
-        _title: ft.Container = SCashier._title()
+        _title: ft.Container = self._title()
         # Subtítulo del cuadro de resumen
-        _subtitle: ft.Container = SCashier._subtitle()
+        _subtitle: ft.Container = self._subtitle()
         # Botones para cancelar la comanda o enviarla al SCD
-        _buttons: ft.Container = SCashier()._buttons(page)
+        _buttons: ft.Container = self._buttons(page)
 
         order_summary_content: ft.Container = ft.Container(
             width = styles["card"]["width"],
@@ -765,10 +847,10 @@ class SCashier:
                     _title,
                     # Subtítulo del cuadro de resumen
                     _subtitle,
-                    # Lista con el resumen de la comanda (variable global)
-                    _on_screen_product_list,
+                    # Lista con el resumen de la comanda de la sesión
+                    self._on_screen_product_list,
                     # Total de la compra
-                    _total,
+                    self._total,
                     # Botones para cancelar la comanda o enviarla al SCD
                     _buttons
                 ]
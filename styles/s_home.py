@@ -2,12 +2,16 @@
 import flet as ft
 
 from styles.styles import Styles
+from other.hover_effect import HoverEffect
 
 
 # Propiedades de estilo de la página de inicio, se obtienen de la clase
 # Styles del archivo styles.py
 styles: dict[str] = Styles.home_styles()
 
+# Efecto de los botones al pasar el cursor sobre ellos
+_button_hover: HoverEffect = HoverEffect(elevation = 30)
+
 
 class SHome:
     """
@@ -20,14 +24,7 @@ class SHome:
         Permite al botón elevarse al pasar el cursor sobre él
         """
 
-        if _.data == "true":
-            for __ in range(30):
-                self._cashier_button.elevation += 1
-                self._cashier_button.update()
-        else:
-            for __ in range(30):
-                self._cashier_button.elevation -= 1
-                self._cashier_button.update()
+        _button_hover.apply(_, self._cashier_button_content, self._cashier_button)
 
 
     def _cashier_button_on_click(self, page: ft.Page, _: ft.ControlEvent) -> None:
@@ -46,14 +43,7 @@ class SHome:
         Permite al botón elevarse al pasar el cursor sobre él
         """
 
-        if _.data == "true":
-            for __ in range(30):
-                self._orders_button.elevation += 1
-                self._orders_button.update()
-        else:
-            for __ in range(30):
-                self._orders_button.elevation -= 1
-                self._orders_button.update()
+        _button_hover.apply(_, self._orders_button_content, self._orders_button)
 
 
     def _orders_button_on_click(self, page: ft.Page, _: ft.ControlEvent) -> None:
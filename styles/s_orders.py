@@ -1,69 +1,220 @@
 
+from math import ceil
+from typing import Callable
+from threading import Lock, RLock, Thread
+from collections import OrderedDict
+
 import flet as ft
 
 from styles.styles import Styles
+from other.services import services
 from other.order_card import OrderCard
-from other.db_connection import DBConnection
+from other.order_delta import OrderDelta
+from other.virtual_grid import VirtualGrid
+from other.instrumentation import instrumentation
 
 
 # Propiedades de estilo de la página de órdenes, se obtienen de la clase
 # Styles del archivo styles.py
 styles: dict[str] = Styles.orders_styles()
 
-
-# Conexión con la base de datos
-db_connection: DBConnection = DBConnection()
-# Lista de órdenes
-orders: dict[str] = db_connection.get_orders()
-# Número de órdenes en el local
-pos_orders: int = 0
-# Número de órdenes de Rappi
-rappi_orders: int = 0
-# Número de órdenes de menú digital
-digital_menu_orders: int = 0
-
-# Objeto de la clase ft.ListView para contener los productos del catálogo
-_list_view: ft.ListView = ft.ListView(
-    horizontal = True,
-    spacing = styles["list"]["spacing"],
-)
+# Tarjetas de órdenes que se conservan construidas por sesión, las menos usadas se descartan
+ORDER_CARD_CACHE_SIZE: int = 32
 
 
 class SOrders:
     """
     Propiedades de los controles utilizados por la función :function:`Orders`
     del archivo :file:`orders.py` para la creación de la página de órdenes.
+
+    Cada sesión tiene su propio objeto con sus órdenes y sus controles, y se suscribe a la
+    consulta de órdenes compartida por todas las pantallas, :class:`OrderPoller`.
+
+    El tablero es una :class:`VirtualGrid` horizontal: solo se construyen las tarjetas de las
+    órdenes a la vista y unas cuantas de reserva, y las columnas que salen de la vista se
+    reciclan. En el modo por páginas el tablero muestra una página de órdenes a la vez.
+
+    Los cambios de la consulta llegan en su hilo y el desplazamiento del tablero en el de
+    Flet: las órdenes y el modo del tablero se modifican con :attr:`_lock` tomado, y el
+    tablero recibe una copia de los pares ``(ID, orden)``, así las tarjetas se construyen sin
+    leer las órdenes de la sesión. La caché de tarjetas tiene su propio candado.
     """
 
-    def _build_order_list(self) -> None:
+    def __init__(self) -> None:
+        # Lista de órdenes activas en el orden en que llegaron, se llena con los cambios que
+        # entrega la consulta de órdenes, sin detener la construcción de la página
+        self._orders: dict[int, dict] = {}
+        # Tarjetas construidas por ID de la orden junto con la orden de la que salieron, de la
+        # menos a la más usada
+        self._cards: OrderedDict[int, tuple[dict, ft.Card]] = OrderedDict()
+        # Candado de las órdenes y del modo del tablero, y candado de la caché de tarjetas
+        self._lock: RLock = RLock()
+        self._cards_lock: Lock = Lock()
+        # Textos de los contadores de órdenes activas, se actualizan en su lugar
+        self._total_counter_text: ft.Text | None = None
+        self._origin_counter_texts: dict[str, ft.Text] = {}
+        # Modo por páginas y página actual del tablero
+        self._paged: bool = False
+        self._page_index: int = 0
+        # Indica si ya se recibieron cambios de la consulta, con sus contadores
+        self._received_changes: bool = False
+
+        # Tablero de órdenes, cada columna contiene una tarjeta y su separación
+        self._board: VirtualGrid = VirtualGrid(
+            self._order_cell,
+            columns = 1,
+            row_height = styles["card"]["width"] + styles["list"]["spacing"],
+            viewport_height = styles["list"]["viewport_width"],
+            horizontal = True,
+            expand = True,
+        )
+        # Objeto de la clase ft.ListView que contiene las tarjetas de órdenes
+        self._list_view: ft.ListView = self._board.list_view
+
+        # Controles para cambiar de página y de modo del tablero
+        self._page_text: ft.Text = self._pager_text("Todas las órdenes")
+        self._previous_button: ft.IconButton = self._pager_button(ft.icons.CHEVRON_LEFT, lambda _: self._change_page(-1))
+        self._next_button: ft.IconButton = self._pager_button(ft.icons.CHEVRON_RIGHT, lambda _: self._change_page(1))
+        self._mode_button: ft.TextButton = ft.TextButton(
+            content = self._pager_text("Por páginas"),
+            on_click = self._toggle_paged
+        )
+        self._pager: ft.Row = ft.Row(
+            alignment = ft.MainAxisAlignment.END,
+            controls = [self._previous_button, self._page_text, self._next_button, self._mode_button]
+        )
+        self._show_orders()
+
+        # Contenedor de los contadores de órdenes activas
+        self._counter_content: ft.Container = ft.Container(
+            width = styles["counter"]["width"],
+            alignment = ft.alignment.center,
+        )
+
+
+    def _build_order_card(self, order_id: int, details: dict[str]) -> ft.Card:
         """
-        Construye la lista de órdenes.
+        Construye la tarjeta de una orden.
 
         Parámetros:
-            - :param:`page` (ft.Page): Página actual.
+            - :param:`order_id` (int): ID de la orden.
+            - :param:`details` (dict[str]): Datos de la orden.
+
+        Regresa:
+            - :return:`order_card` (ft.Card): Tarjeta de la orden
+        """
+
+        # Se extraen los datos de la orden
+        customer_name: str = details["customer_name"]
+        products_n_quantities: str = details["products_n_quantities"]
+        total: str = details["total"]
+        hour: str = details["hour"]
+        origin: str = details["origin"]
+
+        return OrderCard(order_id, customer_name, products_n_quantities, total, hour, origin).build_card()
+
+
+    def _order_cell(self, item: tuple[int, dict], _: int) -> ft.Card:
+        """
+        Regresa la tarjeta de una orden que entra a la vista, construyéndola solo si no se tiene
+        o si la orden cambió desde que se construyó.
+
+        Se llama desde el tablero, en el hilo de la consulta o en el del desplazamiento.
+
+        Parámetros:
+            - :param:`item` (tuple[int, dict]): ID de la orden y sus datos.
+            - :param:`_` (int): Posición de la orden en el tablero.
+
+        Regresa:
+            - :return:`order_card` (ft.Card): Tarjeta de la orden
+        """
+
+        order_id, order = item
+
+        with self._cards_lock:
+            cached: tuple[dict, ft.Card] | None = self._cards.get(order_id)
+
+            if cached is not None and cached[0] is order:
+                self._cards.move_to_end(order_id)
+                return cached[1]
+
+        card: ft.Card = self._build_order_card(order_id, order)
+
+        with self._cards_lock:
+            self._cards[order_id] = (order, card)
+            self._cards.move_to_end(order_id)
+
+            # Se descarta la tarjeta usada hace más tiempo
+            if len(self._cards) > ORDER_CARD_CACHE_SIZE:
+                self._cards.popitem(last = False)
+
+        return card
+
+
+    def _reconcile_order_list(self, delta: OrderDelta) -> None:
+        """
+        Aplica los cambios a la lista de órdenes tocando solo las tarjetas que cambiaron.
+
+        Las órdenes eliminadas quitan su tarjeta, las modificadas conservan su lugar y las
+        nuevas se agregan al final. Las tarjetas de las órdenes modificadas y nuevas se
+        construyen hasta que entran a la vista.
+
+        Parámetros:
+            - :param:`delta` (OrderDelta): Órdenes agregadas, modificadas y eliminadas.
 
         Regresa:
             - No regresa ningún valor.
         """
 
-        for id, details in orders.items():
+        with self._lock:
+            with self._cards_lock:
+                for order_id in [*delta.removed, *delta.updated]:
+                    self._cards.pop(order_id, None)
 
-            # Se extraen los datos de la orden
-            customer_name: str = details["customer_name"]
-            products_n_quantities: str = details["products_n_quantities"]
-            total: str = details["total"]
-            hour: str = details["hour"]
-            origin: str = details["origin"]
+            for order_id in delta.removed:
+                self._orders.pop(order_id, None)
 
-            # Tarjeta de orden
-            order_card: ft.Card = OrderCard(id, customer_name, products_n_quantities, total, hour, origin).build_card()
+            self._orders.update(delta.added)
+            self._orders.update(delta.updated)
 
-            _list_view.controls.append(order_card)
+            self._show_orders()
 
 
-    def _calculate_order_quantity_by_origin(self) -> None:
+    def _show_orders(self, keep_position: bool = True) -> None:
         """
-        Calcula la cantidad de órdenes por origen.
+        Pasa al tablero las órdenes de la vista actual, todas o las de la página actual,
+        sin enviar los cambios al navegador
+
+        Se llama con :attr:`_lock` tomado.
+
+        Parámetros:
+            - :param:`keep_position` (bool): Verdadero para conservar la posición del desplazamiento.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        items: list[tuple[int, dict]] = list(self._orders.items())
+
+        if not self._paged:
+            self._board.set_items(items, keep_position = keep_position)
+            return
+
+        page_size: int = styles["list"]["page_size"]
+        page_count: int = max(1, ceil(len(items) / page_size))
+        self._page_index = min(self._page_index, page_count - 1)
+        start: int = self._page_index * page_size
+
+        self._board.set_items(items[start:start + page_size], keep_position = keep_position)
+        self._page_text.value = f"Página {self._page_index + 1} de {page_count}"
+        self._previous_button.disabled = self._page_index == 0
+        self._next_button.disabled = self._page_index == page_count - 1
+
+
+    def _update_board(self) -> None:
+        """
+        Envía el tablero y sus controles de página al navegador en un solo mensaje,
+        si ya están en la página
 
         Parámetros:
             - No recibe parámetros.
@@ -72,32 +223,115 @@ class SOrders:
             - No regresa ningún valor.
         """
 
-        global pos_orders, rappi_orders, digital_menu_orders
+        if self._list_view.page is not None:
+            self._list_view.page.update(self._list_view, self._pager)
+
+
+    def _change_page(self, step: int) -> None:
+        """
+        Avanza o retrocede páginas del tablero en el modo por páginas
+
+        Parámetros:
+            - :param:`step` (int): Páginas a avanzar, negativo para retroceder.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            self._page_index = max(0, self._page_index + step)
+            self._show_orders(keep_position = False)
+
+        self._update_board()
+
+
+    def _toggle_paged(self, _: ft.ControlEvent) -> None:
+        """
+        Cambia el tablero entre el modo con todas las órdenes y el modo por páginas
+
+        Parámetros:
+            - :param:`_` (ft.ControlEvent): Evento de hacer clic en el botón de modo.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        with self._lock:
+            self._paged = not self._paged
+            self._page_index = 0
+            self._mode_button.content.value = "Ver todas" if self._paged else "Por páginas"
+            self._previous_button.visible = self._next_button.visible = self._paged
+
+            if not self._paged:
+                self._page_text.value = "Todas las órdenes"
+
+            self._show_orders(keep_position = False)
+
+        self._update_board()
+
+
+    def _pager_text(self, value: str) -> ft.Text:
+        """
+        Crea un texto de los controles de página del tablero
+
+        Parámetros:
+            - :param:`value` (str): Texto.
+
+        Regresa:
+            - :return:`pager_text` (ft.Text): Texto con las propiedades de estilo
+        """
+
+        return ft.Text(
+            value,
+            font_family = styles["counter"]["font"],
+            size = styles["list"]["pager_font_size"],
+            color = styles["counter"]["font_color"],
+            weight = ft.FontWeight.W_300,
+        )
+
+
+    def _pager_button(self, icon: str, on_click: Callable[[ft.ControlEvent], None]) -> ft.IconButton:
+        """
+        Crea un botón para cambiar de página en el tablero, oculto fuera del modo por páginas
+
+        Parámetros:
+            - :param:`icon` (str): Icono del botón.
+            - :param:`on_click` (Callable[[ft.ControlEvent], None]): Función al hacer clic en el botón.
 
-        pos_orders = rappi_orders = digital_menu_orders = 0
+        Regresa:
+            - :return:`pager_button` (ft.IconButton): Botón para cambiar de página
+        """
 
-        for order in orders.values():
-            if order["origin"] == "Local":
-                pos_orders += 1
-            elif order["origin"] == "Rappi":
-                rappi_orders += 1
-            elif order["origin"] == "Menú digital":
-                digital_menu_orders += 1
+        return ft.IconButton(
+            icon = icon,
+            icon_color = styles["counter"]["font_color"],
+            visible = False,
+            on_click = on_click
+        )
 
 
-    def _subcounter(self, origin: str, quantity: int, tag_color: str) -> ft.Container:
+    def _subcounter(self, origin: str, tag_color: str) -> ft.Container:
         """
         Crea los contadores de órdenes por origen.
 
         Parámetros:
             - :param:`origin` (str): Origen de la orden.
-            - :param:`quantity` (int): Cantidad de órdenes por origen.
             - :param:`tag_color` (str): Color de la etiqueta.
 
         Regresa:
             - :return:`counter` (ft.Container): Contador de órdenes por origen.
         """
 
+        # Se guarda el texto del contador para cambiar su valor sin reconstruirlo
+        self._origin_counter_texts[origin] = ft.Text(
+            f"{origin}: 0",
+            font_family = styles["counter"]["font"],
+            size = styles["counter"]["font_size"],
+            color = styles["counter"]["font_color"],
+            weight = ft.FontWeight.W_300,
+            text_align = ft.TextAlign.CENTER
+        )
+
         return ft.Container(
             alignment = ft.alignment.center,
             content = ft.Row(
@@ -113,14 +347,7 @@ class SOrders:
                             bottom_right = styles["counter"]["tag_border_radius"]
                         ),
                     ),
-                    ft.Text(
-                        f"{origin}: {quantity}",
-                        font_family = styles["counter"]["font"],
-                        size = styles["counter"]["font_size"],
-                        color = styles["counter"]["font_color"],
-                        weight = ft.FontWeight.W_300,
-                        text_align = ft.TextAlign.CENTER
-                    )
+                    self._origin_counter_texts[origin]
                 ]
             )
         )
@@ -164,57 +391,142 @@ class SOrders:
             - :return:`counter_content` (ft.Container): Contador de órdenes activas
         """
 
-        # Calcula la cantidad de órdenes por origen
-        self._calculate_order_quantity_by_origin()
+        self._counter_content.content = self._counter_column()
+
+        # Mientras llega la primera consulta de órdenes, los contadores se llenan en segundo plano
+        # con el conteo por origen de la base de datos
+        Thread(target = self._cold_start_counters, name = "order-counters", daemon = True).start()
+
+        return self._counter_content
+
+
+    def _counter_column(self) -> ft.Column:
+        """
+        Construye los contadores de órdenes activas totales y por origen, en cero.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - :return:`counter_column` (ft.Column): Contadores de órdenes activas
+        """
+
+        self._total_counter_text = ft.Text(
+            "Total activos: 0",
+            font_family = styles["counter"]["font"],
+            size = styles["counter"]["font_size"],
+            color = styles["counter"]["font_color"],
+            weight = ft.FontWeight.W_300,
+            text_align = ft.TextAlign.CENTER
+        )
 
         # Contador de órdenes activas totales
         total_counter: ft.Container = ft.Container(
             alignment = ft.alignment.center,
-            content = ft.Text(
-                f"Total activos: {len(orders)}",
-                font_family = styles["counter"]["font"],
-                size = styles["counter"]["font_size"],
-                color = styles["counter"]["font_color"],
-                weight = ft.FontWeight.W_300,
-                text_align = ft.TextAlign.CENTER
-            )
+            content = self._total_counter_text
         )
 
         # Contador de órdenes activas por caja
-        point_of_sale_counter: ft.Container = self._subcounter("Local", pos_orders, styles["counter"]["pos_color"])
+        point_of_sale_counter: ft.Container = self._subcounter("Local", styles["counter"]["pos_color"])
 
         # Contador de órdenes activas por Rappi
-        rappi_counter: ft.Container = self._subcounter("Rappi", rappi_orders, styles["counter"]["rappi_color"])
+        rappi_counter: ft.Container = self._subcounter("Rappi", styles["counter"]["rappi_color"])
 
         # Contador de órdenes activas por menú digital
-        digital_menu_counter: ft.Container = self._subcounter("Menú digital", digital_menu_orders, styles["counter"]["digital_menu_color"])
-
-        # Contenedor de los contadores
-        counter_content: ft.Container = ft.Container(
-            width = styles["counter"]["width"],
-            alignment = ft.alignment.center,
-            content = ft.Column(
-                alignment = ft.MainAxisAlignment.CENTER,
-                controls = [
-                    # Contador de órdenes activas totales
-                    total_counter,
-                    # Contador de órdenes activas por caja, Rappi y menú digital
-                    ft.Row(
-                        alignment = ft.MainAxisAlignment.SPACE_AROUND,
-                        controls = [
-                            point_of_sale_counter,
-                            rappi_counter,
-                            digital_menu_counter
-                        ]
-                    )
-                ]
-            )
+        digital_menu_counter: ft.Container = self._subcounter("Menú digital", styles["counter"]["digital_menu_color"])
+
+        counter_column: ft.Column = ft.Column(
+            alignment = ft.MainAxisAlignment.CENTER,
+            controls = [
+                # Contador de órdenes activas totales
+                total_counter,
+                # Contador de órdenes activas por caja, Rappi y menú digital
+                ft.Row(
+                    alignment = ft.MainAxisAlignment.SPACE_AROUND,
+                    controls = [
+                        point_of_sale_counter,
+                        rappi_counter,
+                        digital_menu_counter
+                    ]
+                )
+            ]
         )
 
-        return counter_content
+        return counter_column
 
 
-    def order_list(self) -> ft.Container:
+    def _patch_counters(self, counts: dict[str, int]) -> None:
+        """
+        Cambia en su lugar los valores de los contadores de órdenes activas
+
+        Parámetros:
+            - :param:`counts` (dict[str, int]): Número de órdenes activas por origen.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        self._total_counter_text.value = f"Total activos: {sum(counts.values())}"
+
+        for origin, text in self._origin_counter_texts.items():
+            text.value = f"{origin}: {counts.get(origin, 0)}"
+
+        # Solo se envían los textos que cambiaron, si el contador ya está en la página
+        if self._counter_content.page is not None:
+            self._counter_content.update()
+
+
+    def _cold_start_counters(self) -> None:
+        """
+        Llena los contadores antes de que lleguen las órdenes, con el conteo de la base de datos
+
+        El conteo se aplica con el candado del tablero tomado y solo si aún no llegan cambios,
+        cuyos contadores son más recientes.
+
+        Parámetros:
+            - No recibe parámetros.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        try:
+            counts: dict[str, int] = services.order_poller().origin_counts()
+        except Exception:
+            return
+
+        with self._lock:
+            if not self._received_changes:
+                self._patch_counters(counts)
+
+
+    @instrumentation.timed("orders.on_order_changes")
+    def _on_order_changes(self, delta: OrderDelta) -> None:
+        """
+        Muestra los cambios en las órdenes activas que entrega la consulta de órdenes
+
+        Parámetros:
+            - :param:`delta` (OrderDelta): Órdenes agregadas, modificadas y eliminadas.
+
+        Regresa:
+            - No regresa ningún valor.
+        """
+
+        # Con el candado del tablero, igual que el conteo inicial
+        with self._lock:
+            self._received_changes = True
+
+        # Solo se construyen las tarjetas que cambiaron y están a la vista
+        self._reconcile_order_list(delta)
+
+        # Solo se actualiza si ya está en la página
+        self._update_board()
+
+        # Los contadores por origen los lleva la consulta compartida con los mismos cambios
+        self._patch_counters(services.order_poller().origin_counts())
+
+
+    def order_list(self, page: ft.Page) -> ft.Container:
         """
         Lista de órdenes que se han enviado al SCD y se mostrarán en la página de órdenes
         como tarjetas.
@@ -226,11 +538,30 @@ class SOrders:
             - :return:`order_list_content` (ft.Container): Lista de tarjetas con las órdenes
         """
 
-        self._build_order_list()
+        # Las órdenes se agregan en cuanto llegan de la consulta compartida, sin esperar
+        # a la base de datos; la suscripción se cancela al cerrarse la sesión, después de lo
+        # que ya estuviera registrado para ese momento
+        unsubscribe: Callable[[], None] = services.order_poller().subscribe(self._on_order_changes)
+        previous_on_close: Callable | None = page.on_close
+
+        def on_close(event: ft.ControlEvent) -> None:
+            unsubscribe()
+            if previous_on_close is not None:
+                previous_on_close(event)
+
+        page.on_close = on_close
 
         order_list_content: ft.Container = ft.Container(
             expand = True,
-            content = _list_view
+            content = ft.Column(
+                expand = True,
+                controls = [
+                    # Controles de página y de modo del tablero
+                    self._pager,
+                    # Tablero de tarjetas de órdenes
+                    self._list_view
+                ]
+            )
         )
 
         return order_list_content
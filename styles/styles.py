@@ -43,6 +43,7 @@ class Styles:
                 "hover_color" : "#1F2129",
                 "tint_color" : "#404040",
                 "shadow_color" : "#656565",
+                "sold_out_opacity" : 0.4,
             },
             "ticket_card" : {
                 "height" : 75,
@@ -131,7 +132,9 @@ class Styles:
                 "width_container" : 840,
                 "width_list" : 835,
                 "height" : 420,
-                "spacing" : 1
+                "spacing" : 1,
+                # Altura de cada fila del catálogo: tarjeta, su margen y la separación
+                "row_height" : 210
             },
             "card" : {
                 "width" : 700,
@@ -248,6 +251,11 @@ class Styles:
             },
             "list" : {
                 "spacing" : 5,
+                # Ancho visible del tablero antes de conocer el de la ventana
+                "viewport_width" : 1870,
+                # Tarjetas por página en el modo por páginas
+                "page_size" : 3,
+                "pager_font_size" : 20,
             },
             "card": {
                 "width" : 530,
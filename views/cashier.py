@@ -17,16 +17,19 @@ def Cashier(page: ft.Page) -> ft.Column:
     Regresa un objeto de la clase :class:`ft.Column`
     """
 
+    # Sesión de caja de esta página, cada terminal tiene su propia comanda
+    s_cashier: SCashier = SCashier()
+
     # Resumen de la comanda
-    order_summary: ft.Container = SCashier.order_summary(page)
+    order_summary: ft.Container = s_cashier.order_summary(page)
     # Título de catálogo de productos
-    catalog_title: ft.Container = SCashier.catalog_title()
+    catalog_title: ft.Container = s_cashier.catalog_title()
     # Barra de búsqueda
-    search_bar: ft.Container = SCashier().search_bar()
+    search_bar: ft.Container = s_cashier.search_bar()
     # Catálogo de productos
-    catalog: ft.Container = SCashier().catalog()
+    catalog: ft.Container = s_cashier.catalog()
     # Selector de tipo de cliente
-    customer_type: ft.Container = SCashier().customer_type_selector()
+    customer_type: ft.Container = s_cashier.customer_type_selector()
 
     # Propiedades de la página de caja
     view: ft.Column = ft.Column(
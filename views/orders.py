@@ -18,10 +18,12 @@ def Orders(page: ft.Page) -> ft.Column:
 
     # Título de la lista de órdenes
     title: ft.Container = SOrders.title()
+    # Controles de las órdenes de esta sesión
+    s_orders: SOrders = SOrders()
     # Contador de órdenes
-    orders_counter: ft.Container = SOrders().active_counter()
+    orders_counter: ft.Container = s_orders.active_counter()
     # Lista de órdenes
-    order_list: ft.Container = SOrders().order_list()
+    order_list: ft.Container = s_orders.order_list(page)
 
     # Propiedades de la página de órdenes
     view: ft.Column = ft.Column(
@@ -13,24 +13,40 @@ class Router:
 
     def __init__(self, page: ft.Page) -> None:
         self.page = page
+        # Cada página se construye la primera vez que se visita
         self.routes = {
-            "/": Home(page),                        # Página de inicio
-            "/cashier": Cashier(page),              # Página de caja
-            "/orders": Orders(page),                # Página de órdenes
-            # "/digital_menu": DigitalMenu(page),     # Página de menú digital
+            "/": Home,                              # Página de inicio
+            "/cashier": Cashier,                    # Página de caja
+            "/orders": Orders,                      # Página de órdenes
+            # "/digital_menu": DigitalMenu,           # Página de menú digital
         }
+        # Páginas ya construidas
+        self._views: dict[str, ft.Column] = {}
         # Página y ruta predeterminadas del router
         self.view = ft.Container(
             border = ft.border.all(1, "#FFFFFF"),
-            content = self.routes["/"],
+            content = self._get_view("/"),
             expand = True
         )
 
+
+    def _get_view(self, route: str) -> ft.Column:
+        """
+        Regresa la página de una ruta, construyéndola la primera vez que se solicita.
+
+        :param:`route` Ruta de la página como string
+        """
+
+        if route not in self._views:
+            self._views[route] = self.routes[route](self.page)
+
+        return self._views[route]
+
     def route_change(self, route: str) -> None:
         """
         Cambia la ruta del router y actualiza la página web.
 
         :param:`route` Ruta a la que se desea cambiar como string
         """
-        self.view.content = self.routes[route.route]
+        self.view.content = self._get_view(route.route)
         self.view.update()
\ No newline at end of file